@@ -1,13 +1,13 @@
 from fastapi import APIRouter, HTTPException, Response, Depends
 from app.models.user import LoginRequest, LoginResponse, User, UserCreate
-from app.services.auth import authenticate_user, create_access_token, get_current_user
+from app.services.auth import authenticate_user_async, create_access_token, get_current_user
 from app.services.user_store import user_store
 
 router = APIRouter(prefix="/auth", tags=["auth"])
 
 @router.post("/login")
-def login(response: Response, request: LoginRequest) -> LoginResponse:
-    user = authenticate_user(request.email, request.password)
+async def login(response: Response, request: LoginRequest) -> LoginResponse:
+    user = await authenticate_user_async(request.email, request.password)
     if not user:
         raise HTTPException(status_code=401, detail="Invalid credentials")
     
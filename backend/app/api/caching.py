@@ -0,0 +1,60 @@
+import json
+from datetime import datetime, timedelta, timezone
+from typing import Awaitable, Callable
+from fastapi import Request, Response
+from app.api.pagination import NEXT_CURSOR_HEADER
+from app.metrics import cache_lookup
+from app.services.downsample import parse_time
+from app.services.response_cache import response_cache
+from app.settings import settings
+
+
+def _closed(stop: str) -> bool:
+    """True when no more data can land in a range ending at `stop`"""
+    return parse_time(stop) < datetime.now(timezone.utc) - timedelta(seconds=settings.RESPONSE_CACHE_INGEST_DELAY)
+
+
+def _etag_matches(request: Request, etag: str) -> bool:
+    header = request.headers.get("if-none-match")
+    if header is None:
+        return False
+    # Weak comparison, as RFC 9110 requires for If-None-Match
+    tags = [tag.strip().removeprefix("W/") for tag in header.split(",")]
+    return "*" in tags or etag in tags
+
+
+async def cached_json(
+    request: Request,
+    stop: str,
+    compute: Callable[[], Awaitable[tuple[list, str | None]]],
+    settled: Callable[[list], bool] = lambda rows: True
+) -> Response:
+    """Serve a history response from the response cache, filling it on a miss.
+
+    Keyed by path and query string. Responses whose range ended before the
+    ingest delay are kept until evicted and sent with a long max-age;
+    `settled` can veto that for rows that may still change (running jobs).
+    Everything else lives RESPONSE_CACHE_RECENT_TTL seconds.
+    """
+    key = (request.url.path, tuple(sorted(request.query_params.multi_items())))
+    entry = response_cache.get(key)
+    cache_lookup("history_response", entry is not None)
+
+    if entry is None:
+        closed = _closed(stop)
+        rows, next_cursor = await compute()
+        body = json.dumps(rows, ensure_ascii=False, allow_nan=False, separators=(",", ":")).encode()
+        ttl = None if closed and settled(rows) else settings.RESPONSE_CACHE_RECENT_TTL
+        entry = response_cache.put(key, body, next_cursor, ttl)
+
+    if entry.immutable:
+        cache_control = f"private, max-age={settings.RESPONSE_CACHE_MAX_AGE}, immutable"
+    else:
+        cache_control = f"private, max-age={int(settings.RESPONSE_CACHE_RECENT_TTL)}"
+    headers = {"ETag": entry.etag, "Cache-Control": cache_control}
+    if entry.next_cursor:
+        headers[NEXT_CURSOR_HEADER] = entry.next_cursor
+
+    if _etag_matches(request, entry.etag):
+        return Response(status_code=304, headers=headers)
+    return Response(entry.body, media_type="application/json", headers=headers)
@@ -1,5 +1,8 @@
-from fastapi import APIRouter, Query
-from app.services.job_history import get_job_history
+from fastapi import APIRouter, Depends, Query, Request
+from app.api.caching import cached_json
+from app.api.pagination import PageParams, bad_page_request
+from app.api.streaming import stream_format, streaming_response
+from app.services.job_history import get_job_history_async, stream_job_history
 
 router = APIRouter(
     prefix="/machines/{machine_id}/jobs",
@@ -7,13 +10,31 @@ router = APIRouter(
 )
 
 @router.get("")
-def job_history(
+async def job_history(
+    request: Request,
     machine_id: str,
     from_time: str = Query(..., alias="from"),
-    to_time: str = Query(..., alias="to")
+    to_time: str = Query(..., alias="to"),
+    page: PageParams = Depends()
 ):
-    return get_job_history(
-        machine_id=machine_id,
-        start=from_time,
-        stop=to_time
-    )
+    media_type = stream_format(request)
+    if media_type:
+        rows = stream_job_history(machine_id, from_time, to_time)
+        return streaming_response(rows, media_type, ["job_id", "start", "end", "duration_sec", "parts_produced"])
+
+    try:
+        return await cached_json(
+            request,
+            to_time,
+            lambda: get_job_history_async(
+                machine_id=machine_id,
+                start=from_time,
+                stop=to_time,
+                limit=page.limit,
+                cursor=page.cursor
+            ),
+            # A job still running at `to` gets its end later
+            settled=lambda jobs: all(job["end"] is not None for job in jobs)
+        )
+    except ValueError as e:
+        raise bad_page_request(e)
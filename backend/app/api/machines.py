@@ -1,8 +1,8 @@
 from fastapi import APIRouter
-from app.services.machines import get_machines
+from app.services.machines import get_machines_async
 
 router = APIRouter(prefix="/machines", tags=["machines"])
 
 @router.get("")
-def list_machines():
-    return get_machines()
+async def list_machines():
+    return await get_machines_async()
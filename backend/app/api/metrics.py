@@ -0,0 +1,10 @@
+from fastapi import APIRouter, Response
+from prometheus_client import CONTENT_TYPE_LATEST, generate_latest
+
+router = APIRouter(tags=["metrics"])
+
+
+@router.get("/metrics")
+async def metrics():
+    # On the event loop: the websocket gauges read live_hub state
+    return Response(generate_latest(), media_type=CONTENT_TYPE_LATEST)
@@ -0,0 +1,24 @@
+from fastapi import HTTPException, Query
+from app.settings import settings
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+class PageParams:
+    """?limit=&cursor= shared by the history endpoints.
+
+    Without a limit a response is cut at HISTORY_MAX_ROWS; either way the
+    body stays a plain list and X-Next-Cursor carries the next page's cursor.
+    """
+
+    def __init__(
+        self,
+        limit: int | None = Query(None, ge=1, le=settings.HISTORY_MAX_ROWS),
+        cursor: str | None = Query(None)
+    ):
+        self.limit = limit or settings.HISTORY_MAX_ROWS
+        self.cursor = cursor
+
+
+def bad_page_request(e: ValueError) -> HTTPException:
+    return HTTPException(status_code=400, detail=f"Invalid time or cursor: {e}")
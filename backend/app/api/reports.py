@@ -1,9 +1,45 @@
-from fastapi import APIRouter
-from app.services.reports import get_daily_report
+from datetime import datetime, timedelta, timezone
+from fastapi import APIRouter, HTTPException, Query
+from app.services.reports import get_daily_report_async, get_range_report_async
+from app.settings import settings
 
 router = APIRouter(prefix="/reports", tags=["reports"])
 
 
+def _trailing_days(days: int) -> tuple[str, str]:
+    now = datetime.now(timezone.utc)
+    start = now.replace(hour=0, minute=0, second=0, microsecond=0) - timedelta(days=days - 1)
+    return start.isoformat().replace("+00:00", "Z"), now.isoformat().replace("+00:00", "Z")
+
+
+async def _range_report(start: str, stop: str):
+    # Range reports only read rollups, so there is nothing to serve without them
+    if not settings.INFLUX_BUCKET_ROLLUP:
+        raise HTTPException(status_code=503, detail="Range reports need INFLUX_BUCKET_ROLLUP to be configured")
+    try:
+        return await get_range_report_async(start, stop)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=f"Invalid time range: {e}")
+
+
 @router.get("/daily")
-def daily_report():
-    return get_daily_report()
+async def daily_report():
+    return await get_daily_report_async()
+
+
+@router.get("/weekly")
+async def weekly_report():
+    return await _range_report(*_trailing_days(7))
+
+
+@router.get("/monthly")
+async def monthly_report():
+    return await _range_report(*_trailing_days(30))
+
+
+@router.get("/range")
+async def range_report(
+    from_time: str = Query(..., alias="from"),
+    to_time: str = Query(..., alias="to")
+):
+    return await _range_report(from_time, to_time)
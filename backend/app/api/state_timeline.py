@@ -1,5 +1,8 @@
-from fastapi import APIRouter, Query
-from app.services.state_timeline import get_state_timeline
+from fastapi import APIRouter, Depends, Query, Request
+from app.api.caching import cached_json
+from app.api.pagination import PageParams, bad_page_request
+from app.api.streaming import stream_format, streaming_response
+from app.services.state_timeline import get_state_timeline_async, stream_state_timeline
 
 router = APIRouter(
     prefix="/machines/{machine_id}/state-timeline",
@@ -7,13 +10,26 @@ router = APIRouter(
 )
 
 @router.get("")
-def machine_state_timeline(
+async def machine_state_timeline(
+    request: Request,
     machine_id: str,
     from_time: str = Query(..., alias="from"),
-    to_time: str = Query(..., alias="to")
+    to_time: str = Query(..., alias="to"),
+    page: PageParams = Depends()
 ):
-    return get_state_timeline(
-        machine_id=machine_id,
-        start=from_time,
-        stop=to_time
-    )
+    # Streamed exports hold one segment at a time, so they are not paged
+    media_type = stream_format(request)
+    if media_type:
+        rows = stream_state_timeline(machine_id, from_time, to_time)
+        return streaming_response(rows, media_type, ["state", "start", "end", "duration_sec"])
+
+    try:
+        return await cached_json(request, to_time, lambda: get_state_timeline_async(
+            machine_id=machine_id,
+            start=from_time,
+            stop=to_time,
+            limit=page.limit,
+            cursor=page.cursor
+        ))
+    except ValueError as e:
+        raise bad_page_request(e)
@@ -0,0 +1,49 @@
+import csv
+import io
+import json
+from typing import AsyncIterator
+from fastapi import Request
+from fastapi.responses import StreamingResponse
+
+NDJSON = "application/x-ndjson"
+CSV = "text/csv"
+
+CSV_CHUNK_ROWS = 500  # rows written per chunk so CSV output isn't flushed row by row
+
+
+def stream_format(request: Request) -> str | None:
+    """Return the streaming media type requested via Accept, if any."""
+    accept = request.headers.get("accept", "")
+    if NDJSON in accept:
+        return NDJSON
+    if CSV in accept:
+        return CSV
+    return None
+
+
+async def _ndjson(rows: AsyncIterator[dict]):
+    async for row in rows:
+        yield json.dumps(row) + "\n"
+
+
+async def _csv(rows: AsyncIterator[dict], columns: list[str]):
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=columns, extrasaction="ignore")
+    writer.writeheader()
+    count = 0
+
+    async for row in rows:
+        writer.writerow(row)
+        count += 1
+        if count % CSV_CHUNK_ROWS == 0:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+
+    yield buffer.getvalue()
+
+
+def streaming_response(rows: AsyncIterator[dict], media_type: str, columns: list[str]) -> StreamingResponse:
+    if media_type == CSV:
+        return StreamingResponse(_csv(rows, columns), media_type=CSV)
+    return StreamingResponse(_ndjson(rows), media_type=NDJSON)
@@ -1,5 +1,14 @@
-from fastapi import APIRouter, Query
-from app.services.telemetry import get_telemetry_history
+from fastapi import APIRouter, Depends, Query, Request
+from app.api.caching import cached_json
+from app.api.pagination import PageParams, bad_page_request
+from app.api.streaming import stream_format, streaming_response
+from app.services.telemetry import (
+    DEFAULT_MAX_POINTS,
+    get_telemetry_history_async,
+    stream_telemetry_history
+)
+
+MAX_POINTS_LIMIT = 10000
 
 router = APIRouter(
     prefix="/machines/{machine_id}/telemetry",
@@ -7,15 +16,41 @@ router = APIRouter(
 )
 
 @router.get("")
-def telemetry_history(
+async def telemetry_history(
+    request: Request,
     machine_id: str,
     metric: str = Query(...),
     from_time: str = Query(..., alias="from"),
-    to_time: str = Query(..., alias="to")
+    to_time: str = Query(..., alias="to"),
+    max_points: int = Query(DEFAULT_MAX_POINTS, ge=3, le=MAX_POINTS_LIMIT),
+    resolution: str | None = Query(None, pattern=r"^[1-9][0-9]*(ms|s|m|h|d)$"),
+    agg: str = Query("mean", pattern="^(mean|min|max|lttb)$"),
+    page: PageParams = Depends()
 ):
-    return get_telemetry_history(
-        machine_id=machine_id,
-        metric=metric,
-        start=from_time,
-        stop=to_time
-    )
+    # Streamed exports are not capped by max_points; only resolution applies
+    media_type = stream_format(request)
+    if media_type:
+        rows = stream_telemetry_history(
+            machine_id=machine_id,
+            metric=metric,
+            start=from_time,
+            stop=to_time,
+            resolution=resolution,
+            agg=agg
+        )
+        return streaming_response(rows, media_type, ["ts", "value"])
+
+    try:
+        return await cached_json(request, to_time, lambda: get_telemetry_history_async(
+            machine_id=machine_id,
+            metric=metric,
+            start=from_time,
+            stop=to_time,
+            max_points=max_points,
+            resolution=resolution,
+            agg=agg,
+            limit=page.limit,
+            cursor=page.cursor
+        ))
+    except ValueError as e:
+        raise bad_page_request(e)
@@ -1,76 +1,193 @@
-from fastapi import APIRouter, WebSocket, WebSocketDisconnect
+from fastapi import APIRouter, Query, WebSocket, WebSocketDisconnect
 import asyncio
+import json
 import time
-from datetime import datetime, timezone
-from app.services.live import get_latest_machine_snapshot
-from app.services.state_timeline import get_state_timeline
+from app.metrics import WS_SEND_LAG, WS_SENT_BYTES, WS_SLOW_DISCONNECTS
+from app.services.broadcaster import POLL_INTERVAL, live_hub
+from app.services.fleet import FleetSession
+from app.services.frames import FrameEncoder
+from app.settings import settings
 
 router = APIRouter()
 
-RUNTIME_CACHE_TTL = 30  # refresh runtime from DB every 30 seconds
+# Opt-in wire format, e.g. /ws/fleet?protocol=delta&encoding=msgpack
+#   protocol=full  (default) every frame carries whole payloads
+#   protocol=delta first frame per machine is {"snapshot": payload}, then
+#                  {"set": {changed fields}, "unset": ["telemetry.x", ...]};
+#                  nothing is sent for a machine whose payload didn't change
+#   encoding=json  (default) text frames; encoding=msgpack binary frames
+# Backpressure: subscriber queues hold only the newest payload, so a slow
+# client skips payloads instead of building lag, and deltas are taken against
+# what it was last sent. A send stalled for WS_SEND_TIMEOUT closes the socket.
+PROTOCOL_PATTERN = "^(full|delta)$"
+ENCODING_PATTERN = "^(json|msgpack)$"
 
 
-def _calc_today_runtime(machine_id: str) -> int:
-    now = datetime.now(timezone.utc)
-    start_of_day = now.replace(hour=0, minute=0, second=0, microsecond=0)
-    start_iso = start_of_day.isoformat().replace("+00:00", "Z")
-    stop_iso = now.isoformat().replace("+00:00", "Z")
-    timeline = get_state_timeline(machine_id, start_iso, stop_iso)
-    return sum(seg["duration_sec"] for seg in timeline if seg["state"] == 1)
+class SlowConsumer(Exception):
+    pass
 
 
-@router.websocket("/ws/machines/{machine_id}")
-async def machine_live_ws(websocket: WebSocket, machine_id: str):
+async def _accept(websocket: WebSocket, protocol: str, encoding: str) -> FrameEncoder | None:
+    try:
+        encoder = FrameEncoder(protocol, encoding)
+    except ValueError as e:
+        await websocket.close(code=1003, reason=str(e))
+        return None
     await websocket.accept()
+    return encoder
+
+
+async def _send_frame(websocket: WebSocket, encoder: FrameEncoder, frame: dict):
+    data = encoder.encode(frame)
+    send = websocket.send_bytes(data) if isinstance(data, bytes) else websocket.send_text(data)
+    try:
+        await asyncio.wait_for(send, settings.WS_SEND_TIMEOUT)
+    except asyncio.TimeoutError:
+        WS_SLOW_DISCONNECTS.inc()
+        raise SlowConsumer(f"send stalled for {settings.WS_SEND_TIMEOUT}s")
+    WS_SENT_BYTES.labels("delta" if encoder.delta else "full", encoder.encoding).inc(len(data))
+
+
+async def _wait_for_disconnect(websocket: WebSocket):
+    # Clients never send anything; drain until the socket closes
+    while True:
+        message = await websocket.receive()
+        if message["type"] == "websocket.disconnect":
+            return
 
-    cached_runtime = 0
-    last_runtime_fetch = 0.0
+
+async def _forward_updates(websocket: WebSocket, machine_id: str, queue: asyncio.Queue, encoder: FrameEncoder):
+    while True:
+        published_at, payload = await queue.get()
+        frame = encoder.machine_frame(machine_id, payload)
+        if frame is None:
+            continue
+        await _send_frame(websocket, encoder, frame)
+        WS_SEND_LAG.observe(time.monotonic() - published_at)
+
+
+@router.websocket("/ws/machines/{machine_id}")
+async def machine_live_ws(
+    websocket: WebSocket,
+    machine_id: str,
+    protocol: str = Query("full", pattern=PROTOCOL_PATTERN),
+    encoding: str = Query("json", pattern=ENCODING_PATTERN)
+):
+    encoder = await _accept(websocket, protocol, encoding)
+    if encoder is None:
+        return
+
+    queue = live_hub.subscribe(machine_id)
+    tasks = [
+        asyncio.create_task(_wait_for_disconnect(websocket)),
+        asyncio.create_task(_forward_updates(websocket, machine_id, queue, encoder)),
+    ]
+
+    try:
+        done, pending = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+        for task in done:
+            exc = task.exception()
+            if exc is not None and not isinstance(exc, WebSocketDisconnect):
+                print(f"WebSocket error for {machine_id}:", exc)
+    finally:
+        for task in tasks:
+            task.cancel()
+        await live_hub.unsubscribe(machine_id, queue)
+        print(f"WebSocket disconnected for {machine_id}")
+
+
+# ---------------- FLEET (multiplexed) ----------------
+# Client -> server:
+#   {"action": "subscribe", "machines": ["machine1", ...], "fields": ["current_state", "telemetry.spindle_speed"]}
+#   {"action": "unsubscribe", "machines": ["machine1", ...]}
+# "fields" is optional (default: whole payload) and applies to the listed machines.
+# Server -> client: acks/errors, and at most one {"type": "update", "machines": {...}} frame per tick.
+# Acks and errors are always JSON text frames, whatever the encoding.
+
+def _parse_control(text: str) -> tuple[str, list[str], list[str] | None]:
+    try:
+        message = json.loads(text)
+    except json.JSONDecodeError:
+        raise ValueError("Control messages must be JSON")
+    if not isinstance(message, dict):
+        raise ValueError("Control messages must be JSON objects")
+
+    action = message.get("action")
+    machines = message.get("machines")
+    fields = message.get("fields")
+
+    if action not in ("subscribe", "unsubscribe"):
+        raise ValueError("action must be 'subscribe' or 'unsubscribe'")
+    if not isinstance(machines, list) or not all(isinstance(m, str) for m in machines):
+        raise ValueError("machines must be a list of machine IDs")
+    if fields is not None and (not isinstance(fields, list) or not all(isinstance(f, str) for f in fields)):
+        raise ValueError("fields must be a list of field names")
+    return action, machines, fields
+
+
+async def _fleet_control(websocket: WebSocket, session: FleetSession, encoder: FrameEncoder, send_lock: asyncio.Lock):
+    while True:
+        message = await websocket.receive()
+        if message["type"] == "websocket.disconnect":
+            return
+        if message.get("text") is None:
+            continue
+
+        try:
+            action, machines, fields = _parse_control(message["text"])
+            if action == "subscribe":
+                session.subscribe(machines, fields)
+            else:
+                await session.unsubscribe(machines)
+            # A (re)subscribed machine starts over from a snapshot
+            for mid in machines:
+                encoder.forget(mid)
+            reply = {"type": action + "d", "machines": machines}
+        except ValueError as e:
+            reply = {"type": "error", "detail": str(e)}
+
+        async with send_lock:
+            await websocket.send_json(reply)
+
+
+async def _fleet_updates(websocket: WebSocket, session: FleetSession, encoder: FrameEncoder, send_lock: asyncio.Lock):
+    while True:
+        await asyncio.sleep(POLL_INTERVAL)
+        updates, oldest = session.collect()
+        frame = encoder.fleet_frame(updates)
+        if frame is None:
+            continue
+
+        async with send_lock:
+            await _send_frame(websocket, encoder, frame)
+        WS_SEND_LAG.observe(time.monotonic() - oldest)
+
+
+@router.websocket("/ws/fleet")
+async def fleet_live_ws(
+    websocket: WebSocket,
+    protocol: str = Query("full", pattern=PROTOCOL_PATTERN),
+    encoding: str = Query("json", pattern=ENCODING_PATTERN)
+):
+    encoder = await _accept(websocket, protocol, encoding)
+    if encoder is None:
+        return
+
+    session = FleetSession()
+    send_lock = asyncio.Lock()
+    tasks = [
+        asyncio.create_task(_fleet_control(websocket, session, encoder, send_lock)),
+        asyncio.create_task(_fleet_updates(websocket, session, encoder, send_lock)),
+    ]
 
     try:
-        while True:
-            try:
-                snapshot = get_latest_machine_snapshot(machine_id)
-            except Exception as e:
-                print(f"Snapshot error for {machine_id}:", e)
-                await asyncio.sleep(0.1)
-                continue
-
-            if not snapshot:
-                await asyncio.sleep(0.1)
-                continue
-
-            state_value = snapshot.get("state")
-
-            if state_value is None:
-                await asyncio.sleep(0.1)
-                continue
-
-            # Refresh runtime from DB every RUNTIME_CACHE_TTL seconds
-            now = time.monotonic()
-            if now - last_runtime_fetch >= RUNTIME_CACHE_TTL:
-                try:
-                    cached_runtime = _calc_today_runtime(machine_id)
-                    last_runtime_fetch = now
-                except Exception as e:
-                    print(f"Runtime calc error for {machine_id}:", e)
-
-            raw_telemetry = snapshot.get("telemetry", {})
-            # Remove simulator counter, use DB-calculated runtime
-            raw_telemetry.pop("running_time", None)
-            raw_telemetry["runtime"] = cached_runtime
-
-            payload = {
-                "machine_id": machine_id,
-                "current_state": state_value,
-                "timestamp": datetime.utcnow().isoformat() + "Z",
-                "telemetry": raw_telemetry,
-                "current_job": snapshot.get("current_job"),
-                "business": snapshot.get("business", {})
-            }
-
-            await websocket.send_json(payload)
-
-            await asyncio.sleep(0.2)
-
-    except WebSocketDisconnect:
-        print(f"WebSocket disconnected for {machine_id}")
\ No newline at end of file
+        done, pending = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+        for task in done:
+            exc = task.exception()
+            if exc is not None and not isinstance(exc, WebSocketDisconnect):
+                print("Fleet WebSocket error:", exc)
+    finally:
+        for task in tasks:
+            task.cancel()
+        await session.close()
+        print("Fleet WebSocket disconnected")
@@ -1,5 +1,10 @@
+import asyncio
+import threading
+import time
 from influxdb_client import InfluxDBClient
+from influxdb_client.client.influxdb_client_async import InfluxDBClientAsync
 from app.settings import settings
+from app.metrics import INFLUX_ERRORS, INFLUX_LATENCY, INFLUX_ROWS
 
 _client = None
 
@@ -12,3 +17,178 @@ def get_influx_client():
             org=settings.INFLUX_ORG
         )
     return _client
+
+
+# ---------------- ASYNC QUERY LAYER ----------------
+# All queries run on one dedicated event loop ("influx-io") that owns the
+# async client and its connection pool. Async callers await results from
+# any loop, sync callers block on them, and neither can stall the other.
+
+class InfluxQueryTimeout(Exception):
+    pass
+
+
+_loop = None
+_loop_lock = threading.Lock()
+_async_client = None
+_query_slots = None
+_stream_slots = None  # separate, so slow export downloads can't starve interactive queries
+
+
+def _get_loop() -> asyncio.AbstractEventLoop:
+    global _loop
+    with _loop_lock:
+        if _loop is None:
+            _loop = asyncio.new_event_loop()
+            threading.Thread(target=_loop.run_forever, name="influx-io", daemon=True).start()
+    return _loop
+
+
+def _get_async_client() -> InfluxDBClientAsync:
+    # Only called from the influx-io loop
+    global _async_client, _query_slots, _stream_slots
+    if _async_client is None:
+        _async_client = InfluxDBClientAsync(
+            url=settings.INFLUX_URL,
+            token=settings.INFLUX_TOKEN,
+            org=settings.INFLUX_ORG,
+            timeout=int(settings.INFLUX_QUERY_TIMEOUT * 1000),
+            connection_pool_maxsize=settings.INFLUX_POOL_SIZE + settings.INFLUX_STREAM_SLOTS
+        )
+        _query_slots = asyncio.Semaphore(settings.INFLUX_POOL_SIZE)
+        _stream_slots = asyncio.Semaphore(settings.INFLUX_STREAM_SLOTS)
+    return _async_client
+
+
+async def run_async(coro):
+    """Run a coroutine on the influx-io loop and await its result."""
+    loop = _get_loop()
+    if asyncio.get_running_loop() is loop:
+        return await coro
+    return await asyncio.wrap_future(asyncio.run_coroutine_threadsafe(coro, loop))
+
+
+def run_sync(coro):
+    """Run a coroutine on the influx-io loop and block until it finishes."""
+    return asyncio.run_coroutine_threadsafe(coro, _get_loop()).result()
+
+
+def _csv_rows(raw: str) -> int:
+    # Data and header lines both start with ","; there is one header per table
+    return raw.count("\n,") + raw.startswith(",") - raw.count(",result,table,")
+
+
+async def _timed(service: str, timeout: float, request, count_rows):
+    started = time.perf_counter()
+    try:
+        result = await asyncio.wait_for(request, timeout)
+    except asyncio.TimeoutError:
+        INFLUX_ERRORS.labels(service).inc()
+        raise InfluxQueryTimeout(f"Influx query exceeded {timeout}s")
+    except Exception:
+        INFLUX_ERRORS.labels(service).inc()
+        raise
+    INFLUX_LATENCY.labels(service).observe(time.perf_counter() - started)
+    INFLUX_ROWS.labels(service).inc(count_rows(result))
+    return result
+
+
+async def _query(query: str, timeout: float, service: str):
+    client = _get_async_client()
+    async with _query_slots:
+        return await _timed(
+            service, timeout, client.query_api().query(query),
+            lambda tables: sum(len(t.records) for t in tables)
+        )
+
+
+async def query_async(query: str, timeout: float | None = None, service: str = "other"):
+    """Execute a Flux query through the shared async client."""
+    return await run_async(_query(query, timeout or settings.INFLUX_QUERY_TIMEOUT, service))
+
+
+async def _query_raw(query: str, timeout: float, service: str) -> str:
+    client = _get_async_client()
+    async with _query_slots:
+        return await _timed(service, timeout, client.query_api().query_raw(query), _csv_rows)
+
+
+async def query_raw_async(query: str, timeout: float | None = None, service: str = "other") -> str:
+    """Execute a Flux query and return the annotated CSV without building FluxRecords."""
+    return await run_async(_query_raw(query, timeout or settings.INFLUX_QUERY_TIMEOUT, service))
+
+
+async def _write(bucket: str, records: list, timeout: float, service: str):
+    client = _get_async_client()
+    async with _query_slots:
+        await _timed(service, timeout, client.write_api().write(bucket=bucket, record=records), lambda _: 0)
+
+
+async def write_async(bucket: str, records: list, timeout: float | None = None, service: str = "other"):
+    """Write Points (or line protocol strings) through the shared async client."""
+    if records:
+        await run_async(_write(bucket, records, timeout or settings.INFLUX_QUERY_TIMEOUT, service))
+
+
+STREAM_BATCH = 500   # records handed between loops at a time
+STREAM_BUFFER = 4    # batches buffered before the producer waits for the consumer
+
+
+async def _pump(query: str, timeout: float, service: str, queue: asyncio.Queue, caller_loop):
+    def hand_off(item):
+        return asyncio.wrap_future(asyncio.run_coroutine_threadsafe(queue.put(item), caller_loop))
+
+    client = _get_async_client()
+    # Held until the caller has taken the last batch, so streams use their own slots
+    async with _stream_slots:
+        try:
+            # Latency covers the time to the first record; rows are counted as they stream
+            records = await _timed(service, timeout, client.query_api().query_stream(query), lambda _: 0)
+
+            batch = []
+            async for record in records:
+                batch.append(record)
+                if len(batch) >= STREAM_BATCH:
+                    INFLUX_ROWS.labels(service).inc(len(batch))
+                    await hand_off(batch)
+                    batch = []
+            if batch:
+                INFLUX_ROWS.labels(service).inc(len(batch))
+                await hand_off(batch)
+            await hand_off(None)
+        except Exception as e:
+            await hand_off(e)
+
+
+async def stream_async(query: str, timeout: float | None = None, service: str = "other"):
+    """Yield FluxRecords as they arrive, keeping only a few batches in memory."""
+    queue = asyncio.Queue(maxsize=STREAM_BUFFER)
+    future = asyncio.run_coroutine_threadsafe(
+        _pump(query, timeout or settings.INFLUX_QUERY_TIMEOUT, service, queue, asyncio.get_running_loop()),
+        _get_loop()
+    )
+    try:
+        while True:
+            item = await queue.get()
+            if item is None:
+                return
+            if isinstance(item, Exception):
+                raise item
+            for record in item:
+                yield record
+    finally:
+        future.cancel()
+
+
+async def _close():
+    global _async_client
+    if _async_client is not None:
+        await _async_client.close()
+        _async_client = None
+
+
+async def close_influx():
+    if _loop is not None:
+        await run_async(_close())
+    if _client is not None:
+        _client.close()
@@ -1,9 +1,30 @@
-from fastapi import FastAPI
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
 
-from app.api import machines, telemetry, websocket, state_timeline, jobs, auth, reports
+from app.api import machines, telemetry, websocket, state_timeline, jobs, auth, reports, metrics
+from app.db import InfluxQueryTimeout, close_influx
+from app.metrics import MetricsMiddleware
+from app.services.mqtt_ingest import mqtt_ingest
+from app.services.passwords import RETRY_AFTER, PasswordPoolBusy, password_hasher
+from app.services.rollups import rollup_worker
 
-app = FastAPI(title="CNC Backend API")
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    rollup_worker.start()
+    mqtt_ingest.start()
+    yield
+    await mqtt_ingest.stop()
+    await rollup_worker.stop()
+    await close_influx()
+    password_hasher.shutdown()
+
+
+app = FastAPI(title="CNC Backend API", lifespan=lifespan)
+
+app.add_middleware(MetricsMiddleware)
 
 app.add_middleware(
     CORSMiddleware,
@@ -12,12 +33,29 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "ETag"],
 )
 
+
+@app.exception_handler(InfluxQueryTimeout)
+async def influx_timeout_handler(request: Request, exc: InfluxQueryTimeout):
+    return JSONResponse(status_code=504, content={"detail": str(exc)})
+
+
+@app.exception_handler(PasswordPoolBusy)
+async def password_pool_busy_handler(request: Request, exc: PasswordPoolBusy):
+    return JSONResponse(
+        status_code=503,
+        content={"detail": str(exc)},
+        headers={"Retry-After": str(RETRY_AFTER)}
+    )
+
+
 app.include_router(machines.router)
 app.include_router(telemetry.router)
 app.include_router(websocket.router)
 app.include_router(state_timeline.router)
 app.include_router(jobs.router)
 app.include_router(auth.router)
-app.include_router(reports.router)
\ No newline at end of file
+app.include_router(reports.router)
+app.include_router(metrics.router)
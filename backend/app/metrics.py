@@ -0,0 +1,102 @@
+import time
+from prometheus_client import Counter, Histogram, REGISTRY
+from prometheus_client.core import GaugeMetricFamily
+
+# ---------------- HTTP ----------------
+HTTP_LATENCY = Histogram(
+    "http_request_duration_seconds", "HTTP request latency by route",
+    ["method", "route"],
+    buckets=(0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+)
+HTTP_REQUESTS = Counter(
+    "http_requests_total", "HTTP requests by route and status",
+    ["method", "route", "status"]
+)
+
+# ---------------- INFLUX ----------------
+INFLUX_LATENCY = Histogram(
+    "influx_query_duration_seconds", "Influx query latency by calling service",
+    ["service"],
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+)
+INFLUX_ROWS = Counter("influx_query_rows_total", "Rows returned by Influx queries", ["service"])
+INFLUX_ERRORS = Counter("influx_query_errors_total", "Failed or timed-out Influx queries", ["service"])
+
+# ---------------- WEBSOCKETS ----------------
+WS_SEND_LAG = Histogram(
+    "websocket_send_lag_seconds", "Time from a payload being published to it being sent",
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5)
+)
+WS_COALESCED = Counter(
+    "websocket_payloads_coalesced_total", "Payloads replaced by a newer one before a subscriber sent them"
+)
+WS_SENT_BYTES = Counter(
+    "websocket_sent_bytes_total", "Bytes of update frames sent", ["protocol", "encoding"]
+)
+WS_SLOW_DISCONNECTS = Counter(
+    "websocket_slow_consumer_disconnects_total", "Connections closed because a send stalled"
+)
+
+# ---------------- CACHES ----------------
+CACHE_REQUESTS = Counter("cache_requests_total", "Cache lookups by result", ["cache", "result"])
+
+
+def cache_lookup(cache: str, hit: bool):
+    CACHE_REQUESTS.labels(cache, "hit" if hit else "miss").inc()
+
+
+class _ScrapeTimeCollector:
+    """Gauges read from live objects at scrape time, so there's no per-event cost."""
+
+    def _families(self, counts: dict, queued: int | None):
+        connections = GaugeMetricFamily(
+            "websocket_connections", "Open websocket subscriptions per machine", labels=["machine_id"]
+        )
+        for machine_id, count in counts.items():
+            connections.add_metric([machine_id], count)
+        yield connections
+        yield GaugeMetricFamily(
+            "websocket_queue_depth", "Payloads waiting in subscriber queues", value=queued
+        )
+
+    def describe(self):
+        # Lets the registry learn the names without importing the broadcaster
+        return self._families({}, None)
+
+    def collect(self):
+        # Imported here: the broadcaster pulls in services that import this module
+        from app.services.broadcaster import live_hub
+
+        return self._families(live_hub.subscriber_counts(), live_hub.queued_payloads())
+
+
+REGISTRY.register(_ScrapeTimeCollector())
+
+
+class MetricsMiddleware:
+    """Times every HTTP request, labelled by route template rather than raw path."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        status = 500
+
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            route = scope.get("route")
+            # Unmatched paths share one label to keep cardinality bounded
+            path = route.path if route is not None else "unmatched"
+            HTTP_LATENCY.labels(scope["method"], path).observe(time.perf_counter() - started)
+            HTTP_REQUESTS.labels(scope["method"], path, str(status)).inc()
@@ -1,13 +1,59 @@
+import asyncio
+import threading
+import time
+from collections import OrderedDict
 from datetime import datetime, timedelta
 from jose import JWTError, jwt
 from fastapi import HTTPException, Depends, Cookie
 from app.settings import settings
+from app.metrics import cache_lookup
+from app.services.passwords import password_hasher
 from app.services.user_store import user_store
 from app.models.user import User, UserRole
 
 SECRET_KEY = settings.SECRET_KEY  
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 30
+PRINCIPAL_CACHE_SIZE = 1024  # verified tokens remembered by get_current_user
+
+
+class PrincipalCache:
+    """Bounded LRU of token -> (exp, User) for tokens that already passed verification."""
+
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self._entries: OrderedDict[str, tuple[float, User]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, token: str) -> User | None:
+        with self._lock:
+            entry = self._entries.get(token)
+            if entry is None:
+                return None
+            if entry[0] <= time.time():
+                del self._entries[token]
+                return None
+            self._entries.move_to_end(token)
+            return entry[1]
+
+    def put(self, token: str, exp: float, user: User):
+        with self._lock:
+            self._entries[token] = (exp, user)
+            self._entries.move_to_end(token)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def evict_user(self, user_id: str | None):
+        with self._lock:
+            if user_id is None:
+                self._entries.clear()
+                return
+            for token in [t for t, (_, u) in self._entries.items() if u.id == user_id]:
+                del self._entries[token]
+
+
+principal_cache = PrincipalCache(PRINCIPAL_CACHE_SIZE)
+user_store.add_listener(principal_cache.evict_user)
 
 def create_access_token(data: dict, expires_delta: timedelta = None) -> str:
     to_encode = data.copy()
@@ -22,25 +68,49 @@ def verify_token(token: str) -> dict:
     except JWTError:
         raise HTTPException(status_code=401, detail="Invalid token")
 
+def _complete_login(user_data: dict, new_hash: str | None) -> User:
+    # Upgrade hashes made with a different BCRYPT_ROUNDS
+    if new_hash:
+        user_store.update_password_hash(user_data["id"], new_hash)
+    
+    # Update last login
+    user_store.update_last_login(user_data["id"])
+    
+    # Remove password hash before returning
+    user_dict = {k: v for k, v in user_data.items() if k != "password_hash"}
+    return User(**user_dict)
+
 def authenticate_user(email: str, password: str) -> User | None:
     user_data = user_store.get_user_by_email(email)
     if not user_data:
         return None
     
-    if not user_store.verify_password(password, user_data["password_hash"]):
+    if not password_hasher.verify(password, user_data["password_hash"]):
         return None
     
-    # Update last login
-    user_store.update_last_login(user_data["id"])
+    new_hash = None
+    if password_hasher.needs_rehash(user_data["password_hash"]):
+        new_hash = password_hasher.hash(password)
     
-    # Remove password hash before returning
-    user_dict = {k: v for k, v in user_data.items() if k != "password_hash"}
-    return User(**user_dict)
+    return _complete_login(user_data, new_hash)
 
-def get_current_user(access_token: str = Cookie(None)) -> User:
-    if not access_token:
-        raise HTTPException(status_code=401, detail="Not authenticated")
+async def authenticate_user_async(email: str, password: str) -> User | None:
+    """Like authenticate_user, but bcrypt runs on the password pool without holding a thread."""
+    # The user store may be SQLite; keep its queries off the event loop too
+    user_data = await asyncio.to_thread(user_store.get_user_by_email, email)
+    if not user_data:
+        return None
     
+    if not await password_hasher.verify_async(password, user_data["password_hash"]):
+        return None
+    
+    new_hash = None
+    if password_hasher.needs_rehash(user_data["password_hash"]):
+        new_hash = await password_hasher.hash_async(password)
+    
+    return await asyncio.to_thread(_complete_login, user_data, new_hash)
+
+def _resolve_user(access_token: str) -> tuple[float, User]:
     payload = verify_token(access_token)
     user_id = payload.get("user_id")
     
@@ -52,4 +122,15 @@ def get_current_user(access_token: str = Cookie(None)) -> User:
         raise HTTPException(status_code=404, detail="User not found")
     
     user_dict = {k: v for k, v in user_data.items() if k != "password_hash"}
-    return User(**user_dict)
\ No newline at end of file
+    return payload["exp"], User(**user_dict)
+
+def get_current_user(access_token: str = Cookie(None)) -> User:
+    if not access_token:
+        raise HTTPException(status_code=401, detail="Not authenticated")
+    
+    user = principal_cache.get(access_token)
+    cache_lookup("auth_principal", user is not None)
+    if user is None:
+        exp, user = _resolve_user(access_token)
+        principal_cache.put(access_token, exp, user)
+    return user
@@ -0,0 +1,177 @@
+import asyncio
+import time
+from datetime import datetime
+from app.metrics import WS_COALESCED
+from app.services.live import get_latest_machine_snapshot_async
+from app.services.live_store import live_store
+from app.services.today_timeline import RUNNING_STATE, today_timeline
+from app.settings import settings
+
+POLL_INTERVAL = 1 / settings.LIVE_MAX_RATE  # minimum seconds between pushes of one machine
+RETRY_INTERVAL = 0.1    # first delay after an error or missing state; doubles up to the max
+RUNTIME_CACHE_TTL = 5   # refresh runtime (incrementally) every 5 seconds
+
+
+async def _wait_event(event: asyncio.Event, timeout: float) -> bool:
+    try:
+        await asyncio.wait_for(event.wait(), timeout)
+        return True
+    except asyncio.TimeoutError:
+        return False
+
+
+class MachineBroadcaster:
+    """Pushes one machine's payloads to all its subscribers.
+
+    With MQTT ingest up, a push follows new data for the machine, at most
+    LIVE_MAX_RATE times a second while running and every LIVE_IDLE_INTERVAL
+    otherwise (state and job changes go out at once), with a heartbeat every
+    LIVE_HEARTBEAT seconds when nothing arrives. Without it the machine is
+    polled from Influx at the same rates. Errors back off exponentially.
+    """
+
+    def __init__(self, machine_id: str):
+        self.machine_id = machine_id
+        self.subscribers: set[asyncio.Queue] = set()
+        self._task: asyncio.Task | None = None
+        self._signal = None
+        self._cached_runtime = 0
+        self._last_runtime_fetch = 0.0
+
+    def start(self):
+        self._signal = live_store.watch(self.machine_id)
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+        live_store.unwatch(self.machine_id, self._signal)
+        self._signal = None
+
+    def _publish(self, payload: dict):
+        item = (time.monotonic(), payload)  # publish time lets senders measure lag
+        for queue in self.subscribers:
+            # Each subscriber only ever needs the newest payload
+            if queue.full():
+                queue.get_nowait()
+                WS_COALESCED.inc()
+            queue.put_nowait(item)
+
+    async def _build_payload(self, snapshot: dict | None) -> dict | None:
+        if not snapshot:
+            return None
+
+        state_value = snapshot.get("state")
+        if state_value is None:
+            return None
+
+        # Refresh runtime from DB every RUNTIME_CACHE_TTL seconds
+        now = time.monotonic()
+        if now - self._last_runtime_fetch >= RUNTIME_CACHE_TTL:
+            try:
+                self._cached_runtime = await today_timeline.get_runtime_async(self.machine_id)
+                self._last_runtime_fetch = now
+            except Exception as e:
+                print(f"Runtime calc error for {self.machine_id}:", e)
+
+        raw_telemetry = snapshot.get("telemetry", {})
+        # Remove simulator counter, use DB-calculated runtime
+        raw_telemetry.pop("running_time", None)
+        raw_telemetry["runtime"] = self._cached_runtime
+
+        return {
+            "machine_id": self.machine_id,
+            "current_state": state_value,
+            "timestamp": datetime.utcnow().isoformat() + "Z",
+            "telemetry": raw_telemetry,
+            "current_job": snapshot.get("current_job"),
+            "business": snapshot.get("business", {})
+        }
+
+    async def _wait_for_change(self, running: bool):
+        """Sleep until the next push is due"""
+        min_gap = POLL_INTERVAL if running else max(POLL_INTERVAL, settings.LIVE_IDLE_INTERVAL)
+        signal = self._signal
+        if not live_store.ready:
+            await asyncio.sleep(min_gap)
+            return
+
+        # Rate cap; an idle machine changing state or job doesn't wait it out
+        await _wait_event(signal.urgent, min_gap)
+        await _wait_event(signal.changed, max(0.0, settings.LIVE_HEARTBEAT - min_gap))
+        signal.clear()
+
+    async def _backoff(self, failures: int):
+        delay = min(settings.LIVE_ERROR_BACKOFF_MAX, RETRY_INTERVAL * 2 ** (failures - 1))
+        if live_store.ready:
+            # Fresh data is worth another try straight away
+            await _wait_event(self._signal.changed, delay)
+            self._signal.clear()
+        else:
+            await asyncio.sleep(delay)
+
+    async def _run(self):
+        failures = 0
+        while True:
+            try:
+                snapshot = await get_latest_machine_snapshot_async(self.machine_id)
+            except Exception as e:
+                failures += 1
+                print(f"Snapshot error for {self.machine_id} (attempt {failures}):", e)
+                await self._backoff(failures)
+                continue
+
+            payload = await self._build_payload(snapshot)
+            if payload is None:
+                # No recent state: offline or unknown machine
+                failures += 1
+                await self._backoff(failures)
+                continue
+
+            failures = 0
+            self._publish(payload)
+            await self._wait_for_change(payload["current_state"] == RUNNING_STATE)
+
+
+class BroadcastHub:
+    """Keeps one MachineBroadcaster alive per machine while it has subscribers."""
+
+    def __init__(self):
+        self._broadcasters: dict[str, MachineBroadcaster] = {}
+
+    def subscribe(self, machine_id: str) -> asyncio.Queue:
+        broadcaster = self._broadcasters.get(machine_id)
+        if broadcaster is None:
+            broadcaster = MachineBroadcaster(machine_id)
+            self._broadcasters[machine_id] = broadcaster
+            broadcaster.start()
+
+        queue = asyncio.Queue(maxsize=1)
+        broadcaster.subscribers.add(queue)
+        return queue
+
+    async def unsubscribe(self, machine_id: str, queue: asyncio.Queue):
+        broadcaster = self._broadcasters.get(machine_id)
+        if broadcaster is None:
+            return
+
+        broadcaster.subscribers.discard(queue)
+        if not broadcaster.subscribers:
+            del self._broadcasters[machine_id]
+            await broadcaster.stop()
+
+    def subscriber_counts(self) -> dict[str, int]:
+        return {mid: len(b.subscribers) for mid, b in self._broadcasters.items()}
+
+    def queued_payloads(self) -> int:
+        return sum(q.qsize() for b in list(self._broadcasters.values()) for q in list(b.subscribers))
+
+
+# Singleton instance
+live_hub = BroadcastHub()
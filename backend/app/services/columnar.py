@@ -0,0 +1,126 @@
+import csv
+import numpy as np
+
+# Annotated-CSV datatypes that map onto fixed-width NumPy columns
+_NUMERIC_DTYPES = {
+    "long": np.int64,
+    "unsignedLong": np.uint64,
+    "double": np.float64,
+}
+
+
+class FluxQueryError(Exception):
+    pass
+
+
+def _to_array(values, datatype: str) -> np.ndarray:
+    if datatype.startswith("dateTime"):
+        # numpy refuses the trailing "Z"; every Flux timestamp is UTC
+        return np.array([v[:-1] for v in values], dtype="datetime64[ns]").view(np.int64)
+    if datatype == "boolean":
+        return np.array([v == "true" for v in values], dtype=bool)
+    if datatype in _NUMERIC_DTYPES:
+        return np.array(values, dtype=_NUMERIC_DTYPES[datatype])
+    return np.array(values, dtype=object)
+
+
+def parse_columns(raw: str, columns: tuple[str, ...] = ("_time", "_value")) -> dict[str, np.ndarray]:
+    """Parse an annotated-CSV Flux response into one NumPy array per requested column.
+
+    Timestamps become int64 epoch nanoseconds. Tables are concatenated in
+    response order.
+    """
+    chunks = {c: [] for c in columns}
+
+    # Each blank-line separated block carries its own annotations and header
+    for block in raw.replace("\r\n", "\n").split("\n\n"):
+        lines = block.splitlines()
+        datatypes = None
+        i = 0
+        while i < len(lines) and lines[i].startswith("#"):
+            if lines[i].startswith("#datatype"):
+                datatypes = next(csv.reader([lines[i]]))
+            i += 1
+        if i >= len(lines):
+            continue
+
+        header = next(csv.reader([lines[i]]))
+        rows = list(csv.reader(lines[i + 1:]))
+        if "error" in header:
+            raise FluxQueryError(rows[0][header.index("error")] if rows else "Flux query failed")
+        if not rows:
+            continue
+
+        cols = list(zip(*rows))
+        for name in columns:
+            j = header.index(name)
+            chunks[name].append(_to_array(cols[j], datatypes[j] if datatypes else "string"))
+
+    result = {}
+    for name in columns:
+        if chunks[name]:
+            result[name] = np.concatenate(chunks[name])
+        else:
+            result[name] = np.array([], dtype=np.int64)
+    return result
+
+
+_REDUCERS = {"mean": np.add, "min": np.minimum, "max": np.maximum}
+
+
+def aggregate_windows(ts_ns: np.ndarray, values: np.ndarray, every_ns: int, fn: str):
+    """aggregateWindow(every, fn, timeSrc: "_start", createEmpty: false) for sorted points."""
+    if len(ts_ns) == 0:
+        return ts_ns, values
+
+    windows = ts_ns // every_ns
+    first = np.concatenate(([0], np.flatnonzero(windows[1:] != windows[:-1]) + 1))
+    reduced = _REDUCERS[fn].reduceat(values, first)
+    if fn == "mean":
+        reduced = reduced / np.diff(np.append(first, len(values)))
+    return windows[first] * every_ns, reduced
+
+
+def lttb_indices(x: np.ndarray, y: np.ndarray, threshold: int) -> np.ndarray:
+    """Largest-Triangle-Three-Buckets: indices of `threshold` points preserving the visual shape.
+
+    x must be sorted. It is shifted to start at 0 and taken as float64, so
+    epoch-ns timestamps can't overflow int64 while bucket averages are summed.
+    """
+    n = len(x)
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+
+    x = (x - x[0]).astype(np.float64)
+    y = y.astype(np.float64)
+
+    # Bucket i is [edges[i], edges[i + 1]); first and last points are kept as-is
+    edges = (np.arange(threshold - 1) * ((n - 2) / (threshold - 2))).astype(np.int64) + 1
+    next_start = edges[1:]
+    next_end = np.minimum(np.append(edges[2:], n), n)
+    sum_x = np.concatenate(([0.0], np.cumsum(x)))
+    sum_y = np.concatenate(([0.0], np.cumsum(y)))
+    count = next_end - next_start
+    avg_x = (sum_x[next_end] - sum_x[next_start]) / count
+    avg_y = (sum_y[next_end] - sum_y[next_start]) / count
+
+    keep = np.empty(threshold, dtype=np.int64)
+    keep[0] = a = 0
+    for i in range(threshold - 2):
+        start, end = edges[i], edges[i + 1]
+        ax, ay = x[a], y[a]
+        area = np.abs((ax - avg_x[i]) * (y[start:end] - ay) - (ax - x[start:end]) * (avg_y[i] - ay))
+        a = start + int(np.argmax(area))
+        keep[i + 1] = a
+    keep[-1] = n - 1
+    return keep
+
+
+def isoformat(ts_ns: np.ndarray) -> np.ndarray:
+    """Vectorized datetime.isoformat() for UTC epoch-ns timestamps."""
+    us = ts_ns // 1000
+    with_fraction = np.datetime_as_string(us.astype("datetime64[us]"), unit="us")
+    whole = np.datetime_as_string(us.astype("datetime64[us]"), unit="s")
+    text = np.where(us % 1_000_000 == 0, whole, with_fraction)
+    return np.char.add(text, "+00:00")
+
@@ -0,0 +1,34 @@
+import math
+from datetime import datetime, timezone
+
+RAW_RESOLUTION_MS = 1000  # INFLUX_BUCKET_1S already holds one point per second
+LTTB_OVERSAMPLE = 4       # buckets fetched per output point before LTTB
+
+_DURATION_UNITS_MS = {"ms": 1, "s": 1000, "m": 60_000, "h": 3_600_000, "d": 86_400_000}
+
+
+def parse_time(value: str) -> datetime:
+    """Aware UTC datetime for an ISO 8601 time (naive input is taken as UTC); ValueError if malformed"""
+    dt = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    return dt.replace(tzinfo=timezone.utc) if dt.tzinfo is None else dt.astimezone(timezone.utc)
+
+
+def flux_time(value: str) -> str:
+    """The same time as an RFC 3339 UTC string Flux's time() accepts"""
+    return parse_time(value).isoformat().replace("+00:00", "Z")
+
+
+def duration_ms(value: str) -> int:
+    """Convert a simple Flux duration literal such as "500ms" or "5m" to milliseconds."""
+    number = value.rstrip("abcdefghijklmnopqrstuvwxyz")
+    return int(number) * _DURATION_UNITS_MS[value[len(number):]]
+
+
+def window_ms(start: str, stop: str, max_points: int) -> int | None:
+    """Aggregation window that keeps the range under max_points, or None if raw data fits."""
+    range_ms = (parse_time(stop) - parse_time(start)).total_seconds() * 1000
+    every = math.ceil(range_ms / max_points)
+    if every <= RAW_RESOLUTION_MS:
+        return None
+    return every
+
@@ -0,0 +1,73 @@
+import asyncio
+from app.services.broadcaster import live_hub
+
+MAX_SUBSCRIPTIONS = 500  # machines per /ws/fleet connection
+
+
+def _parse_fields(fields: list[str] | None) -> list[list[str]] | None:
+    """["current_state", "telemetry.spindle_speed"] -> [["current_state"], ["telemetry", "spindle_speed"]]"""
+    if fields is None:
+        return None
+    return [f.split(".", 1) for f in fields]
+
+
+def _select(payload: dict, fields: list[list[str]] | None) -> dict:
+    if fields is None:
+        return payload
+
+    selected = {"machine_id": payload["machine_id"]}
+    for path in fields:
+        if path[0] not in payload:
+            continue
+        if len(path) == 1:
+            selected[path[0]] = payload[path[0]]
+        elif isinstance(payload[path[0]], dict) and path[1] in payload[path[0]]:
+            selected.setdefault(path[0], {})[path[1]] = payload[path[0]][path[1]]
+    return selected
+
+
+class FleetSession:
+    """Subscriptions of one /ws/fleet connection.
+
+    Each machine is backed by the same shared MachineBroadcaster the
+    per-machine socket uses, so a machine is polled once however many
+    connections watch it; the session just drains the newest payloads.
+    """
+
+    def __init__(self, hub=live_hub):
+        self.hub = hub
+        self.queues: dict[str, asyncio.Queue] = {}
+        self.fields: dict[str, list[list[str]] | None] = {}
+
+    def subscribe(self, machine_ids: list[str], fields: list[str] | None = None):
+        new = [mid for mid in machine_ids if mid not in self.queues]
+        if len(self.queues) + len(new) > MAX_SUBSCRIPTIONS:
+            raise ValueError(f"At most {MAX_SUBSCRIPTIONS} machines per connection")
+
+        parsed = _parse_fields(fields)
+        for mid in machine_ids:
+            if mid not in self.queues:
+                self.queues[mid] = self.hub.subscribe(mid)
+            self.fields[mid] = parsed
+
+    async def unsubscribe(self, machine_ids: list[str]):
+        for mid in machine_ids:
+            queue = self.queues.pop(mid, None)
+            self.fields.pop(mid, None)
+            if queue is not None:
+                await self.hub.unsubscribe(mid, queue)
+
+    def collect(self) -> tuple[dict[str, dict], float | None]:
+        """Newest unsent payload per machine, plus the oldest publish time among them"""
+        updates = {}
+        oldest = None
+        for mid, queue in self.queues.items():
+            if queue.empty():
+                continue
+            published_at, payload = queue.get_nowait()
+            updates[mid] = _select(payload, self.fields[mid])
+            oldest = published_at if oldest is None else min(oldest, published_at)
+        return updates, oldest
+
+    async def close(self):
+        await self.unsubscribe(list(self.queues))
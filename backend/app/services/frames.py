@@ -0,0 +1,88 @@
+import json
+
+try:
+    import msgpack
+except ImportError:  # only needed for encoding=msgpack
+    msgpack = None
+
+# Changes on every tick by itself; only sent along with a real change
+VOLATILE_FIELDS = {"timestamp"}
+
+
+def diff(previous: dict, current: dict) -> tuple[dict, list[str]]:
+    """Changed/added fields as a partial payload, and removed fields as dotted paths.
+
+    Nested dicts (telemetry, business) are compared one level deep.
+    """
+    changed = {}
+    removed = []
+    for key, value in current.items():
+        old = previous.get(key)
+        if isinstance(value, dict) and isinstance(old, dict):
+            sub_changed, sub_removed = diff(old, value)
+            if sub_changed:
+                changed[key] = sub_changed
+            removed.extend(f"{key}.{k}" for k in sub_removed)
+        elif key not in previous or old != value:
+            changed[key] = value
+    removed.extend(key for key in previous if key not in current)
+    return changed, removed
+
+
+class FrameEncoder:
+    """Turns a connection's successive payloads into wire frames.
+
+    protocol="full" sends every payload as-is. protocol="delta" sends a
+    snapshot first, then only what changed. Deltas are always taken
+    against what this client was last sent, so payloads that were
+    coalesced away while the client was slow never leave it inconsistent.
+    """
+
+    def __init__(self, protocol: str = "full", encoding: str = "json"):
+        if encoding == "msgpack" and msgpack is None:
+            raise ValueError("msgpack encoding is not available on this server")
+        self.delta = protocol == "delta"
+        self.encoding = encoding
+        self._sent: dict[str, dict] = {}
+
+    def forget(self, machine_id: str):
+        """Next payload for this machine goes out as a snapshot again"""
+        self._sent.pop(machine_id, None)
+
+    def entry(self, machine_id: str, payload: dict) -> dict | None:
+        """Full payload, {"snapshot": ...} or {"set", "unset"}; None when nothing changed"""
+        if not self.delta:
+            return payload
+
+        previous = self._sent.get(machine_id)
+        self._sent[machine_id] = payload
+        if previous is None:
+            return {"snapshot": payload}
+
+        changed, removed = diff(previous, payload)
+        if not (changed.keys() - VOLATILE_FIELDS) and not removed:
+            return None
+        return {"set": changed, "unset": removed} if removed else {"set": changed}
+
+    def machine_frame(self, machine_id: str, payload: dict) -> dict | None:
+        """Frame for /ws/machines/{id}; full mode keeps the original bare payload"""
+        entry = self.entry(machine_id, payload)
+        if entry is None or not self.delta:
+            return entry
+        if "snapshot" in entry:
+            return {"type": "snapshot", "data": entry["snapshot"]}
+        return {"type": "delta", **entry}
+
+    def fleet_frame(self, updates: dict[str, dict]) -> dict | None:
+        entries = {}
+        for machine_id, payload in updates.items():
+            entry = self.entry(machine_id, payload)
+            if entry is not None:
+                entries[machine_id] = entry
+        return {"type": "update", "machines": entries} if entries else None
+
+    def encode(self, frame: dict) -> str | bytes:
+        if self.encoding == "msgpack":
+            return msgpack.packb(frame)
+        # Same output as WebSocket.send_json
+        return json.dumps(frame, separators=(",", ":"), ensure_ascii=False)
@@ -1,55 +1,159 @@
-from app.db import get_influx_client
+from contextlib import aclosing
+from datetime import datetime, timezone
+from app.db import query_async, run_sync, stream_async
+from app.services.downsample import parse_time
+from app.services.job_index import CHUNK, JOB_INDEX, JOB_LOOKBACK, Job, compute_jobs_async, job_index
+from app.services.pagination import cursor_from_datetime, cursor_to_datetime
 from app.settings import settings
 
 
-def get_job_history(machine_id: str, start: str, stop: str):
-    query = f'''
-    from(bucket: "{settings.INFLUX_BUCKET_REALTIME}")
-      |> range(start: time(v: "{start}"), stop: time(v: "{stop}"))
-      |> filter(fn: (r) =>
-          r.machine_id == "{machine_id}" and
-          r._measurement == "cnc_job"
-      )
-      |> pivot(
-          rowKey: ["_time"],
-          columnKey: ["_field"],
-          valueColumn: "_value"
-      )
-      |> sort(columns: ["_time"])
+def _iso(dt: datetime) -> str:
+    return dt.isoformat().replace("+00:00", "Z")
+
+
+def _index_query(machine_id: str, start: datetime, stop: datetime, resume: datetime | None,
+                 limit: int | None) -> str:
+    # Jobs are stored at their start time: look back far enough to find the
+    # ones still running at `start`, then drop those that ended before it
+    range_start = max(start - JOB_LOOKBACK, resume) if resume else start - JOB_LOOKBACK
+    limit_step = f"\n      |> limit(n: {limit})" if limit is not None else ""
+    return f'''
+    from(bucket: "{settings.INFLUX_BUCKET_ROLLUP}")
+      |> range(start: time(v: "{_iso(range_start)}"), stop: time(v: "{_iso(stop)}"))
+      |> filter(fn: (r) => r._measurement == "{JOB_INDEX}" and r.machine_id == "{machine_id}")
+      |> pivot(rowKey: ["_time"], columnKey: ["_field"], valueColumn: "_value")
+      |> filter(fn: (r) => not exists r.end_ms or r.end_ms > {start.timestamp() * 1000})
+      |> sort(columns: ["_time"]){limit_step}
     '''
 
-    client = get_influx_client()
-    tables = client.query_api().query(query)
 
-    events = []
+def _job_from_index(machine_id: str, record) -> Job:
+    end_ms = record.values.get("end_ms")
+    return Job(
+        machine_id,
+        record.values.get("job_id"),
+        record.get_time(),
+        datetime.fromtimestamp(end_ms / 1000, timezone.utc) if end_ms is not None else None,
+        record.values.get("parts_produced")
+    )
+
 
-    for table in tables:
-        for record in table.records:
-            events.append({
-                "time": record.get_time(),
-                "job_id": record.values.get("job_id"),
-                "event": record.values.get("event")
-            })
+def _row(job: Job) -> dict:
+    return {
+        "job_id": job.job_id,
+        "start": _iso(job.start),
+        "end": _iso(job.end) if job.end is not None else None,
+        "duration_sec": int((job.end - job.start).total_seconds()) if job.end is not None else None,
+        "parts_produced": int(job.parts_produced) if job.parts_produced is not None else None
+    }
 
+
+async def _find_jobs(machine_id: str, start: datetime, stop: datetime, resume: datetime | None,
+                     limit: int | None) -> list[Job]:
+    fetch = limit + 1 if limit is not None else None
     jobs = []
-    active_jobs = {}
+    async with aclosing(_jobs(machine_id, start, stop, resume, fetch)) as found:
+        async for job in found:
+            jobs.append(job)
+            if len(jobs) == fetch:
+                break
+    return jobs
 
-    for e in events:
-        job_id = e["job_id"]
 
-        if e["event"] == 1:  
-            active_jobs[job_id] = e["time"]
+async def get_job_history_async(machine_id: str, start: str, stop: str, limit: int | None = None,
+                                cursor: str | None = None) -> tuple[list[dict], str | None]:
+    """Jobs overlapping [start, stop), oldest first, and the cursor for the next page.
 
-        elif e["event"] == 0 and job_id in active_jobs:  
-            start_time = active_jobs.pop(job_id)
-            end_time = e["time"]
-            duration = int((end_time - start_time).total_seconds())
+    A job that started before `start` or is still running at `stop` is
+    included with its real start; "end" is null while a job is running.
+    Pages hold at most `limit` jobs (all of them when None).
+    """
+    jobs = await _find_jobs(
+        machine_id, parse_time(start), parse_time(stop), cursor_to_datetime(cursor) if cursor else None, limit
+    )
 
-            jobs.append({
-                "job_id": job_id,
-                "start": start_time.isoformat() + "Z",
-                "end": end_time.isoformat() + "Z",
-                "duration_sec": duration
-            })
+    next_cursor = None
+    if limit is not None and len(jobs) > limit:
+        next_cursor = cursor_from_datetime(jobs[limit].start)
+        jobs = jobs[:limit]
+    return [_row(job) for job in jobs], next_cursor
 
-    return jobs
+
+def get_job_history(machine_id: str, start: str, stop: str, limit: int | None = None,
+                    cursor: str | None = None):
+    return run_sync(get_job_history_async(machine_id, start, stop, limit, cursor))
+
+
+async def _paired_jobs(machine_id: str, start: datetime, stop: datetime, pending: dict[datetime, Job],
+                       emitted_until: datetime | None):
+    """Jobs paired from raw events a CHUNK at a time, oldest first.
+
+    A job open at a chunk's end is held back, with everything after it,
+    until a later chunk pairs its end or can no longer see its start.
+    `pending` and `emitted_until` carry on from the index rows already sent.
+    """
+    chunk_start = start
+    while chunk_start < stop:
+        chunk_stop = min(chunk_start + CHUNK, stop)
+        recomputed = set()
+        for job in await compute_jobs_async(chunk_start, chunk_stop, machine_id):
+            if emitted_until is None or job.start > emitted_until:
+                pending[job.start] = job
+                recomputed.add(job.start)
+
+        for key in sorted(pending):
+            if pending[key].end is None and key in recomputed:
+                break
+            emitted_until = key
+            yield pending.pop(key)
+        chunk_start = chunk_stop
+
+    for key in sorted(pending):
+        yield pending[key]
+
+
+async def _index_records(query: str, page: bool):
+    # A page is one small query; an export streams however many rows there are
+    if page:
+        for table in await query_async(query, service="jobs"):
+            for record in table.records:
+                yield record
+    else:
+        async for record in stream_async(query, service="jobs"):
+            yield record
+
+
+async def _jobs(machine_id: str, start: datetime, stop: datetime, resume: datetime | None, fetch: int | None):
+    """Jobs overlapping [start, stop) that start at or after `resume`, oldest first.
+
+    Indexed jobs come from the index (at most `fetch` of them); the rest
+    are paired from raw events a CHUNK at a time, so a caller that stops
+    early never pairs the whole range.
+    """
+    indexed_until = job_index.indexed_until if settings.INFLUX_BUCKET_ROLLUP else None
+    tail = indexed_until is None or stop > indexed_until
+
+    pending, emitted_until = {}, None
+    if indexed_until is not None and max(start, resume or start) < indexed_until:
+        query = _index_query(machine_id, start, min(stop, indexed_until), resume, fetch)
+        async with aclosing(_index_records(query, page=fetch is not None)) as records:
+            async for record in records:
+                job = _job_from_index(machine_id, record)
+                # Jobs open near the index edge are recomputed from raw events below
+                if pending or (tail and job.end is None and job.start >= indexed_until - JOB_LOOKBACK):
+                    pending[job.start] = job
+                else:
+                    emitted_until = job.start
+                    yield job
+
+    if tail:
+        tail_start = max(start, indexed_until or start, resume or start)
+        async for job in _paired_jobs(machine_id, tail_start, stop, pending, emitted_until):
+            if resume is None or job.start >= resume:
+                yield job
+
+
+async def stream_job_history(machine_id: str, start: str, stop: str):
+    """Yield every job row in the range, oldest first, without reading the whole range at once."""
+    async for job in _jobs(machine_id, parse_time(start), parse_time(stop), None, None):
+        yield _row(job)
@@ -0,0 +1,180 @@
+import bisect
+from datetime import datetime, timedelta
+from influxdb_client import Point
+from app.db import query_async, write_async
+from app.settings import settings
+
+JOB_INDEX = "cnc_job_index"  # one point per job at its start time, in the rollup bucket
+JOB_LOOKBACK = timedelta(hours=settings.JOB_MAX_DURATION_HOURS)  # how far back a job overlapping a range can start
+CHUNK = timedelta(days=1)  # largest range indexed by a single pair of queries
+
+
+class Job:
+    __slots__ = ("machine_id", "job_id", "start", "end", "parts_produced")
+
+    def __init__(self, machine_id: str, job_id, start: datetime, end: datetime | None = None,
+                 parts_produced: float | None = None):
+        self.machine_id = machine_id
+        self.job_id = job_id
+        self.start = start
+        self.end = end  # None while the job is still running
+        self.parts_produced = parts_produced
+
+    def overlaps(self, start: datetime, stop: datetime) -> bool:
+        return self.start < stop and (self.end is None or self.end > start)
+
+
+def _iso(dt: datetime) -> str:
+    return dt.isoformat().replace("+00:00", "Z")
+
+
+def _machine_filter(machine_id: str | None) -> str:
+    return f' and r.machine_id == "{machine_id}"' if machine_id else ""
+
+
+def _events_query(start: datetime, stop: datetime, machine_id: str | None) -> str:
+    return f'''
+    from(bucket: "{settings.INFLUX_BUCKET_REALTIME}")
+      |> range(start: time(v: "{_iso(start)}"), stop: time(v: "{_iso(stop)}"))
+      |> filter(fn: (r) => r._measurement == "cnc_job"{_machine_filter(machine_id)})
+      |> pivot(rowKey: ["_time"], columnKey: ["_field"], valueColumn: "_value")
+      |> group(columns: ["machine_id"])
+      |> sort(columns: ["_time"])
+    '''
+
+
+def _parts_query(start: datetime, stop: datetime, machine_id: str | None) -> str:
+    # Only the points where the counter went up, so this stays small
+    return f'''
+    from(bucket: "{settings.INFLUX_BUCKET_REALTIME}")
+      |> range(start: time(v: "{_iso(start)}"), stop: time(v: "{_iso(stop)}"))
+      |> filter(fn: (r) =>
+          r._measurement == "cnc_business" and r._field == "part_count"{_machine_filter(machine_id)}
+      )
+      |> group(columns: ["machine_id"])
+      |> sort(columns: ["_time"])
+      |> difference(nonNegative: true)
+      |> filter(fn: (r) => r._value > 0)
+    '''
+
+
+def pair_event(record, machine_id: str, active_jobs: dict) -> Job | None:
+    """Track a job start, or return the finished job when its end event arrives."""
+    job_id = record.values.get("job_id")
+    event = record.values.get("event")
+
+    if job_id is None:
+        return None
+    if event == 1:
+        active_jobs[job_id] = Job(machine_id, job_id, record.get_time())
+    elif event == 0 and job_id in active_jobs:
+        job = active_jobs.pop(job_id)
+        job.end = record.get_time()
+        return job
+    return None
+
+
+async def compute_jobs_async(start: datetime, stop: datetime, machine_id: str | None = None) -> list[Job]:
+    """Jobs overlapping [start, stop), paired from raw events, with parts produced.
+
+    Events are read from JOB_LOOKBACK before start so jobs already running
+    at the left edge keep their real start; jobs still running at stop
+    come back open (end None).
+    """
+    tables = await query_async(_events_query(start - JOB_LOOKBACK, stop, machine_id), service="jobs")
+
+    jobs = []
+    for table in tables:
+        active_jobs = {}
+        for record in table.records:
+            job = pair_event(record, record["machine_id"], active_jobs)
+            if job:
+                jobs.append(job)
+        jobs.extend(active_jobs.values())
+
+    jobs = [job for job in jobs if job.overlaps(start, stop)]
+    if not jobs:
+        return []
+
+    parts_start = min(job.start for job in jobs)
+    increments = {}
+    for table in await query_async(_parts_query(parts_start, stop, machine_id), service="jobs"):
+        for record in table.records:
+            times, values = increments.setdefault(record["machine_id"], ([], []))
+            times.append(record.get_time())
+            values.append(record.get_value())
+
+    for job in jobs:
+        times, values = increments.get(job.machine_id, ([], []))
+        lo = bisect.bisect_right(times, job.start)
+        hi = bisect.bisect_right(times, job.end) if job.end is not None else len(times)
+        job.parts_produced = float(sum(values[lo:hi]))
+
+    jobs.sort(key=lambda job: job.start)
+    return jobs
+
+
+def _point(job: Job) -> Point:
+    point = (
+        Point(JOB_INDEX)
+        .tag("machine_id", job.machine_id)
+        .field("job_id", float(job.job_id))
+        .field("parts_produced", float(job.parts_produced or 0))
+        .time(job.start)
+    )
+    if job.end is not None:
+        point.field("end_ms", job.end.timestamp() * 1000)
+        point.field("duration_sec", (job.end - job.start).total_seconds())
+    return point
+
+
+async def _last_indexed_start() -> datetime | None:
+    query = f'''
+    from(bucket: "{settings.INFLUX_BUCKET_ROLLUP}")
+      |> range(start: -{settings.ROLLUP_BACKFILL_DAYS}d)
+      |> filter(fn: (r) => r._measurement == "{JOB_INDEX}")
+      |> keep(columns: ["_time"])
+      |> group()
+      |> max(column: "_time")
+    '''
+    tables = await query_async(query, service="jobs")
+    for table in tables:
+        for record in table.records:
+            return record.get_time()
+    return None
+
+
+class JobIndex:
+    """Job records materialized from raw cnc_job events.
+
+    The rollup worker calls index_range() each pass; points are keyed by
+    (machine, start), so rewriting a job once it ends is idempotent.
+    Everything that started before indexed_until is in the index.
+    indexed_until trails the indexed range by the ingest delay (the same
+    one after which history responses are cached as immutable), and each
+    pass re-indexes from it, so late events are picked up.
+    """
+
+    def __init__(self):
+        self.indexed_until: datetime | None = None
+
+    async def index_range(self, start: datetime, stop: datetime):
+        if self.indexed_until is None:
+            # First pass since startup: catch up from the newest indexed job
+            # (or the backfill horizon), which may predate the rollup watermark
+            last = await _last_indexed_start()
+            start = min(start, last or stop - timedelta(days=settings.ROLLUP_BACKFILL_DAYS))
+        else:
+            start = min(start, self.indexed_until)
+
+        chunk_start = start
+        while chunk_start < stop:
+            chunk_stop = min(chunk_start + CHUNK, stop)
+            jobs = await compute_jobs_async(chunk_start, chunk_stop)
+            await write_async(settings.INFLUX_BUCKET_ROLLUP, [_point(job) for job in jobs], service="jobs")
+            chunk_start = chunk_stop
+        self.indexed_until = stop - timedelta(seconds=settings.RESPONSE_CACHE_INGEST_DELAY)
+
+
+# Singleton instance
+job_index = JobIndex()
@@ -1,8 +1,16 @@
-from app.db import get_influx_client
+import asyncio
+from app.db import query_async, run_sync
 from app.settings import settings
+from app.metrics import cache_lookup
+from app.services.live_store import live_store
 
 
-def get_latest_machine_snapshot(machine_id: str):
+async def get_latest_machine_snapshot_async(machine_id: str):
+    # Served from memory while MQTT ingest is live
+    cache_lookup("live_store", live_store.ready)
+    if live_store.ready:
+        return live_store.snapshot(machine_id)
+
     query = f'''
     from(bucket: "{settings.INFLUX_BUCKET_REALTIME}")
       |> range(start: -30s)
@@ -35,9 +43,10 @@ def get_latest_machine_snapshot(machine_id: str):
       |> limit(n: 1)
     '''
 
-    client = get_influx_client()
-    tables = client.query_api().query(query)
-    job_tables = client.query_api().query(job_query)
+    tables, job_tables = await asyncio.gather(
+        query_async(query, service="live"),
+        query_async(job_query, service="live")
+    )
 
     snapshot = {
         "telemetry": {},
@@ -67,4 +76,8 @@ def get_latest_machine_snapshot(machine_id: str):
         for record in table.records:
             snapshot["current_job"] = record.values.get("job_id")
 
-    return snapshot
\ No newline at end of file
+    return snapshot
+
+
+def get_latest_machine_snapshot(machine_id: str):
+    return run_sync(get_latest_machine_snapshot_async(machine_id))
@@ -0,0 +1,165 @@
+import asyncio
+import threading
+import time
+from datetime import datetime, timezone
+
+LIVE_WINDOW = 30        # seconds; same window the Influx snapshot query looks back
+MACHINE_WINDOW = 3600   # seconds a machine stays listed after its last message
+
+
+class MachineLatest:
+    def __init__(self):
+        self.telemetry = {}
+        self.business = {}
+        self.state = None
+        self.current_job = None
+        self.job_seen = False
+        self.last_seen = 0.0  # epoch seconds of the newest sample
+        self.state_seen = 0.0
+
+
+class ChangeSignal:
+    """Wakes one event-loop consumer when a machine gets new data.
+
+    notify() runs on the MQTT thread; at most one wake-up is scheduled
+    between clear() calls, so a 100 Hz machine costs one hop per push.
+    "urgent" is for state and job changes, which skip the idle rate cap.
+    """
+
+    def __init__(self, loop: asyncio.AbstractEventLoop):
+        self.loop = loop
+        self.changed = asyncio.Event()
+        self.urgent = asyncio.Event()
+        self._pending = False
+        self._pending_urgent = False
+
+    def notify(self, urgent: bool):
+        if not self._pending:
+            self._pending = True
+            self.loop.call_soon_threadsafe(self.changed.set)
+        if urgent and not self._pending_urgent:
+            self._pending_urgent = True
+            self.loop.call_soon_threadsafe(self.urgent.set)
+
+    def clear(self):
+        # Flags first: a notify() racing with this schedules a fresh set()
+        self._pending = self._pending_urgent = False
+        self.changed.clear()
+        self.urgent.clear()
+
+
+class LatestValueStore:
+    """Newest value of every field per machine, fed by MQTT ingest.
+
+    Written from the MQTT network thread and read from the event loop, so
+    every access goes through one lock; reads return copies.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._machines: dict[str, MachineLatest] = {}
+        self._signals: dict[str, set[ChangeSignal]] = {}
+        self.ready_at: float | None = None  # monotonic time from which reads are trusted
+
+    def _machine(self, machine_id: str) -> MachineLatest:
+        machine = self._machines.get(machine_id)
+        if machine is None:
+            machine = self._machines[machine_id] = MachineLatest()
+        return machine
+
+    def mark_ready(self, warmup: float = 0.0):
+        """Trust the store once it has seen `warmup` seconds of live traffic"""
+        self.ready_at = time.monotonic() + warmup
+
+    def mark_unready(self):
+        self.ready_at = None
+
+    @property
+    def ready(self) -> bool:
+        return self.ready_at is not None and time.monotonic() >= self.ready_at
+
+    # -------- change signals --------
+    def watch(self, machine_id: str) -> ChangeSignal:
+        """Signal for new data on machine_id; call from the event loop"""
+        signal = ChangeSignal(asyncio.get_running_loop())
+        with self._lock:
+            self._signals.setdefault(machine_id, set()).add(signal)
+        return signal
+
+    def unwatch(self, machine_id: str, signal: ChangeSignal):
+        with self._lock:
+            signals = self._signals.get(machine_id)
+            if signals is not None:
+                signals.discard(signal)
+                if not signals:
+                    del self._signals[machine_id]
+
+    # -------- writes --------
+    def update(self, machine_id: str, kind: str, fields: dict, ts: float):
+        with self._lock:
+            machine = self._machine(machine_id)
+            before = (machine.state, machine.current_job)
+            if kind == "telemetry":
+                machine.telemetry.update(fields)
+            elif kind == "business":
+                machine.business.update(fields)
+            elif kind == "state" and "machine_state" in fields:
+                machine.state = fields["machine_state"]
+                machine.state_seen = max(machine.state_seen, ts)
+            elif kind == "job":
+                job_id, event = fields.get("job_id"), fields.get("event")
+                machine.job_seen = True
+                if event == 1:
+                    machine.current_job = job_id
+                elif event == 0 and machine.current_job == job_id:
+                    machine.current_job = None
+            machine.last_seen = max(machine.last_seen, ts)
+            # Only a real state or job change skips the idle rate cap, not every 1 Hz state message
+            urgent = (machine.state, machine.current_job) != before
+            for signal in self._signals.get(machine_id, ()):
+                signal.notify(urgent=urgent)
+
+    def seed(self, machine_id: str, state=None, state_seen: float = 0.0, current_job=None):
+        """Fill gaps from Influx at startup without overwriting live values"""
+        with self._lock:
+            machine = self._machine(machine_id)
+            if state is not None and state_seen > machine.state_seen:
+                machine.state = state
+                machine.state_seen = state_seen
+                machine.last_seen = max(machine.last_seen, state_seen)
+            if current_job is not None and not machine.job_seen:
+                machine.current_job = current_job
+
+    # -------- reads --------
+    def snapshot(self, machine_id: str) -> dict:
+        """Same shape as get_latest_machine_snapshot"""
+        cutoff = time.time() - LIVE_WINDOW
+        with self._lock:
+            machine = self._machines.get(machine_id)
+            if machine is None or machine.last_seen < cutoff:
+                return {"telemetry": {}, "state": None, "business": {}, "current_job": None}
+            return {
+                "telemetry": dict(machine.telemetry),
+                "state": machine.state if machine.state_seen >= cutoff else None,
+                "business": dict(machine.business),
+                "current_job": machine.current_job,
+            }
+
+    def machines(self) -> list[dict]:
+        """Same shape as get_machines: machines with a state in the last hour"""
+        cutoff = time.time() - MACHINE_WINDOW
+        with self._lock:
+            return [
+                {
+                    "machine_id": mid,
+                    "current_state": m.state,
+                    "last_seen": datetime.fromtimestamp(m.state_seen, timezone.utc)
+                                         .isoformat().replace("+00:00", "Z"),
+                }
+                for mid, m in sorted(self._machines.items())
+                if m.state is not None and m.state_seen >= cutoff
+            ]
+
+
+# Singleton instance
+live_store = LatestValueStore()
@@ -1,7 +1,11 @@
-from app.db import get_influx_client
+from app.db import query_async, run_sync
 from app.settings import settings
+from app.metrics import cache_lookup
+from app.services.live_store import live_store
 
-def get_machines():
+
+async def query_machine_states_async():
+    """(machine_id, state, time) of each machine's last state point in the past hour"""
     query = f'''
     from(bucket: "{settings.INFLUX_BUCKET_REALTIME}")
       |> range(start: -1h)
@@ -11,16 +15,31 @@ def get_machines():
       |> last()
     '''
 
-    client = get_influx_client()
-    tables = client.query_api().query(query)
+    tables = await query_async(query, service="machines")
+
+    return [
+        (record["machine_id"], record.get_value(), record.get_time())
+        for table in tables
+        for record in table.records
+    ]
+
+
+async def get_machines_async():
+    # Served from memory while MQTT ingest is live
+    cache_lookup("live_store", live_store.ready)
+    if live_store.ready:
+        return live_store.machines()
 
     machines = []
-    for table in tables:
-        for record in table.records:
-            machines.append({
-                "machine_id": record["machine_id"],
-                "current_state": record.get_value(),  
-                "last_seen": record.get_time().isoformat() + "Z" if record.get_time() else None
-            })
-
-    return machines
\ No newline at end of file
+    for machine_id, state, seen in await query_machine_states_async():
+        machines.append({
+            "machine_id": machine_id,
+            "current_state": state,
+            "last_seen": seen.isoformat().replace("+00:00", "Z") if seen else None
+        })
+
+    return machines
+
+
+def get_machines():
+    return run_sync(get_machines_async())
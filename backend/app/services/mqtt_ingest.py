@@ -0,0 +1,156 @@
+import asyncio
+import json
+import time
+import paho.mqtt.client as mqtt
+from app.db import query_async
+from app.settings import settings
+from app.services.live_store import live_store
+from app.services.machines import query_machine_states_async
+from app.services.telemetry_buffer import telemetry_buffers
+
+try:
+    import msgpack
+except ImportError:  # only needed for the simulator's msgpack batches
+    msgpack = None
+
+# Same topics the simulator publishes and Telegraf consumes;
+# cnc/<id>/telemetry/<format> carries batched samples.
+TOPICS = ["cnc/+/telemetry", "cnc/+/telemetry/+", "cnc/+/state", "cnc/+/business", "cnc/+/job"]
+WARMUP = 2.0  # seconds of traffic before the store answers (slowest stream is 1 Hz)
+
+
+def _decode(topic_parts: list[str], payload: bytes) -> list[dict]:
+    if len(topic_parts) == 3:
+        return [json.loads(payload)]
+
+    fmt = topic_parts[3]
+    if fmt == "json":
+        return json.loads(payload)
+    if fmt == "msgpack" and msgpack is not None:
+        unpacker = msgpack.Unpacker()
+        unpacker.feed(payload)
+        return [
+            {**m["fields"], "timestamp": m["time"].to_unix_nano() // 1_000_000}
+            for m in unpacker
+        ]
+    return []
+
+
+def _is_number(value) -> bool:
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+def _valid_sample(sample) -> bool:
+    return isinstance(sample, dict) and (sample.get("timestamp") is None or _is_number(sample["timestamp"]))
+
+
+class MqttIngest:
+    """Subscribes to the machine topics and keeps live_store current.
+
+    Enabled by MQTT_BROKER. While connected (after a short warm-up) live
+    snapshots and /machines are served from memory; otherwise they fall
+    back to Influx. State and running jobs are seeded from Influx once on
+    startup so machines that were already running show up immediately.
+    """
+
+    def __init__(self, store=live_store):
+        self.store = store
+        self._client: mqtt.Client | None = None
+        self._seed_task: asyncio.Task | None = None
+
+    def handle_message(self, topic: str, payload: bytes):
+        parts = topic.split("/")
+        if len(parts) not in (3, 4) or parts[0] != "cnc":
+            return
+
+        machine_id, kind = parts[1], parts[2]
+        # Runs on paho's network thread: an exception here would kill it
+        # without a disconnect callback, leaving live_store "ready" but stale
+        try:
+            samples = _decode(parts, payload)
+            if not isinstance(samples, list):
+                raise ValueError("expected a sample or a list of samples")
+
+            for sample in samples:
+                if not _valid_sample(sample):
+                    print(f"MQTT ingest: skipping malformed sample on {topic}:", repr(sample)[:200])
+                    continue
+                ts = sample.pop("timestamp", None)
+                ts = ts / 1000 if ts else time.time()
+                self.store.update(machine_id, kind, sample, ts)
+                if kind == "telemetry":
+                    for metric, value in sample.items():
+                        if _is_number(value):
+                            telemetry_buffers.append(machine_id, metric, int(ts * 1e9), value)
+        except Exception as e:
+            print(f"MQTT ingest: bad payload on {topic}:", e)
+
+    # -------- paho callbacks (network thread) --------
+    def _on_connect(self, client, userdata, flags, reason_code, properties):
+        if reason_code.is_failure:
+            print("MQTT ingest: connect failed:", reason_code)
+            return
+        client.subscribe([(topic, 0) for topic in TOPICS])
+        self.store.mark_ready(WARMUP)
+        print(f"MQTT ingest: connected to {settings.MQTT_BROKER}:{settings.MQTT_PORT}")
+
+    def _on_disconnect(self, client, userdata, flags, reason_code, properties):
+        # Until we reconnect, live reads go back to Influx
+        self.store.mark_unready()
+        telemetry_buffers.clear()
+
+    def _on_message(self, client, userdata, message):
+        self.handle_message(message.topic, message.payload)
+
+    # -------- startup seed --------
+    async def _seed(self):
+        query = f'''
+        from(bucket: "{settings.INFLUX_BUCKET_REALTIME}")
+          |> range(start: -1h)
+          |> filter(fn: (r) => r._measurement == "cnc_job")
+          |> pivot(rowKey: ["_time"], columnKey: ["_field"], valueColumn: "_value")
+          |> group(columns: ["machine_id"])
+          |> sort(columns: ["_time"])
+          |> last(column: "_time")
+        '''
+        try:
+            states, job_tables = await asyncio.gather(query_machine_states_async(), query_async(query, service="live"))
+        except Exception as e:
+            print("MQTT ingest: seed from Influx failed:", e)
+            return
+
+        for machine_id, state, seen in states:
+            self.store.seed(machine_id, state=state, state_seen=seen.timestamp())
+        for table in job_tables:
+            for record in table.records:
+                if record.values.get("event") == 1:
+                    self.store.seed(record["machine_id"], current_job=record.values.get("job_id"))
+
+    def start(self):
+        if not settings.MQTT_BROKER or self._client is not None:
+            return
+
+        client = mqtt.Client(mqtt.CallbackAPIVersion.VERSION2, client_id=settings.MQTT_CLIENT_ID)
+        client.on_connect = self._on_connect
+        client.on_disconnect = self._on_disconnect
+        client.on_message = self._on_message
+        # connect_async + loop_start keep retrying in the background
+        client.connect_async(settings.MQTT_BROKER, settings.MQTT_PORT, 60)
+        client.loop_start()
+        self._client = client
+        self._seed_task = asyncio.create_task(self._seed())
+
+    async def stop(self):
+        if self._client is None:
+            return
+        if self._seed_task is not None:
+            self._seed_task.cancel()
+            self._seed_task = None
+        self._client.disconnect()
+        await asyncio.to_thread(self._client.loop_stop)
+        self._client = None
+        self.store.mark_unready()
+
+
+# Singleton instance
+mqtt_ingest = MqttIngest()
@@ -0,0 +1,42 @@
+import base64
+from datetime import datetime, timezone
+
+# History endpoints page by time: a cursor is the timestamp of the first row
+# of the next page, and the next request continues the range from there.
+
+
+def encode_cursor(ts_ns: int) -> str:
+    return base64.urlsafe_b64encode(f"t{ts_ns}".encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> int:
+    """Epoch nanoseconds the next page starts at (inclusive); ValueError if malformed"""
+    try:
+        text = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+    except (ValueError, UnicodeDecodeError):
+        raise ValueError("malformed cursor")
+    if not text.startswith("t") or not text[1:].isdigit():
+        raise ValueError("malformed cursor")
+    return int(text[1:])
+
+
+def cursor_from_datetime(dt: datetime) -> str:
+    delta = dt - datetime(1970, 1, 1, tzinfo=timezone.utc)
+    return encode_cursor((delta.days * 86400 + delta.seconds) * 1_000_000_000 + delta.microseconds * 1000)
+
+
+def cursor_to_datetime(cursor: str) -> datetime:
+    seconds, nanos = divmod(decode_cursor(cursor), 1_000_000_000)
+    return datetime.fromtimestamp(seconds, timezone.utc).replace(microsecond=nanos // 1000)
+
+
+def ns_to_rfc3339(ts_ns: int) -> str:
+    """Flux time literal with full nanosecond precision"""
+    seconds, nanos = divmod(ts_ns, 1_000_000_000)
+    whole = datetime.fromtimestamp(seconds, timezone.utc).strftime("%Y-%m-%dT%H:%M:%S")
+    return f"{whole}.{nanos:09d}Z"
+
+
+def resume_start(start: str, cursor: str | None) -> str:
+    """Range start for a page: the cursor if given, else the requested start"""
+    return ns_to_rfc3339(decode_cursor(cursor)) if cursor else start
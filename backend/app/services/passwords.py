@@ -0,0 +1,87 @@
+import asyncio
+import multiprocessing
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor
+from passlib.context import CryptContext
+from app.settings import settings
+
+RETRY_AFTER = 1  # seconds suggested to clients when the pool is saturated
+
+pwd_context = CryptContext(
+    schemes=["bcrypt"],
+    deprecated="auto",
+    bcrypt__rounds=settings.BCRYPT_ROUNDS
+)
+
+
+class PasswordPoolBusy(Exception):
+    pass
+
+
+# -------- run inside worker processes --------
+def _hash(password: str) -> str:
+    return pwd_context.hash(password)
+
+
+def _verify(password: str, hashed: str) -> bool:
+    return pwd_context.verify(password, hashed)
+
+
+class PasswordHasher:
+    """bcrypt hashing/verification on a small dedicated process pool.
+
+    At most `workers + queue_limit` jobs may be running or waiting; beyond
+    that calls fail immediately with PasswordPoolBusy instead of piling up.
+    """
+
+    def __init__(self, workers: int, queue_limit: int):
+        self.workers = workers
+        self._slots = threading.BoundedSemaphore(workers + queue_limit)
+        self._pool: ProcessPoolExecutor | None = None
+        self._pool_lock = threading.Lock()
+
+    def _get_pool(self) -> ProcessPoolExecutor:
+        with self._pool_lock:
+            if self._pool is None:
+                self._pool = ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    mp_context=multiprocessing.get_context("spawn")
+                )
+        return self._pool
+
+    def _submit(self, fn, *args) -> Future:
+        if not self._slots.acquire(blocking=False):
+            raise PasswordPoolBusy("Too many concurrent password checks")
+        try:
+            future = self._get_pool().submit(fn, *args)
+        except Exception:
+            self._slots.release()
+            raise
+        future.add_done_callback(lambda _: self._slots.release())
+        return future
+
+    def hash(self, password: str) -> str:
+        return self._submit(_hash, password).result()
+
+    def verify(self, password: str, hashed: str) -> bool:
+        return self._submit(_verify, password, hashed).result()
+
+    async def hash_async(self, password: str) -> str:
+        return await asyncio.wrap_future(self._submit(_hash, password))
+
+    async def verify_async(self, password: str, hashed: str) -> bool:
+        return await asyncio.wrap_future(self._submit(_verify, password, hashed))
+
+    def needs_rehash(self, hashed: str) -> bool:
+        """True when the hash was made with a different cost than BCRYPT_ROUNDS."""
+        return pwd_context.needs_update(hashed)
+
+    def shutdown(self):
+        with self._pool_lock:
+            if self._pool is not None:
+                self._pool.shutdown(wait=False, cancel_futures=True)
+                self._pool = None
+
+
+# Singleton instance
+password_hasher = PasswordHasher(settings.PASSWORD_WORKERS, settings.PASSWORD_QUEUE_LIMIT)
@@ -1,52 +1,204 @@
-from app.db import get_influx_client
+import asyncio
+import time
+from app.db import query_async, run_async, run_sync
+from app.metrics import cache_lookup
 from app.settings import settings
-from app.services.machines import get_machines
-from app.services.state_timeline import get_state_timeline
-from datetime import datetime, timezone
+from app.services.rollups import DAILY, HOURLY, SUM_FIELDS, state_durations
+from datetime import datetime, timedelta, timezone
 
+REPORT_CACHE_TTL = 10  # seconds a computed fleet report is served from memory
+RUNNING_STATE = 1
+ROLLUP_HOURS = {HOURLY: 1, DAILY: 24}  # span of one rollup row
 
-def get_daily_report():
+_report_cache = {"task": None, "expires": 0.0}
+
+
+async def _compute_daily_report():
     now = datetime.now(timezone.utc)
     start_of_day = now.replace(hour=0, minute=0, second=0, microsecond=0)
 
     start_iso = start_of_day.isoformat().replace("+00:00", "Z")
     stop_iso = now.isoformat().replace("+00:00", "Z")
 
-    machines = get_machines()
-    client = get_influx_client()
-
-    result = []
-
-    for m in machines:
-        mid = m["machine_id"]
-
-        # --- Runtime: sum duration where state == 1 (RUNNING) ---
-        timeline = get_state_timeline(mid, start_iso, stop_iso)
-        runtime_sec = sum(
-            seg["duration_sec"] for seg in timeline if seg["state"] == 1
-        )
-
-        # --- Part count: latest value today ---
-        pc_query = f'''
-        from(bucket: "{settings.INFLUX_BUCKET_REALTIME}")
-          |> range(start: time(v: "{start_iso}"), stop: time(v: "{stop_iso}"))
-          |> filter(fn: (r) =>
-              r.machine_id == "{mid}" and
-              r._measurement == "cnc_business" and
-              r._field == "part_count"
-          )
-          |> last()
-        '''
-        tables = client.query_api().query(pc_query)
-        part_count = 0
-        for table in tables:
-            for record in table.records:
-                part_count = int(record.get_value())
-
-        result.append({
+    # One round trip for the whole fleet: machines seen in the last hour,
+    # today's RUNNING time from per-point state durations (capped, so the time
+    # since a machine's last state point isn't counted), and last part_count.
+    query = f'''
+    import "contrib/tomhollingworth/events"
+
+    from(bucket: "{settings.INFLUX_BUCKET_REALTIME}")
+      |> range(start: -1h)
+      |> filter(fn: (r) => r._measurement == "cnc_state")
+      |> keep(columns: ["machine_id", "_value", "_time"])
+      |> group(columns: ["machine_id"])
+      |> last()
+      |> yield(name: "machines")
+
+    from(bucket: "{settings.INFLUX_BUCKET_REALTIME}")
+      |> range(start: time(v: "{start_iso}"), stop: time(v: "{stop_iso}"))
+      |> filter(fn: (r) =>
+          r._measurement == "cnc_state" and
+          r._field == "machine_state"
+      )
+      |> group(columns: ["machine_id"])
+      |> sort(columns: ["_time"])
+      |> {state_durations()}
+      |> filter(fn: (r) => r._value == {RUNNING_STATE})
+      |> sum(column: "duration")
+      |> yield(name: "runtime")
+
+    from(bucket: "{settings.INFLUX_BUCKET_REALTIME}")
+      |> range(start: time(v: "{start_iso}"), stop: time(v: "{stop_iso}"))
+      |> filter(fn: (r) =>
+          r._measurement == "cnc_business" and
+          r._field == "part_count"
+      )
+      |> group(columns: ["machine_id"])
+      |> last()
+      |> yield(name: "parts")
+    '''
+
+    tables = await query_async(query, service="reports")
+
+    machines = set()
+    runtime_ms = {}
+    part_count = {}
+
+    for table in tables:
+        for record in table.records:
+            mid = record["machine_id"]
+            result = record.values.get("result")
+
+            if result == "machines":
+                machines.add(mid)
+            elif result == "runtime":
+                runtime_ms[mid] = record["duration"]
+            elif result == "parts":
+                part_count[mid] = int(record.get_value())
+
+    return [
+        {
+            "machine_id": mid,
+            "runtime_sec": int(runtime_ms.get(mid, 0) // 1000),
+            "part_count": part_count.get(mid, 0),
+        }
+        for mid in sorted(machines)
+    ]
+
+
+async def _cached_daily_report():
+    # Runs on the influx-io loop, so concurrent callers share one in-flight query
+    now = time.monotonic()
+    task = _report_cache["task"]
+    fresh = task is not None and now < _report_cache["expires"]
+    cache_lookup("daily_report", fresh)
+    if not fresh:
+        task = asyncio.ensure_future(_compute_daily_report())
+        _report_cache["task"] = task
+        _report_cache["expires"] = now + REPORT_CACHE_TTL
+
+    try:
+        return await asyncio.shield(task)
+    except Exception:
+        if _report_cache["task"] is task:
+            _report_cache["task"] = None
+        raise
+
+
+async def get_daily_report_async():
+    return await run_async(_cached_daily_report())
+
+
+def get_daily_report():
+    return run_sync(_cached_daily_report())
+
+
+# ---------------- RANGE REPORTS (from rollups) ----------------
+
+def _ceil_day(dt: datetime) -> datetime:
+    day = dt.replace(hour=0, minute=0, second=0, microsecond=0)
+    return day if day == dt else day + timedelta(days=1)
+
+
+def _parse_iso(value: str) -> datetime:
+    """Aware UTC datetime (naive input is taken as UTC); ValueError if malformed"""
+    dt = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    return dt.replace(tzinfo=timezone.utc) if dt.tzinfo is None else dt.astimezone(timezone.utc)
+
+
+def _iso(dt: datetime) -> str:
+    return dt.isoformat().replace("+00:00", "Z")
+
+
+async def get_range_report_async(start: str, stop: str):
+    """Per-machine totals for [start, stop), read only from the rollup bucket.
+
+    Whole days come from daily rollups and the partial days at either edge
+    from hourly ones, so the range resolves to hour granularity.
+    Raises ValueError for a malformed or empty range.
+    """
+    start_dt = _parse_iso(start)
+    stop_dt = _parse_iso(stop)
+    if stop_dt <= start_dt:
+        raise ValueError("range end must be after its start")
+    day_start = _ceil_day(start_dt)
+    day_stop = stop_dt.replace(hour=0, minute=0, second=0, microsecond=0)
+    if day_stop < day_start:
+        day_stop = day_start
+
+    query = f'''
+    day_start = time(v: "{_iso(day_start)}")
+    day_stop = time(v: "{_iso(day_stop)}")
+
+    from(bucket: "{settings.INFLUX_BUCKET_ROLLUP}")
+      |> range(start: time(v: "{_iso(start_dt)}"), stop: time(v: "{_iso(stop_dt)}"))
+      |> filter(fn: (r) =>
+          (r._measurement == "{DAILY}" and r._time >= day_start and r._time < day_stop) or
+          (r._measurement == "{HOURLY}" and (r._time < day_start or r._time >= day_stop))
+      )
+      |> keep(columns: ["_time", "_measurement", "_field", "_value", "machine_id"])
+    '''
+
+    tables = await query_async(query, service="reports")
+
+    totals = {}
+    temperature_weight = {}
+
+    for table in tables:
+        for record in table.records:
+            mid = record["machine_id"]
+            field = record.get_field()
+            value = record.get_value()
+            entry = totals.setdefault(mid, {f: 0.0 for f in SUM_FIELDS})
+
+            if field in SUM_FIELDS:
+                entry[field] += value
+            elif field == "temperature_min":
+                entry[field] = min(entry.get(field, value), value)
+            elif field == "temperature_max":
+                entry[field] = max(entry.get(field, value), value)
+            elif field == "temperature_mean":
+                # Weight each rollup mean by the hours it covers
+                hours = ROLLUP_HOURS[record.get_measurement()]
+                weight = temperature_weight.get(mid, 0)
+                entry[field] = (entry.get(field, 0.0) * weight + value * hours) / (weight + hours)
+                temperature_weight[mid] = weight + hours
+
+    return [
+        {
             "machine_id": mid,
-            "runtime_sec": runtime_sec,
-            "part_count": part_count,
-        })
+            "runtime_sec": int(entry["runtime_sec"]),
+            "idle_sec": int(entry["idle_sec"]),
+            "stopped_sec": int(entry["stopped_sec"]),
+            "part_count": int(entry["parts_produced"]),
+            "jobs_completed": int(entry["jobs_completed"]),
+            "temperature_min": entry.get("temperature_min"),
+            "temperature_max": entry.get("temperature_max"),
+            "temperature_mean": entry.get("temperature_mean"),
+        }
+        for mid, entry in sorted(totals.items())
+    ]
+
 
-    return result
+def get_range_report(start: str, stop: str):
+    return run_sync(get_range_report_async(start, stop))
@@ -0,0 +1,70 @@
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from app.settings import settings
+
+
+class CachedResponse:
+    __slots__ = ("body", "etag", "next_cursor", "expires")
+
+    def __init__(self, body: bytes, next_cursor: str | None, expires: float | None):
+        self.body = body
+        self.etag = '"' + hashlib.sha256(body).hexdigest()[:32] + '"'
+        self.next_cursor = next_cursor
+        self.expires = expires  # monotonic deadline; None for ranges that can no longer change
+
+    @property
+    def immutable(self) -> bool:
+        return self.expires is None
+
+
+class ResponseCache:
+    """LRU of serialized history responses, bounded by total body bytes.
+
+    Closed ranges stay until evicted; ranges that touch "now" expire after
+    a short TTL so fresh points show up.
+    """
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self.size = 0
+        self._entries: OrderedDict[tuple, CachedResponse] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: tuple) -> CachedResponse | None:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry.expires is not None and entry.expires <= time.monotonic():
+                self._remove(key)
+                return None
+            self._entries.move_to_end(key)
+            return entry
+
+    def put(self, key: tuple, body: bytes, next_cursor: str | None, ttl: float | None) -> CachedResponse:
+        entry = CachedResponse(body, next_cursor, time.monotonic() + ttl if ttl is not None else None)
+        if len(body) > self.max_bytes:
+            return entry  # served, just never cached
+
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = entry
+            self.size += len(body)
+            while self.size > self.max_bytes:
+                self._remove(next(iter(self._entries)))
+        return entry
+
+    def _remove(self, key: tuple):
+        self.size -= len(self._entries.pop(key).body)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.size = 0
+
+
+# Singleton instance
+response_cache = ResponseCache(settings.RESPONSE_CACHE_MAX_MB * 1024 * 1024)
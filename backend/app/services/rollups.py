@@ -0,0 +1,211 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+from app.db import query_async
+from app.services.job_index import job_index
+from app.settings import settings
+
+HOURLY = "cnc_rollup_1h"
+DAILY = "cnc_rollup_1d"
+
+STATE_FIELDS = {0: "stopped_sec", 1: "runtime_sec", 2: "idle_sec"}
+SUM_FIELDS = ["runtime_sec", "idle_sec", "stopped_sec", "parts_produced", "jobs_completed"]
+TEMPERATURE_FIELDS = ["temperature_min", "temperature_max", "temperature_mean"]
+
+CHUNK = timedelta(days=1)  # largest raw range rolled up by a single query
+
+
+def _iso(dt: datetime) -> str:
+    return dt.isoformat().replace("+00:00", "Z")
+
+
+def _floor_hour(dt: datetime) -> datetime:
+    return dt.replace(minute=0, second=0, microsecond=0)
+
+
+def _floor_day(dt: datetime) -> datetime:
+    return dt.replace(hour=0, minute=0, second=0, microsecond=0)
+
+
+def state_durations() -> str:
+    """Flux steps giving each cnc_state point a "duration" (ms) until the next point.
+
+    Capped at STATE_MAX_GAP: events.duration runs the last point to the
+    query's stop, which would credit an offline machine with the whole gap,
+    and a sample then can't spill more than the cap into the next window.
+    Needs `import "contrib/tomhollingworth/events"`.
+    """
+    cap_ms = int(settings.STATE_MAX_GAP * 1000)
+    return f'''events.duration(unit: 1ms, columnName: "duration")
+      |> map(fn: (r) => ({{r with duration: if r.duration > {cap_ms} then {cap_ms} else r.duration}}))'''
+
+
+def _hourly_query(start: datetime, stop: datetime) -> str:
+    return f'''
+    import "contrib/tomhollingworth/events"
+
+    data = from(bucket: "{settings.INFLUX_BUCKET_REALTIME}")
+      |> range(start: time(v: "{_iso(start)}"), stop: time(v: "{_iso(stop)}"))
+
+    hourly = (tables=<-, fn) => tables
+      |> aggregateWindow(every: 1h, fn: fn, timeSrc: "_start", createEmpty: false)
+
+    states = data
+      |> filter(fn: (r) => r._measurement == "cnc_state" and r._field == "machine_state")
+      |> group(columns: ["machine_id"])
+      |> sort(columns: ["_time"])
+      |> {state_durations()}
+      |> map(fn: (r) => ({{r with
+          _field: if r._value == 1 then "{STATE_FIELDS[1]}"
+                  else if r._value == 2 then "{STATE_FIELDS[2]}"
+                  else "{STATE_FIELDS[0]}",
+          _value: float(v: r.duration) / 1000.0
+      }}))
+      |> drop(columns: ["duration"])
+      |> group(columns: ["machine_id", "_field"])
+      |> hourly(fn: sum)
+
+    parts = data
+      |> filter(fn: (r) => r._measurement == "cnc_business" and r._field == "part_count")
+      |> group(columns: ["machine_id"])
+      |> sort(columns: ["_time"])
+      |> difference(nonNegative: true)
+      |> map(fn: (r) => ({{r with _field: "parts_produced", _value: float(v: r._value)}}))
+      |> hourly(fn: sum)
+
+    jobs = data
+      |> filter(fn: (r) => r._measurement == "cnc_job" and r._field == "event" and r._value == 0)
+      |> group(columns: ["machine_id"])
+      |> map(fn: (r) => ({{r with _field: "jobs_completed", _value: 1.0}}))
+      |> hourly(fn: sum)
+
+    temperature = data
+      |> filter(fn: (r) => r._measurement == "cnc_telemetry" and r._field == "temperature")
+      |> group(columns: ["machine_id"])
+      |> map(fn: (r) => ({{r with _value: float(v: r._value)}}))
+
+    union(tables: [
+        states,
+        parts,
+        jobs,
+        temperature |> hourly(fn: min) |> set(key: "_field", value: "temperature_min"),
+        temperature |> hourly(fn: max) |> set(key: "_field", value: "temperature_max"),
+        temperature |> hourly(fn: mean) |> set(key: "_field", value: "temperature_mean"),
+    ])
+      |> map(fn: (r) => ({{
+          _time: r._time,
+          _measurement: "{HOURLY}",
+          machine_id: r.machine_id,
+          _field: r._field,
+          _value: float(v: r._value)
+      }}))
+      |> to(bucket: "{settings.INFLUX_BUCKET_ROLLUP}")
+      |> filter(fn: (r) => false)
+    '''
+
+
+def _daily_query(start: datetime, stop: datetime) -> str:
+    sum_fields = " or ".join(f'r._field == "{f}"' for f in SUM_FIELDS)
+    return f'''
+    hours = from(bucket: "{settings.INFLUX_BUCKET_ROLLUP}")
+      |> range(start: time(v: "{_iso(start)}"), stop: time(v: "{_iso(stop)}"))
+      |> filter(fn: (r) => r._measurement == "{HOURLY}")
+      |> group(columns: ["machine_id", "_field"])
+
+    daily = (tables=<-, field, fn) => tables
+      |> filter(fn: (r) => r._field == field)
+      |> aggregateWindow(every: 1d, fn: fn, timeSrc: "_start", createEmpty: false)
+
+    union(tables: [
+        hours
+          |> filter(fn: (r) => {sum_fields})
+          |> aggregateWindow(every: 1d, fn: sum, timeSrc: "_start", createEmpty: false),
+        hours |> daily(field: "temperature_min", fn: min),
+        hours |> daily(field: "temperature_max", fn: max),
+        hours |> daily(field: "temperature_mean", fn: mean),
+    ])
+      |> map(fn: (r) => ({{
+          _time: r._time,
+          _measurement: "{DAILY}",
+          machine_id: r.machine_id,
+          _field: r._field,
+          _value: r._value
+      }}))
+      |> to(bucket: "{settings.INFLUX_BUCKET_ROLLUP}")
+      |> filter(fn: (r) => false)
+    '''
+
+
+async def _last_rollup_hour() -> datetime | None:
+    query = f'''
+    from(bucket: "{settings.INFLUX_BUCKET_ROLLUP}")
+      |> range(start: -{settings.ROLLUP_BACKFILL_DAYS}d)
+      |> filter(fn: (r) => r._measurement == "{HOURLY}")
+      |> keep(columns: ["_time"])
+      |> group()
+      |> max(column: "_time")
+    '''
+    tables = await query_async(query, service="rollups")
+    for table in tables:
+        for record in table.records:
+            return record.get_time()
+    return None
+
+
+async def rollup_range(start: datetime, stop: datetime):
+    """(Re)write hourly rollups for [start, stop) and the daily rollups of the days it touches."""
+    chunk_start = _floor_hour(start)
+    while chunk_start < stop:
+        chunk_stop = min(chunk_start + CHUNK, stop)
+        await query_async(_hourly_query(chunk_start, chunk_stop), service="rollups")
+        chunk_start = chunk_stop
+
+    await query_async(_daily_query(_floor_day(start), stop), service="rollups")
+
+
+class RollupWorker:
+    """Keeps the rollup bucket and the job index current.
+
+    Each pass re-rolls the previous and current hour so late points and the
+    still-open hour are picked up; rewriting a rollup point is idempotent.
+    """
+
+    def __init__(self):
+        self._task: asyncio.Task | None = None
+        self._watermark: datetime | None = None
+
+    async def run_pass(self):
+        now = datetime.now(timezone.utc)
+        if self._watermark is None:
+            last = await _last_rollup_hour()
+            self._watermark = last or _floor_day(now - timedelta(days=settings.ROLLUP_BACKFILL_DAYS))
+
+        start = min(self._watermark, _floor_hour(now)) - timedelta(hours=1)
+        await rollup_range(start, now)
+        await job_index.index_range(start, now)
+        self._watermark = _floor_hour(now)
+
+    async def _run(self):
+        while True:
+            try:
+                await self.run_pass()
+            except Exception as e:
+                print("Rollup error:", e)
+            await asyncio.sleep(settings.ROLLUP_INTERVAL)
+
+    def start(self):
+        if settings.INFLUX_BUCKET_ROLLUP and self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+
+# Singleton instance
+rollup_worker = RollupWorker()
@@ -1,10 +1,12 @@
-from app.db import get_influx_client
+from app.db import query_async, run_sync, stream_async
 from app.settings import settings
+from app.services.downsample import flux_time
+from app.services.pagination import cursor_from_datetime, resume_start
 from datetime import datetime
 
 
-def get_state_timeline(machine_id: str, start: str, stop: str):
-    query = f'''
+def _timeline_query(machine_id: str, start: str, stop: str) -> str:
+    return f'''
     from(bucket: "{settings.INFLUX_BUCKET_REALTIME}")
       |> range(start: time(v: "{start}"), stop: time(v: "{stop}"))
       |> filter(fn: (r) =>
@@ -12,11 +14,13 @@ def get_state_timeline(machine_id: str, start: str, stop: str):
           r._measurement == "cnc_state" and
           r._field == "machine_state"
       )
+      |> keep(columns: ["_time", "_value"])
       |> sort(columns: ["_time"])
     '''
 
-    client = get_influx_client()
-    tables = client.query_api().query(query)
+
+async def fetch_state_points_async(machine_id: str, start: str, stop: str):
+    tables = await query_async(_timeline_query(machine_id, start, stop), service="timeline")
 
     points = []
 
@@ -27,38 +31,94 @@ def get_state_timeline(machine_id: str, start: str, stop: str):
                 "state": record.get_value()
             })
 
-    if not points:
-        return []
+    return points
 
-    timeline = []
 
-    current_state = points[0]["state"]
-    start_time = points[0]["time"]
+def make_segment(state, start_time: datetime, end_time: datetime) -> dict:
+    return {
+        "state": state,
+        "start": start_time.isoformat() + "Z",
+        "end": end_time.isoformat() + "Z",
+        "duration_sec": int((end_time - start_time).total_seconds())
+    }
 
-    for p in points[1:]:
-        if p["state"] != current_state:
-            end_time = p["time"]
-            duration = int((end_time - start_time).total_seconds())
 
-            timeline.append({
-                "state": current_state,
-                "start": start_time.isoformat() + "Z",
-                "end": end_time.isoformat() + "Z",
-                "duration_sec": duration
-            })
+def _segments_query(machine_id: str, start: str, stop: str, limit: int) -> str:
+    # Run-length encoded in Flux: only the first point of each segment (plus
+    # one to end the page) and the range's last point come back
+    return f'''
+    points = {_timeline_query(machine_id, start, stop)}
 
-            current_state = p["state"]
-            start_time = p["time"]
+    points
+      |> duplicate(column: "_value", as: "state")
+      |> difference(keepFirst: true)
+      |> filter(fn: (r) => not exists r._value or float(v: r._value) != 0.0)
+      |> keep(columns: ["_time", "state"])
+      |> limit(n: {limit + 1})
+      |> yield(name: "changes")
 
-    # close last interval
-    end_time = points[-1]["time"]
-    duration = int((end_time - start_time).total_seconds())
+    points
+      |> last()
+      |> keep(columns: ["_time"])
+      |> yield(name: "last")
+    '''
+
+
+async def get_state_timeline_async(machine_id: str, start: str, stop: str, limit: int | None = None,
+                                   cursor: str | None = None) -> tuple[list[dict], str | None]:
+    """Up to `limit` segments from `start` (or the cursor), and the cursor for the next page."""
+    start, stop = flux_time(start), flux_time(stop)
+    limit = limit or settings.HISTORY_MAX_ROWS
+    query = _segments_query(machine_id, resume_start(start, cursor), stop, limit)
+    tables = await query_async(query, service="timeline")
+
+    changes = []
+    last_time = None
+    for table in tables:
+        for record in table.records:
+            if record.values.get("result") == "last":
+                last_time = record.get_time()
+            else:
+                changes.append((record.get_time(), record.values.get("state")))
+
+    next_cursor = None
+    if len(changes) > limit:
+        # The extra change ends this page's last segment and starts the next page
+        last_time = changes[limit][0]
+        next_cursor = cursor_from_datetime(last_time)
+
+    segments = []
+    for i, (start_time, state) in enumerate(changes[:limit]):
+        end_time = changes[i + 1][0] if i + 1 < len(changes) else last_time
+        segments.append(make_segment(state, start_time, end_time))
+    return segments, next_cursor
+
+
+def get_state_timeline(machine_id: str, start: str, stop: str, limit: int | None = None,
+                       cursor: str | None = None):
+    return run_sync(get_state_timeline_async(machine_id, start, stop, limit, cursor))
 
-    timeline.append({
-        "state": current_state,
-        "start": start_time.isoformat() + "Z",
-        "end": end_time.isoformat() + "Z",
-        "duration_sec": duration
-    })
 
-    return timeline
+async def stream_state_timeline(machine_id: str, start: str, stop: str):
+    """Yield each segment as soon as the point that closes it arrives."""
+    start, stop = flux_time(start), flux_time(stop)
+    current_state = None
+    start_time = None
+    last_time = None
+
+    async for record in stream_async(_timeline_query(machine_id, start, stop), service="timeline"):
+        state = record.get_value()
+        last_time = record.get_time()
+
+        if start_time is None:
+            current_state = state
+            start_time = last_time
+        elif state != current_state:
+            yield make_segment(current_state, start_time, last_time)
+
+            current_state = state
+            start_time = last_time
+
+    # close last interval
+    if start_time is not None:
+        yield make_segment(current_state, start_time, last_time)
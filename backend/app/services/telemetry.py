@@ -1,8 +1,23 @@
-from app.db import get_influx_client
+from app.db import query_raw_async, run_sync, stream_async
 from app.settings import settings
+from app.metrics import cache_lookup
+from app.services.columnar import aggregate_windows, isoformat, lttb_indices, parse_columns
+from app.services.downsample import LTTB_OVERSAMPLE, RAW_RESOLUTION_MS, duration_ms, flux_time, parse_time, window_ms
+from app.services.pagination import decode_cursor, encode_cursor, resume_start
+from app.services.telemetry_buffer import telemetry_buffers
 
-def get_telemetry_history(machine_id: str, metric: str, start: str, stop: str):
-    query = f'''
+DEFAULT_MAX_POINTS = 2000
+
+
+def _aggregate_stage(every_ms: int | None, fn: str) -> str:
+    if every_ms is None:
+        return ""
+    return f'|> aggregateWindow(every: {every_ms}ms, fn: {fn}, timeSrc: "_start", createEmpty: false)'
+
+
+def _history_query(machine_id: str, metric: str, start: str, stop: str, window: str, limit: int | None = None) -> str:
+    limit_step = f"|> limit(n: {limit})" if limit is not None else ""
+    return f'''
     from(bucket: "{settings.INFLUX_BUCKET_1S}")
       |> range(start: time(v: "{start}"), stop: time(v: "{stop}"))
       |> filter(fn: (r) =>
@@ -10,20 +25,121 @@ def get_telemetry_history(machine_id: str, metric: str, start: str, stop: str):
           r.machine_id == "{machine_id}" and
           r._field == "{metric}"
       )
+      {window}
       |> keep(columns: ["_time", "_value"])
       |> sort(columns: ["_time"])
+      {limit_step}
     '''
 
-    client = get_influx_client()
-    tables = client.query_api().query(query)
 
-    result = []
+async def get_telemetry_history_async(
+    machine_id: str,
+    metric: str,
+    start: str,
+    stop: str,
+    max_points: int = DEFAULT_MAX_POINTS,
+    resolution: str | None = None,
+    agg: str = "mean",
+    limit: int | None = None,
+    cursor: str | None = None
+) -> tuple[list[dict], str | None]:
+    """Rows for the range and the cursor for the next page.
+
+    Windows are sized from the whole range, not the page, so every page of
+    a paged request uses the same resolution; pages start on window edges.
+    """
+    start, stop = flux_time(start), flux_time(stop)
+    limit = limit or settings.HISTORY_MAX_ROWS
+    if agg == "lttb" and (cursor or limit < max_points):
+        raise ValueError("agg=lttb picks points across the whole range and can't be paged; lower max_points")
+    resume_ns = decode_cursor(cursor) if cursor else None
+    # LTTB must see every candidate window; the limit applies to its output
+    fetch = None if agg == "lttb" else limit + 1
+
+    # LTTB needs more candidates than it returns, so over-fetch mean buckets
+    if agg == "lttb":
+        every_ms = window_ms(start, stop, max_points * LTTB_OVERSAMPLE)
+        fn = "mean"
+    else:
+        every_ms = window_ms(start, stop, max_points)
+        fn = agg
+
+    # An explicit resolution may coarsen the window but never exceed max_points
+    if resolution:
+        every_ms = max(every_ms or 0, duration_ms(resolution))
+
+    # Recent ranges are answered from the in-memory ring when it covers them
+    start_ns = int(parse_time(start).timestamp() * 1e9)
+    stop_ns = int(parse_time(stop).timestamp() * 1e9)
+    buffered = telemetry_buffers.window(machine_id, metric, start_ns, stop_ns)
+    cache_lookup("telemetry_buffer", buffered is not None)
+
+    if buffered is not None:
+        # Raw samples; window to 1 s like INFLUX_BUCKET_1S when no coarser window applies
+        every_ns = (every_ms or RAW_RESOLUTION_MS) * 1_000_000
+        ts_ns, values = aggregate_windows(*buffered, every_ns, fn if every_ms else "mean")
+        if resume_ns is not None:
+            first = ts_ns.searchsorted(resume_ns)
+            ts_ns, values = ts_ns[first:], values[first:]
+        if fetch is not None:
+            ts_ns, values = ts_ns[:fetch], values[:fetch]
+    else:
+        query = _history_query(
+            machine_id, metric, resume_start(start, cursor), stop, _aggregate_stage(every_ms, fn), fetch
+        )
+
+        columns = parse_columns(await query_raw_async(query, service="telemetry"), ("_time", "_value"))
+        ts_ns = columns["_time"]
+        values = columns["_value"]
+
+    if agg == "lttb":
+        keep = lttb_indices(ts_ns, values, max_points)
+        ts_ns = ts_ns[keep]
+        values = values[keep]
+
+    next_cursor = None
+    if len(ts_ns) > limit:
+        next_cursor = encode_cursor(int(ts_ns[limit]))
+        ts_ns, values = ts_ns[:limit], values[:limit]
+
+    rows = [
+        {"ts": ts, "value": value}
+        for ts, value in zip(isoformat(ts_ns).tolist(), values.tolist())
+    ]
+    return rows, next_cursor
+
+
+def get_telemetry_history(
+    machine_id: str,
+    metric: str,
+    start: str,
+    stop: str,
+    max_points: int = DEFAULT_MAX_POINTS,
+    resolution: str | None = None,
+    agg: str = "mean",
+    limit: int | None = None,
+    cursor: str | None = None
+):
+    return run_sync(get_telemetry_history_async(
+        machine_id, metric, start, stop, max_points, resolution, agg, limit, cursor
+    ))
+
+
+async def stream_telemetry_history(
+    machine_id: str,
+    metric: str,
+    start: str,
+    stop: str,
+    resolution: str | None = None,
+    agg: str = "mean"
+):
+    """Yield raw (or resolution-aggregated) rows as Influx returns them, for exports."""
+    start, stop = flux_time(start), flux_time(stop)
+    window = ""
+    if resolution:
+        window = _aggregate_stage(duration_ms(resolution), "mean" if agg == "lttb" else agg)
 
-    for table in tables:
-        for record in table.records:
-            result.append({
-                "ts": record.get_time().isoformat(),
-                "value": record.get_value()
-            })
+    query = _history_query(machine_id, metric, start, stop, window)
 
-    return result
+    async for record in stream_async(query, service="telemetry"):
+        yield {"ts": record.get_time().isoformat(), "value": record.get_value()}
@@ -0,0 +1,117 @@
+import threading
+import numpy as np
+from app.settings import settings
+from app.services.live_store import live_store
+
+SAMPLE_BYTES = 16  # int64 timestamp + float64 value
+
+
+class TelemetryRing:
+    """Fixed-capacity ring of (epoch ns, value) samples for one machine metric."""
+
+    def __init__(self, capacity: int):
+        self.ts_ns = np.zeros(capacity, dtype=np.int64)
+        self.values = np.zeros(capacity, dtype=np.float64)
+        self.capacity = capacity
+        self.head = 0     # next write position
+        self.count = 0
+        self.covered_from: int | None = None  # no gaps in the data from here on
+        self.lock = threading.Lock()
+
+    def append(self, ts_ns: int, value: float):
+        with self.lock:
+            if self.count and ts_ns < self.ts_ns[self.head - 1]:
+                return  # keep the ring sorted; late samples are left to Influx
+            self.ts_ns[self.head] = ts_ns
+            self.values[self.head] = value
+            self.head = (self.head + 1) % self.capacity
+            if self.count < self.capacity:
+                self.count += 1
+            if self.covered_from is None:
+                self.covered_from = ts_ns
+
+    def oldest(self) -> int:
+        return int(self.ts_ns[(self.head - self.count) % self.capacity])
+
+    def newest(self) -> int:
+        return int(self.ts_ns[self.head - 1])
+
+    def read(self, start_ns: int, stop_ns: int):
+        """Ordered copies of the samples in [start_ns, stop_ns)"""
+        with self.lock:
+            tail = (self.head - self.count) % self.capacity
+            if tail + self.count <= self.capacity:
+                ts = self.ts_ns[tail:tail + self.count]
+                values = self.values[tail:tail + self.count]
+            else:
+                ts = np.concatenate((self.ts_ns[tail:], self.ts_ns[:self.head]))
+                values = np.concatenate((self.values[tail:], self.values[:self.head]))
+
+            lo, hi = np.searchsorted(ts, [start_ns, stop_ns])
+            return ts[lo:hi].copy(), values[lo:hi].copy()
+
+
+class TelemetryBuffers:
+    """Recent raw telemetry per machine and metric, fed by MQTT ingest.
+
+    A ring covers a range when it has received every sample since the range
+    start (continuously connected, not yet overwritten, within the
+    retention window). New rings are not allocated past the memory cap;
+    those machines keep going to Influx.
+    """
+
+    def __init__(self, metrics: list[str], retention: float, capacity: int, max_bytes: int):
+        self.metrics = set(metrics)
+        self.retention_ns = int(retention * 1e9)
+        self.capacity = capacity
+        self.max_rings = max_bytes // (capacity * SAMPLE_BYTES)
+        self._rings: dict[tuple[str, str], TelemetryRing] = {}
+        self._lock = threading.Lock()
+
+    def append(self, machine_id: str, metric: str, ts_ns: int, value):
+        if metric not in self.metrics:
+            return
+
+        key = (machine_id, metric)
+        ring = self._rings.get(key)
+        if ring is None:
+            with self._lock:
+                ring = self._rings.get(key)
+                if ring is None:
+                    if len(self._rings) >= self.max_rings:
+                        return
+                    ring = self._rings[key] = TelemetryRing(self.capacity)
+        ring.append(ts_ns, float(value))
+
+    def clear(self):
+        """Forget everything, e.g. after an MQTT disconnect left a gap"""
+        with self._lock:
+            self._rings.clear()
+
+    def window(self, machine_id: str, metric: str, start_ns: int, stop_ns: int):
+        """(ts_ns, values) for [start_ns, stop_ns), or None if the ring doesn't cover it"""
+        if not live_store.ready:
+            return None
+
+        ring = self._rings.get((machine_id, metric))
+        if ring is None or ring.count == 0:
+            return None
+
+        with ring.lock:
+            covered_from = max(ring.covered_from, ring.newest() - self.retention_ns)
+            if ring.count == ring.capacity:
+                # Overwritten samples leave a gap right before the oldest one
+                covered_from = max(covered_from, ring.oldest() + 1)
+
+        if start_ns < covered_from:
+            return None
+        return ring.read(start_ns, stop_ns)
+
+
+# Singleton instance
+telemetry_buffers = TelemetryBuffers(
+    metrics=settings.TELEMETRY_BUFFER_METRICS,
+    retention=settings.TELEMETRY_BUFFER_SECONDS,
+    capacity=settings.TELEMETRY_BUFFER_CAPACITY,
+    max_bytes=settings.TELEMETRY_BUFFER_MAX_MB * 1024 * 1024
+)
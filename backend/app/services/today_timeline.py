@@ -0,0 +1,92 @@
+import asyncio
+from datetime import datetime, timezone
+from app.db import run_async
+from app.services.state_timeline import fetch_state_points_async, make_segment
+
+RUNNING_STATE = 1
+
+
+def _iso(dt: datetime) -> str:
+    return dt.isoformat().replace("+00:00", "Z")
+
+
+class MachineDayTimeline:
+    """Today's RUNNING time for one machine, extended incrementally.
+
+    Only points newer than the watermark are fetched on each refresh, so the
+    cost of a refresh depends on how long ago the previous one ran rather
+    than on how much of the day has passed.
+    """
+
+    def __init__(self, machine_id: str, day):
+        self.machine_id = machine_id
+        self.day = day
+        self.closed_runtime = 0
+        self.open_state = None
+        self.open_start: datetime | None = None
+        self.watermark: datetime | None = None
+        self.lock = asyncio.Lock()
+
+    def extend(self, points: list[dict]):
+        for p in points:
+            t = p["time"]
+            if self.watermark is not None and t <= self.watermark:
+                continue
+
+            if self.open_start is None:
+                self.open_state = p["state"]
+                self.open_start = t
+            elif p["state"] != self.open_state:
+                if self.open_state == RUNNING_STATE:
+                    self.closed_runtime += make_segment(self.open_state, self.open_start, t)["duration_sec"]
+
+                self.open_state = p["state"]
+                self.open_start = t
+
+            self.watermark = t
+
+    async def refresh(self, now: datetime):
+        if self.watermark is None:
+            start = now.replace(hour=0, minute=0, second=0, microsecond=0)
+        else:
+            start = self.watermark
+        if start >= now:
+            return
+        points = await fetch_state_points_async(self.machine_id, _iso(start), _iso(now))
+        self.extend(points)
+
+    def runtime(self) -> int:
+        if self.open_state == RUNNING_STATE:
+            return self.closed_runtime + int((self.watermark - self.open_start).total_seconds())
+        return self.closed_runtime
+
+
+class TodayTimelineStore:
+    """Per-machine MachineDayTimeline cache that rolls over at UTC midnight.
+
+    All state lives on the influx-io loop; public coroutines hop onto it.
+    """
+
+    def __init__(self):
+        self._timelines: dict[str, MachineDayTimeline] = {}
+
+    async def _refreshed(self, machine_id: str) -> MachineDayTimeline:
+        now = datetime.now(timezone.utc)
+        timeline = self._timelines.get(machine_id)
+        if timeline is None or timeline.day != now.date():
+            timeline = MachineDayTimeline(machine_id, now.date())
+            self._timelines[machine_id] = timeline
+
+        async with timeline.lock:
+            await timeline.refresh(now)
+        return timeline
+
+    async def _runtime(self, machine_id: str) -> int:
+        return (await self._refreshed(machine_id)).runtime()
+
+    async def get_runtime_async(self, machine_id: str) -> int:
+        return await run_async(self._runtime(machine_id))
+
+
+# Singleton instance
+today_timeline = TodayTimelineStore()
@@ -0,0 +1,240 @@
+import copy
+import json
+import os
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+from filelock import FileLock
+
+# How often the JSON backend re-checks users.json for edits made by other processes
+STAT_INTERVAL = 1.0  # seconds
+
+USER_COLUMNS = [
+    "id", "email", "password_hash", "name", "role", "post", "identity_number",
+    "photo_url", "is_active", "created_at", "last_login"
+]
+
+
+# ---------------- JSON FILE ----------------
+class _Snapshot:
+    """Parsed users.json plus lookup indexes; replaced wholesale, never mutated."""
+
+    def __init__(self, data: Dict, stamp: tuple):
+        self.data = data
+        self.stamp = stamp
+        self.by_email = {}
+        for user in data["users"].values():
+            if user["is_active"] and user["email"] not in self.by_email:
+                self.by_email[user["email"]] = user
+
+
+class JsonUserBackend:
+    """Whole store in one JSON file, rewritten (with a .bak copy) on every change.
+
+    Fine for a handful of users; reads are served from an in-memory snapshot.
+    """
+
+    def __init__(self, path: Path, on_external_change: Callable[[], None]):
+        self.path = path
+        self.lock_path = path.with_suffix(path.suffix + ".lock")
+        self._on_external_change = on_external_change
+        self._snapshot: Optional[_Snapshot] = None
+        self._checked_at = 0.0
+        self.version = 0
+
+    def _file_stamp(self) -> tuple:
+        st = os.stat(self.path)
+        return (st.st_mtime_ns, st.st_size)
+
+    def _load(self) -> _Snapshot:
+        """Cached read; re-parses only when users.json changed on disk"""
+        snapshot = self._snapshot
+        now = time.monotonic()
+        if snapshot is not None and now - self._checked_at < STAT_INTERVAL:
+            return snapshot
+
+        self._checked_at = now
+        if snapshot is not None and snapshot.stamp == self._file_stamp():
+            return snapshot
+
+        with FileLock(str(self.lock_path)):
+            with open(self.path, 'r') as f:
+                snapshot = _Snapshot(json.load(f), self._file_stamp())
+        reloaded = self._snapshot is not None
+        self._snapshot = snapshot
+        self.version += 1
+        if reloaded:
+            # Edited by another process; we can't tell which users changed
+            self._on_external_change()
+        return snapshot
+
+    def _read_users(self) -> Dict:
+        """Private copy of the store, safe to modify and pass to _write_users"""
+        return copy.deepcopy(self._load().data)
+
+    def _write_users(self, data: Dict):
+        """Thread-safe write with backup"""
+        with FileLock(str(self.lock_path)):
+            # Backup before write
+            if self.path.exists():
+                backup = self.path.with_suffix('.json.bak')
+                self.path.replace(backup)
+
+            with open(self.path, 'w') as f:
+                json.dump(data, f, indent=2)
+
+            self._snapshot = _Snapshot(data, self._file_stamp())
+        self._checked_at = time.monotonic()
+        self.version += 1
+
+    def is_empty(self) -> bool:
+        return not self.path.exists()
+
+    def get_active_by_email(self, email: str) -> Optional[Dict]:
+        user = self._load().by_email.get(email)
+        return dict(user) if user else None
+
+    def get_active_by_id(self, user_id: str) -> Optional[Dict]:
+        user = self._load().data["users"].get(user_id)
+        return dict(user) if user and user["is_active"] else None
+
+    def email_exists(self, email: str) -> bool:
+        return any(u["email"] == email for u in self._load().data["users"].values())
+
+    def insert_users(self, users: List[Dict]):
+        data = self._read_users() if self.path.exists() else {"users": {}}
+        for user in users:
+            data["users"][user["id"]] = user
+        self._write_users(data)
+
+    def update_user(self, user_id: str, fields: Dict) -> bool:
+        data = self._read_users()
+        if user_id not in data["users"]:
+            return False
+        data["users"][user_id].update(fields)
+        self._write_users(data)
+        return True
+
+    def list_active(self) -> List[Dict]:
+        return [dict(u) for u in self._load().data["users"].values() if u["is_active"]]
+
+
+# ---------------- SQLITE (WAL) ----------------
+class SqliteUserBackend:
+    """One row per user in SQLite with WAL journaling.
+
+    Lookups use the primary key / unique email index and updates touch a
+    single row, so cost doesn't grow with the number of users and readers
+    never wait for a writer.
+    """
+
+    def __init__(self, path: Path, migrate_from: Optional[Path] = None):
+        self.path = path
+        self._local = threading.local()
+
+        conn = self._conn()
+        with conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS users (
+                    id TEXT PRIMARY KEY,
+                    email TEXT NOT NULL,
+                    password_hash TEXT NOT NULL,
+                    name TEXT NOT NULL,
+                    role TEXT NOT NULL,
+                    post TEXT NOT NULL,
+                    identity_number TEXT NOT NULL,
+                    photo_url TEXT,
+                    is_active INTEGER NOT NULL DEFAULT 1,
+                    created_at TEXT,
+                    last_login TEXT
+                )
+            """)
+            conn.execute("CREATE UNIQUE INDEX IF NOT EXISTS users_email ON users (email)")
+
+        if migrate_from is not None and self.is_empty() and migrate_from.exists():
+            self._migrate(migrate_from)
+
+    def _conn(self) -> sqlite3.Connection:
+        # sqlite3 connections can't be shared between threads; keep one per thread
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(str(self.path), timeout=5.0)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def _migrate(self, json_path: Path):
+        """One-time import of an existing users.json (left in place as a backup)."""
+        with open(json_path, 'r') as f:
+            users = list(json.load(f)["users"].values())
+        with self._conn() as conn:
+            conn.executemany(
+                f"INSERT OR IGNORE INTO users ({', '.join(USER_COLUMNS)}) "
+                f"VALUES ({', '.join('?' * len(USER_COLUMNS))})",
+                [self._to_row(u) for u in users]
+            )
+        print(f"Migrated {len(users)} users from {json_path} to {self.path}")
+
+    @staticmethod
+    def _to_row(user: Dict) -> tuple:
+        return tuple(
+            int(user.get(c, True)) if c == "is_active" else user.get(c)
+            for c in USER_COLUMNS
+        )
+
+    @staticmethod
+    def _to_user(row: Optional[sqlite3.Row]) -> Optional[Dict]:
+        if row is None:
+            return None
+        user = dict(row)
+        user["is_active"] = bool(user["is_active"])
+        return user
+
+    def is_empty(self) -> bool:
+        return self._conn().execute("SELECT 1 FROM users LIMIT 1").fetchone() is None
+
+    def get_active_by_email(self, email: str) -> Optional[Dict]:
+        row = self._conn().execute(
+            "SELECT * FROM users WHERE email = ? AND is_active = 1", (email,)
+        ).fetchone()
+        return self._to_user(row)
+
+    def get_active_by_id(self, user_id: str) -> Optional[Dict]:
+        row = self._conn().execute(
+            "SELECT * FROM users WHERE id = ? AND is_active = 1", (user_id,)
+        ).fetchone()
+        return self._to_user(row)
+
+    def email_exists(self, email: str) -> bool:
+        return self._conn().execute(
+            "SELECT 1 FROM users WHERE email = ?", (email,)
+        ).fetchone() is not None
+
+    def insert_users(self, users: List[Dict]):
+        try:
+            with self._conn() as conn:
+                conn.executemany(
+                    f"INSERT INTO users ({', '.join(USER_COLUMNS)}) "
+                    f"VALUES ({', '.join('?' * len(USER_COLUMNS))})",
+                    [self._to_row(u) for u in users]
+                )
+        except sqlite3.IntegrityError:
+            raise ValueError("Email already exists")
+
+    def update_user(self, user_id: str, fields: Dict) -> bool:
+        columns = [c for c in fields if c in USER_COLUMNS and c != "id"]
+        values = [int(fields[c]) if c == "is_active" else fields[c] for c in columns]
+        with self._conn() as conn:
+            cursor = conn.execute(
+                f"UPDATE users SET {', '.join(f'{c} = ?' for c in columns)} WHERE id = ?",
+                (*values, user_id)
+            )
+        return cursor.rowcount > 0
+
+    def list_active(self) -> List[Dict]:
+        rows = self._conn().execute("SELECT * FROM users WHERE is_active = 1").fetchall()
+        return [self._to_user(r) for r in rows]
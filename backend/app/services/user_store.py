@@ -1,97 +1,88 @@
-import json
-import os
 from pathlib import Path
 from typing import Dict, Optional
 from datetime import datetime
 import uuid
-from filelock import FileLock  
-from passlib.context import CryptContext
-
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+from app.settings import settings
+from app.services.passwords import password_hasher, pwd_context
+from app.services.user_backends import JsonUserBackend, SqliteUserBackend
 
 DATA_DIR = Path(__file__).parent.parent.parent / "data"
 USERS_FILE = DATA_DIR / "users.json"
-LOCK_FILE = DATA_DIR / "users.json.lock"
+USERS_DB = DATA_DIR / "users.db"
 
 # Ensure data directory exists
 DATA_DIR.mkdir(exist_ok=True)
 
 class UserStore:
-    def __init__(self):
-        if not USERS_FILE.exists():
+    """User accounts on top of a pluggable storage backend.
+
+    Backends ("json" or "sqlite", chosen by USER_STORE_BACKEND) implement
+    is_empty, get_active_by_email, get_active_by_id, email_exists,
+    insert_users, update_user and list_active.
+    """
+
+    def __init__(self, backend=None):
+        self._listeners = []
+        self.backend = backend or self._default_backend()
+        if self.backend.is_empty():
             self._init_default_users()
     
-    def _read_users(self) -> Dict:
-        """Thread-safe read"""
-        with FileLock(str(LOCK_FILE)):
-            with open(USERS_FILE, 'r') as f:
-                return json.load(f)
+    def _default_backend(self):
+        if settings.USER_STORE_BACKEND == "sqlite":
+            return SqliteUserBackend(USERS_DB, migrate_from=USERS_FILE)
+        return JsonUserBackend(USERS_FILE, on_external_change=lambda: self._notify(None))
+    
+    def add_listener(self, callback):
+        """Register callback(user_id) for user changes; None means any user may have changed"""
+        self._listeners.append(callback)
     
-    def _write_users(self, data: Dict):
-        """Thread-safe write with backup"""
-        with FileLock(str(LOCK_FILE)):
-            # Backup before write
-            if USERS_FILE.exists():
-                backup = USERS_FILE.with_suffix('.json.bak')
-                USERS_FILE.replace(backup)
-            
-            with open(USERS_FILE, 'w') as f:
-                json.dump(data, f, indent=2)
+    def _notify(self, user_id: Optional[str]):
+        for callback in self._listeners:
+            callback(user_id)
     
     def _init_default_users(self):
         """Create default admin user"""
-        data = {
-            "users": {
-                "admin-001": {
-                    "id": "admin-001",
-                    "email": "owner@company.com",
-                    "password_hash": pwd_context.hash("owner123"),
-                    "name": "System Admin",
-                    "role": "OWNER",
-                    "post": "Plant Manager",
-                    "identity_number": "EMP-001",
-                    "photo_url": None,
-                    "is_active": True,
-                    "created_at": datetime.utcnow().isoformat() + "Z",
-                    "last_login": None
-                },
-                "worker-001": {
-                    "id": "worker-001",
-                    "email": "worker@company.com",
-                    "password_hash": pwd_context.hash("worker123"),
-                    "name": "Machine Operator",
-                    "role": "WORKER",
-                    "post": "Operator",
-                    "identity_number": "EMP-002",
-                    "photo_url": None,
-                    "is_active": True,
-                    "created_at": datetime.utcnow().isoformat() + "Z",
-                    "last_login": None
-                }
+        self.backend.insert_users([
+            {
+                "id": "admin-001",
+                "email": "owner@company.com",
+                "password_hash": pwd_context.hash("owner123"),
+                "name": "System Admin",
+                "role": "OWNER",
+                "post": "Plant Manager",
+                "identity_number": "EMP-001",
+                "photo_url": None,
+                "is_active": True,
+                "created_at": datetime.utcnow().isoformat() + "Z",
+                "last_login": None
+            },
+            {
+                "id": "worker-001",
+                "email": "worker@company.com",
+                "password_hash": pwd_context.hash("worker123"),
+                "name": "Machine Operator",
+                "role": "WORKER",
+                "post": "Operator",
+                "identity_number": "EMP-002",
+                "photo_url": None,
+                "is_active": True,
+                "created_at": datetime.utcnow().isoformat() + "Z",
+                "last_login": None
             }
-        }
-        self._write_users(data)
+        ])
     
     def get_user_by_email(self, email: str) -> Optional[Dict]:
         """Find user by email"""
-        data = self._read_users()
-        for user in data["users"].values():
-            if user["email"] == email and user["is_active"]:
-                return user
-        return None
+        return self.backend.get_active_by_email(email)
     
     def get_user_by_id(self, user_id: str) -> Optional[Dict]:
         """Find user by ID"""
-        data = self._read_users()
-        user = data["users"].get(user_id)
-        return user if user and user["is_active"] else None
+        return self.backend.get_active_by_id(user_id)
     
     def create_user(self, email: str, password: str, name: str, role: str, post: str, identity_number: str) -> Dict:
         """Create new user"""
-        data = self._read_users()
-        
         # Check if email exists
-        if any(u["email"] == email for u in data["users"].values()):
+        if self.backend.email_exists(email):
             raise ValueError("Email already exists")
         
         # Generate UUID
@@ -101,7 +92,7 @@ class UserStore:
         user = {
             "id": user_id,
             "email": email,
-            "password_hash": pwd_context.hash(password),
+            "password_hash": password_hasher.hash(password),
             "name": name,
             "role": role,
             "post": post,
@@ -112,8 +103,7 @@ class UserStore:
             "last_login": None
         }
         
-        data["users"][user_id] = user
-        self._write_users(data)
+        self.backend.insert_users([user])
         
         # Don't return password hash
         user_safe = {k: v for k, v in user.items() if k != "password_hash"}
@@ -121,30 +111,27 @@ class UserStore:
     
     def update_last_login(self, user_id: str):
         """Update last login timestamp"""
-        data = self._read_users()
-        if user_id in data["users"]:
-            data["users"][user_id]["last_login"] = datetime.utcnow().isoformat() + "Z"
-            self._write_users(data)
+        self.backend.update_user(user_id, {"last_login": datetime.utcnow().isoformat() + "Z"})
+    
+    def update_password_hash(self, user_id: str, password_hash: str):
+        """Replace a stored hash, e.g. after re-hashing with a new bcrypt cost"""
+        self.backend.update_user(user_id, {"password_hash": password_hash})
     
     def verify_password(self, plain_password: str, hashed_password: str) -> bool:
         """Verify password against hash"""
-        return pwd_context.verify(plain_password, hashed_password)
+        return password_hasher.verify(plain_password, hashed_password)
     
     def list_users(self) -> list:
         """List all active users"""
-        data = self._read_users()
         return [
             {k: v for k, v in user.items() if k != "password_hash"}
-            for user in data["users"].values()
-            if user["is_active"]
+            for user in self.backend.list_active()
         ]
     
     def deactivate_user(self, user_id: str):
         """Soft delete user"""
-        data = self._read_users()
-        if user_id in data["users"]:
-            data["users"][user_id]["is_active"] = False
-            self._write_users(data)
+        if self.backend.update_user(user_id, {"is_active": False}):
+            self._notify(user_id)
 
 # Singleton instance
 user_store = UserStore()
\ No newline at end of file
@@ -9,8 +9,51 @@ class Settings:
     INFLUX_ORG = os.getenv("INFLUX_ORG")
     INFLUX_BUCKET_REALTIME = os.getenv("INFLUX_BUCKET_REALTIME")
     INFLUX_BUCKET_1S = os.getenv("INFLUX_BUCKET_1S")
+    INFLUX_POOL_SIZE = int(os.getenv("INFLUX_POOL_SIZE", "8"))
+    INFLUX_STREAM_SLOTS = int(os.getenv("INFLUX_STREAM_SLOTS", "2"))  # concurrent exports, on top of the pool
+    INFLUX_QUERY_TIMEOUT = float(os.getenv("INFLUX_QUERY_TIMEOUT", "10"))  # seconds
+
+    # Rollups (disabled when no rollup bucket is configured)
+    INFLUX_BUCKET_ROLLUP = os.getenv("INFLUX_BUCKET_ROLLUP")
+    ROLLUP_INTERVAL = int(os.getenv("ROLLUP_INTERVAL", "300"))  # seconds between rollup passes
+    ROLLUP_BACKFILL_DAYS = int(os.getenv("ROLLUP_BACKFILL_DAYS", "7"))
+    JOB_MAX_DURATION_HOURS = float(os.getenv("JOB_MAX_DURATION_HOURS", "24"))  # longest job the index pairs up
+    STATE_MAX_GAP = float(os.getenv("STATE_MAX_GAP", "5"))  # seconds one state sample counts for at most
+
+    # MQTT ingest for live data (disabled when no broker is configured)
+    MQTT_BROKER = os.getenv("MQTT_BROKER")
+    MQTT_PORT = int(os.getenv("MQTT_PORT", "1883"))
+    MQTT_CLIENT_ID = os.getenv("MQTT_CLIENT_ID", "")
+
+    # Recent raw telemetry kept in memory from MQTT ingest
+    TELEMETRY_BUFFER_METRICS = os.getenv("TELEMETRY_BUFFER_METRICS", "spindle_speed,temperature").split(",")
+    TELEMETRY_BUFFER_SECONDS = float(os.getenv("TELEMETRY_BUFFER_SECONDS", "600"))    # retention window
+    TELEMETRY_BUFFER_CAPACITY = int(os.getenv("TELEMETRY_BUFFER_CAPACITY", "65536"))  # samples per ring
+    TELEMETRY_BUFFER_MAX_MB = int(os.getenv("TELEMETRY_BUFFER_MAX_MB", "64"))         # total for all rings
+
+    # History endpoints return at most this many rows per response (then page with the cursor)
+    HISTORY_MAX_ROWS = int(os.getenv("HISTORY_MAX_ROWS", "10000"))
+
+    # History response cache: ranges ending before now - INGEST_DELAY are treated as immutable
+    RESPONSE_CACHE_MAX_MB = int(os.getenv("RESPONSE_CACHE_MAX_MB", "64"))
+    RESPONSE_CACHE_INGEST_DELAY = float(os.getenv("RESPONSE_CACHE_INGEST_DELAY", "120"))  # seconds
+    RESPONSE_CACHE_RECENT_TTL = float(os.getenv("RESPONSE_CACHE_RECENT_TTL", "5"))        # seconds
+    RESPONSE_CACHE_MAX_AGE = int(os.getenv("RESPONSE_CACHE_MAX_AGE", "86400"))            # Cache-Control for closed ranges
+
+    # Live push: change-driven when MQTT ingest is up, polled otherwise
+    LIVE_MAX_RATE = float(os.getenv("LIVE_MAX_RATE", "5"))            # pushes/s per machine while running
+    LIVE_IDLE_INTERVAL = float(os.getenv("LIVE_IDLE_INTERVAL", "2"))  # seconds between pushes when not running
+    LIVE_HEARTBEAT = float(os.getenv("LIVE_HEARTBEAT", "15"))         # max seconds without a push
+    LIVE_ERROR_BACKOFF_MAX = float(os.getenv("LIVE_ERROR_BACKOFF_MAX", "30"))  # seconds
+
+    # Websockets: a client whose send stalls this long is disconnected
+    WS_SEND_TIMEOUT = float(os.getenv("WS_SEND_TIMEOUT", "5"))  # seconds
 
     # Auth setting
     SECRET_KEY = os.getenv("SECRET_KEY")
+    USER_STORE_BACKEND = os.getenv("USER_STORE_BACKEND", "json")  # "json" or "sqlite"
+    BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12"))
+    PASSWORD_WORKERS = int(os.getenv("PASSWORD_WORKERS", "2"))          # bcrypt worker processes
+    PASSWORD_QUEUE_LIMIT = int(os.getenv("PASSWORD_QUEUE_LIMIT", "16"))  # waiting jobs before 503
 
 settings = Settings()
@@ -0,0 +1,285 @@
+"""HTTP and websocket load benchmark of the API against a fake Influx.
+
+Starts the FastAPI app under uvicorn in a child process with
+bench.fake_influx installed as the Influx client, then drives each endpoint
+with a fixed number of concurrent clients. Reports p50/p95/p99 latency,
+throughput and the server's peak RSS per endpoint and range size, plus the
+largest websocket fan-out that still receives the target update rate.
+Results are written as JSON so runs can be compared.
+
+Run from backend/:  python -m bench.bench_api [--sizes 3600 86400] [--out bench_api.json]
+"""
+import argparse
+import asyncio
+import json
+import multiprocessing
+import os
+import platform
+import subprocess
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+
+import httpx
+from websockets.asyncio.client import connect
+
+from app.services.broadcaster import POLL_INTERVAL
+
+RANGE_START = datetime(2026, 1, 1, tzinfo=timezone.utc)
+WS_PASS_RATIO = 0.9  # a step passes when the slowest 10% of clients get >= 90% of the target rate
+
+# name -> (path template, depends on range size)
+ENDPOINTS = {
+    "machines": ("/machines", False),
+    "telemetry": ("/machines/machine01/telemetry?metric=spindle_speed&from={start}&to={stop}", True),
+    "state_timeline": ("/machines/machine01/state-timeline?from={start}&to={stop}", True),
+    "jobs": ("/machines/machine01/jobs?from={start}&to={stop}", True),
+    "reports_daily": ("/reports/daily", False),
+}
+
+
+# ---------------- SERVER ----------------
+def _serve(port: int, machines: int, latency_ms: float, quiet: bool):
+    if quiet:
+        sys.stdout = open(os.devnull, "w")
+
+    import uvicorn
+    from app import db
+    from app.main import app
+    from app.settings import settings
+    from bench.fake_influx import FakeInfluxClient
+
+    db._async_client = FakeInfluxClient(machines=machines, latency_ms=latency_ms)
+    db._query_slots = asyncio.Semaphore(settings.INFLUX_POOL_SIZE)
+    db._stream_slots = asyncio.Semaphore(settings.INFLUX_STREAM_SLOTS)
+    uvicorn.run(app, host="127.0.0.1", port=port, log_level="warning", access_log=False)
+
+
+def _start_server(args) -> multiprocessing.Process:
+    # Push idle machines at the full rate too, so the fan-out step measures capacity
+    os.environ.setdefault("LIVE_IDLE_INTERVAL", str(POLL_INTERVAL))
+    ctx = multiprocessing.get_context("spawn")
+    server = ctx.Process(
+        target=_serve,
+        args=(args.port, args.machines, args.influx_latency_ms, not args.verbose),
+        daemon=True
+    )
+    server.start()
+
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        try:
+            if httpx.get(f"http://127.0.0.1:{args.port}/machines").status_code == 200:
+                return server
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.2)
+    server.terminate()
+    raise RuntimeError("API server did not start")
+
+
+# -------- peak RSS (Linux /proc; None elsewhere) --------
+def _reset_peak_rss(pid: int):
+    try:
+        with open(f"/proc/{pid}/clear_refs", "w") as f:
+            f.write("5")
+    except OSError:
+        pass
+
+
+def _peak_rss_mb(pid: int) -> float | None:
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return None
+
+
+# ---------------- HTTP ----------------
+def _percentile(sorted_values: list[float], pct: float) -> float:
+    if not sorted_values:
+        return float("nan")
+    index = min(len(sorted_values) - 1, int(round(pct / 100 * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+async def _load(client: httpx.AsyncClient, url: str, concurrency: int, duration: float) -> dict:
+    latencies = []
+    errors = 0
+    deadline = time.perf_counter() + duration
+
+    async def worker():
+        nonlocal errors
+        while time.perf_counter() < deadline:
+            t0 = time.perf_counter()
+            try:
+                response = await client.get(url)
+            except httpx.HTTPError:
+                errors += 1
+                continue
+            if response.status_code != 200:
+                errors += 1
+                continue
+            latencies.append(time.perf_counter() - t0)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "throughput_rps": round(len(latencies) / elapsed, 1),
+        "latency_ms": {
+            name: round(_percentile(latencies, pct) * 1000, 2)
+            for name, pct in (("p50", 50), ("p95", 95), ("p99", 99), ("max", 100))
+        },
+    }
+
+
+async def bench_http(args, pid: int) -> list[dict]:
+    base = f"http://127.0.0.1:{args.port}"
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    results = []
+
+    async with httpx.AsyncClient(base_url=base, limits=limits, timeout=60) as client:
+        for name in args.endpoints:
+            template, sized = ENDPOINTS[name]
+            for size in (args.sizes if sized else [None]):
+                params = {}
+                if size:
+                    stop = RANGE_START + timedelta(seconds=size)
+                    params = {"start": RANGE_START.isoformat().replace("+00:00", "Z"),
+                              "stop": stop.isoformat().replace("+00:00", "Z")}
+                url = template.format(**params)
+
+                # Warm up (fills the fake's response cache and app caches)
+                for _ in range(3):
+                    await client.get(url)
+
+                _reset_peak_rss(pid)
+                result = await _load(client, url, args.concurrency, args.duration)
+                result = {"endpoint": name, "size": size, **result, "peak_rss_mb": _peak_rss_mb(pid)}
+                results.append(result)
+
+                lat = result["latency_ms"]
+                print(f"{name:<15} {str(size or '-'):>7} {result['throughput_rps']:>9.1f} rps  "
+                      f"p50 {lat['p50']:>8.2f}  p95 {lat['p95']:>8.2f}  p99 {lat['p99']:>8.2f} ms  "
+                      f"errors {result['errors']}  rss {result['peak_rss_mb'] or 0:.0f} MB")
+    return results
+
+
+# ---------------- WEBSOCKET ----------------
+async def _ws_step(args, clients: int) -> dict:
+    counts = [0] * clients
+    connected = [False] * clients
+    received = [False] * clients
+    counting = False
+
+    async def client(i: int):
+        machine_id = f"machine{i % args.machines + 1:02d}"
+        async with connect(f"ws://127.0.0.1:{args.port}/ws/machines/{machine_id}", open_timeout=30) as ws:
+            connected[i] = True
+            async for _ in ws:
+                received[i] = True
+                if counting:
+                    counts[i] += 1
+
+    tasks = [asyncio.create_task(client(i)) for i in range(clients)]
+
+    # The first payload per machine waits on a full-day runtime fetch; don't count that
+    deadline = time.monotonic() + args.ws_settle
+    while time.monotonic() < deadline and not all(received):
+        await asyncio.sleep(0.1)
+    counting = True
+    await asyncio.sleep(args.ws_window)
+    counting = False
+
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+
+    rates = sorted(c / args.ws_window for c in counts)
+    p10 = _percentile(rates, 10)
+    return {
+        "clients": clients,
+        "connected": sum(connected),
+        "p10_hz": round(p10, 2),
+        "median_hz": round(_percentile(rates, 50), 2),
+        "ok": sum(connected) == clients and p10 >= args.ws_target_hz * WS_PASS_RATIO,
+    }
+
+
+async def bench_websocket(args) -> dict:
+    steps = []
+    max_clients = 0
+    for clients in args.ws_steps:
+        step = await _ws_step(args, clients)
+        steps.append(step)
+        print(f"websocket {clients:>6} clients  connected {step['connected']:>6}  "
+              f"p10 {step['p10_hz']:>5.2f} Hz  median {step['median_hz']:>5.2f} Hz  {'ok' if step['ok'] else 'FAIL'}")
+        if not step["ok"]:
+            break
+        max_clients = clients
+    return {"target_hz": args.ws_target_hz, "steps": steps, "max_clients": max_clients}
+
+
+# ---------------- MAIN ----------------
+def _git_commit() -> str | None:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[3600, 86400],
+                        help="range lengths in seconds (1 Hz data) for range endpoints")
+    parser.add_argument("--endpoints", nargs="+", choices=list(ENDPOINTS), default=list(ENDPOINTS))
+    parser.add_argument("--machines", type=int, default=50, help="fleet size served by the fake")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--duration", type=float, default=5.0, help="seconds per endpoint and size")
+    parser.add_argument("--influx-latency-ms", type=float, default=0.0, help="simulated Influx round trip")
+    parser.add_argument("--ws-steps", type=int, nargs="*", default=[25, 50, 100, 200, 400, 800])
+    parser.add_argument("--ws-target-hz", type=float, default=1 / POLL_INTERVAL)
+    parser.add_argument("--ws-settle", type=float, default=30.0, help="max seconds to wait for first updates")
+    parser.add_argument("--ws-window", type=float, default=5.0)
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--out", default="bench_api.json")
+    parser.add_argument("--verbose", action="store_true", help="keep the server's output")
+    args = parser.parse_args()
+
+    server = _start_server(args)
+    try:
+        http_results = asyncio.run(bench_http(args, server.pid))
+        ws_results = asyncio.run(bench_websocket(args)) if args.ws_steps else None
+    finally:
+        server.terminate()
+        server.join()
+
+    report = {
+        "meta": {
+            "timestamp": datetime.now(timezone.utc).isoformat().replace("+00:00", "Z"),
+            "commit": _git_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+            "args": vars(args),
+        },
+        "http": http_results,
+        "websocket": ws_results,
+    }
+    with open(args.out, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"Results written to {args.out}")
+
+
+if __name__ == "__main__":
+    main()
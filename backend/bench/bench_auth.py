@@ -0,0 +1,38 @@
+"""Per-request auth overhead of get_current_user, uncached vs cached.
+
+Run from backend/:  python -m bench.bench_auth [--requests 20000]
+"""
+import argparse
+import os
+import time
+
+os.environ.setdefault("SECRET_KEY", "bench-secret")
+
+from app.services.auth import _resolve_user, create_access_token, get_current_user, principal_cache
+
+
+def _per_request_us(fn, token: str, requests: int) -> float:
+    t0 = time.perf_counter()
+    for _ in range(requests):
+        fn(token)
+    return (time.perf_counter() - t0) / requests * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--requests", type=int, default=20000)
+    args = parser.parse_args()
+
+    token = create_access_token({"user_id": "admin-001", "role": "OWNER"})
+    principal_cache.evict_user(None)
+
+    before = _per_request_us(_resolve_user, token, args.requests)
+    after = _per_request_us(get_current_user, token, args.requests)
+
+    print(f"{args.requests} requests with one token")
+    print(f"verify + load (before)  {before:8.2f} us/request")
+    print(f"principal cache (after) {after:8.2f} us/request   x{before / after:6.1f}")
+
+
+if __name__ == "__main__":
+    main()
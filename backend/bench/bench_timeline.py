@@ -0,0 +1,98 @@
+"""Per-row vs columnar telemetry history processing on one day of 1 Hz data.
+
+Run from backend/:  python -m bench.bench_timeline [--seconds 86400] [--repeat 5]
+"""
+import argparse
+import random
+import time
+from datetime import datetime, timedelta, timezone
+
+from influxdb_client.client.flux_csv_parser import FluxCsvParser, FluxSerializationMode
+
+from app.services.columnar import isoformat, parse_columns
+
+# Shape of the history query's output after keep(columns: ["_time", "_value"])
+HEADER = (
+    "#datatype,string,long,dateTime:RFC3339,long\r\n"
+    "#group,false,false,false,false\r\n"
+    "#default,_result,,,\r\n"
+    ",result,table,_time,_value\r\n"
+)
+
+
+def generate_day(seconds: int, seed: int = 42) -> str:
+    """Annotated CSV for a cnc_state series: jobs of 20-50 s separated by 5-20 s idle."""
+    rng = random.Random(seed)
+    day = datetime(2026, 1, 1, tzinfo=timezone.utc)
+
+    lines = [HEADER]
+    state, remaining = 1, rng.randint(20, 50)
+    for i in range(seconds):
+        if remaining == 0:
+            state = 2 if state == 1 else 1
+            remaining = rng.randint(20, 50) if state == 1 else rng.randint(5, 20)
+        remaining -= 1
+        ts = (day + timedelta(seconds=i, milliseconds=rng.randint(0, 999))).strftime("%Y-%m-%dT%H:%M:%S.%fZ")
+        lines.append(f",,0,{ts},{state}\r\n")
+    lines.append("\r\n")
+    return "".join(lines)
+
+
+class _Response:
+    """Already-read HTTP response, as FluxCsvParser sees it after logging."""
+    closed = True
+
+    def __init__(self, raw: str):
+        self.data = raw.encode()
+
+    def close(self):
+        pass
+
+
+def _records(raw: str):
+    with FluxCsvParser(response=_Response(raw), serialization_mode=FluxSerializationMode.tables) as parser:
+        list(parser.generator())
+        return [record for table in parser.tables for record in table.records]
+
+
+# -------- per-row implementation (what the services did before) --------
+def history_per_row(raw: str):
+    return [{"ts": r.get_time().isoformat(), "value": r.get_value()} for r in _records(raw)]
+
+
+# -------- columnar implementation --------
+def history_columnar(raw: str):
+    columns = parse_columns(raw, ("_time", "_value"))
+    return [
+        {"ts": ts, "value": value}
+        for ts, value in zip(isoformat(columns["_time"]).tolist(), columns["_value"].tolist())
+    ]
+
+
+def _best_of(fn, raw: str, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn(raw)
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--seconds", type=int, default=86400, help="points in the series (1 Hz)")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    raw = generate_day(args.seconds)
+
+    assert history_per_row(raw) == history_columnar(raw), "history results differ"
+
+    print(f"{args.seconds} points, best of {args.repeat}")
+    t_old = _best_of(history_per_row, raw, args.repeat)
+    t_new = _best_of(history_columnar, raw, args.repeat)
+    print(f"telemetry history  per-row {t_old * 1000:8.1f} ms   columnar {t_new * 1000:8.1f} ms   x{t_old / t_new:5.1f}")
+
+
+if __name__ == "__main__":
+    main()
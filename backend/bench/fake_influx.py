@@ -0,0 +1,249 @@
+"""Deterministic stand-in for InfluxDBClientAsync, for benchmarks.
+
+Recognises the Flux queries the services issue and answers them with
+annotated CSV generated from the query's own range and window: state at
+1 Hz (40 s RUNNING / 20 s IDLE cycles), telemetry at 1 Hz or one point per
+aggregateWindow, a job every 60 s. query() and query_stream() parse that
+CSV with the client library's own FluxCsvParser, so response handling
+costs the same as against a real server. Values depend only on time and
+machine id, so runs are reproducible.
+"""
+import asyncio
+import re
+import zlib
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+from influxdb_client.client.flux_csv_parser import FluxCsvParser, FluxSerializationMode
+
+CACHE_SIZE = 64  # generated responses kept per client, keyed by query text
+
+_RANGE = re.compile(r'range\(start: time\(v: "([^"]+)"\), stop: time\(v: "([^"]+)"\)\)')
+_RELATIVE = re.compile(r"range\(start: -(\d+)([smhd])\)")
+_WINDOW = re.compile(r"aggregateWindow\(every: (\d+)ms")
+_LIMIT = re.compile(r"limit\(n: (\d+)\)")
+_MACHINE = re.compile(r'r\.machine_id == "([^"]+)"')
+_UNITS = {"s": 1, "m": 60, "h": 3600, "d": 86400}
+
+
+def _parse_time(value: str) -> datetime:
+    return datetime.fromisoformat(value.replace("Z", "+00:00"))
+
+
+def _offset(machine_id: str) -> int:
+    return zlib.crc32(machine_id.encode()) % 60
+
+
+def _rfc3339(ms: np.ndarray) -> list[str]:
+    return np.char.add(np.datetime_as_string(ms.astype("datetime64[ms]"), unit="ms"), "Z").tolist()
+
+
+def _table(result: str, columns: list[tuple[str, str]], rows) -> str:
+    """One annotated-CSV table; rows is an iterable of value lists."""
+    names = [c for c, _ in columns]
+    lines = [
+        "#datatype,string,long," + ",".join(t for _, t in columns),
+        "#group,false,false," + ",".join("false" for _ in columns),
+        f"#default,{result},," + "," * (len(columns) - 1),
+        ",result,table," + ",".join(names),
+    ]
+    lines.extend(",,0," + ",".join(map(str, row)) for row in rows)
+    return "\r\n".join(lines) + "\r\n"
+
+
+def _csv(tables: list[str]) -> str:
+    return "\r\n".join(tables) + "\r\n"
+
+
+class _Response:
+    """Already-read HTTP response, as FluxCsvParser expects it."""
+    closed = True
+
+    def __init__(self, raw: str):
+        self.data = raw.encode()
+
+    def close(self):
+        pass
+
+
+class FakeQueryApi:
+    def __init__(self, client: "FakeInfluxClient"):
+        self._client = client
+
+    async def query_raw(self, query: str) -> str:
+        return await self._client.respond(query)
+
+    async def query(self, query: str):
+        raw = await self._client.respond(query)
+        with FluxCsvParser(response=_Response(raw), serialization_mode=FluxSerializationMode.tables) as parser:
+            list(parser.generator())
+            return parser.tables
+
+    async def query_stream(self, query: str):
+        raw = await self._client.respond(query)
+
+        async def records():
+            with FluxCsvParser(response=_Response(raw), serialization_mode=FluxSerializationMode.stream) as parser:
+                for record in parser.generator():
+                    yield record
+
+        return records()
+
+
+class FakeInfluxClient:
+    def __init__(self, machines: int = 50, latency_ms: float = 0.0):
+        self.machine_ids = [f"machine{i:02d}" for i in range(1, machines + 1)]
+        self.latency = latency_ms / 1000
+        self._cache: OrderedDict[str, str] = OrderedDict()
+
+    def query_api(self) -> FakeQueryApi:
+        return FakeQueryApi(self)
+
+    async def close(self):
+        pass
+
+    async def respond(self, query: str) -> str:
+        if self.latency:
+            await asyncio.sleep(self.latency)
+
+        raw = self._cache.get(query)
+        if raw is None:
+            raw = self._generate(query)
+            self._cache[query] = raw
+            if len(self._cache) > CACHE_SIZE:
+                self._cache.popitem(last=False)
+        else:
+            self._cache.move_to_end(query)
+        return raw
+
+    # -------- query recognition --------
+    def _range_ms(self, query: str) -> tuple[int, int]:
+        now = datetime.now(timezone.utc)
+        match = _RANGE.search(query)
+        if match:
+            start, stop = _parse_time(match.group(1)), _parse_time(match.group(2))
+        else:
+            match = _RELATIVE.search(query)
+            seconds = int(match.group(1)) * _UNITS[match.group(2)] if match else 3600
+            start, stop = now - timedelta(seconds=seconds), now
+        return int(start.timestamp() * 1000), int(stop.timestamp() * 1000)
+
+    def _generate(self, query: str) -> str:
+        machine = _MACHINE.search(query)
+        machine_id = machine.group(1) if machine else self.machine_ids[0]
+        start_ms, stop_ms = self._range_ms(query)
+
+        if 'yield(name: "machines")' in query:
+            return self._daily_report(start_ms, stop_ms)
+        if "range(start: -30s)" in query:
+            return self._snapshot(machine_id, stop_ms)
+        if '"cnc_job"' in query and "limit(n: 1)" in query:
+            return self._jobs(machine_id, stop_ms - 300_000, stop_ms, starts_only=True)
+        if '"cnc_job"' in query:
+            return self._jobs(machine_id, start_ms, stop_ms)
+        if '"part_count"' in query and "difference(" in query:
+            return self._part_increments(machine_id, start_ms, stop_ms)
+        if 'r._measurement == "cnc_state")' in query and "last()" in query:
+            return self._machines(stop_ms)
+        if '"machine_state"' in query and "difference(keepFirst: true)" in query:
+            return self._state_segments(machine_id, start_ms, stop_ms, self._limit(query))
+        if '"machine_state"' in query:
+            return self._states(machine_id, start_ms, stop_ms)
+        if '"cnc_telemetry"' in query:
+            window = _WINDOW.search(query)
+            every_ms = int(window.group(1)) if window else 1000
+            return self._telemetry(machine_id, start_ms, stop_ms, every_ms, self._limit(query))
+        return _csv([])
+
+    # -------- generators --------
+    def _grid(self, start_ms: int, stop_ms: int, every_ms: int) -> np.ndarray:
+        first = -(-start_ms // every_ms) * every_ms
+        return np.arange(first, stop_ms, every_ms, dtype=np.int64)
+
+    def _state_at(self, machine_id: str, t_ms: np.ndarray) -> np.ndarray:
+        return np.where((t_ms // 1000 + _offset(machine_id)) % 60 < 40, 1, 2)
+
+    def _states(self, machine_id: str, start_ms: int, stop_ms: int) -> str:
+        t = self._grid(start_ms, stop_ms, 1000)
+        states = self._state_at(machine_id, t).tolist()
+        columns = [("_time", "dateTime:RFC3339"), ("_value", "double")]
+        return _csv([_table("_result", columns, zip(_rfc3339(t), states))])
+
+    def _limit(self, query: str) -> int | None:
+        match = _LIMIT.search(query)
+        return int(match.group(1)) if match else None
+
+    def _state_segments(self, machine_id: str, start_ms: int, stop_ms: int, limit: int | None) -> str:
+        # First point of each run of equal states, as the run-length Flux query returns them
+        t = self._grid(start_ms, stop_ms, 1000)
+        if len(t) == 0:
+            return _csv([])
+        states = self._state_at(machine_id, t)
+        first = np.concatenate(([0], np.flatnonzero(states[1:] != states[:-1]) + 1))[:limit]
+        changes = _table("changes", [("_time", "dateTime:RFC3339"), ("state", "double")],
+                         zip(_rfc3339(t[first]), states[first].astype(np.float64).tolist()))
+        last = _table("last", [("_time", "dateTime:RFC3339")], [(_rfc3339(t[-1:])[0],)])
+        return _csv([changes, last])
+
+    def _telemetry(self, machine_id: str, start_ms: int, stop_ms: int, every_ms: int,
+                   limit: int | None = None) -> str:
+        t = self._grid(start_ms, stop_ms, every_ms)[:limit]
+        values = (1000 + (t // 1000 * 7919 + _offset(machine_id)) % 5000).astype(np.float64).tolist()
+        columns = [("_time", "dateTime:RFC3339"), ("_value", "double")]
+        return _csv([_table("_result", columns, zip(_rfc3339(t), values))])
+
+    def _jobs(self, machine_id: str, start_ms: int, stop_ms: int, starts_only: bool = False) -> str:
+        offset = _offset(machine_id) * 1000
+        cycles = np.arange((start_ms - offset) // 60_000, (stop_ms - offset) // 60_000 + 1)
+        rows = []
+        for k in cycles.tolist():
+            begin = k * 60_000 + offset
+            job_id = 101.0 + k % 3
+            for t, event in ((begin, 1.0), (begin + 40_000, 0.0)):
+                if start_ms <= t < stop_ms and (event == 1.0 or not starts_only):
+                    rows.append((t, job_id, event))
+        if starts_only:
+            rows = rows[-1:]
+        times = _rfc3339(np.array([r[0] for r in rows], dtype=np.int64))
+        columns = [("machine_id", "string"), ("_time", "dateTime:RFC3339"), ("job_id", "double"), ("event", "double")]
+        return _csv([_table("_result", columns, ((machine_id, ts, r[1], r[2]) for ts, r in zip(times, rows)))])
+
+    def _part_increments(self, machine_id: str, start_ms: int, stop_ms: int) -> str:
+        # part_count goes up by one every 5 s (see _snapshot)
+        t = self._grid(start_ms, stop_ms, 5000)
+        columns = [("machine_id", "string"), ("_time", "dateTime:RFC3339"), ("_value", "double")]
+        return _csv([_table("_result", columns, ((machine_id, ts, 1.0) for ts in _rfc3339(t)))])
+
+    def _machines(self, now_ms: int) -> str:
+        ts = _rfc3339(np.array([now_ms], dtype=np.int64))[0]
+        columns = [("machine_id", "string"), ("_value", "double"), ("_time", "dateTime:RFC3339")]
+        return _csv([
+            _table("_result", columns, [(mid, self._state_at(mid, np.array([now_ms]))[0], ts)])
+            for mid in self.machine_ids
+        ])
+
+    def _snapshot(self, machine_id: str, now_ms: int) -> str:
+        ts = _rfc3339(np.array([now_ms], dtype=np.int64))[0]
+        state = self._state_at(machine_id, np.array([now_ms]))[0]
+        fields = [
+            ("cnc_telemetry", "spindle_speed", 3000.0 if state == 1 else 0.0),
+            ("cnc_telemetry", "temperature", 48.5),
+            ("cnc_telemetry", "running_time", float(now_ms // 1000 % 86400)),
+            ("cnc_state", "machine_state", float(state)),
+            ("cnc_business", "part_count", float(now_ms // 5000 % 10000)),
+        ]
+        columns = [("_measurement", "string"), ("_field", "string"), ("_value", "double"), ("_time", "dateTime:RFC3339")]
+        return _csv([_table("_result", columns, [(m, f, v, ts)]) for m, f, v in fields])
+
+    def _daily_report(self, start_ms: int, stop_ms: int) -> str:
+        ts = _rfc3339(np.array([stop_ms], dtype=np.int64))[0]
+        running_ms = (stop_ms - start_ms) * 2 // 3
+        return _csv([
+            _table("machines", [("machine_id", "string"), ("_value", "double"), ("_time", "dateTime:RFC3339")],
+                   [(mid, 1.0, ts) for mid in self.machine_ids]),
+            _table("runtime", [("machine_id", "string"), ("duration", "long")],
+                   [(mid, running_ms) for mid in self.machine_ids]),
+            _table("parts", [("machine_id", "string"), ("_value", "double")],
+                   [(mid, float(running_ms // 5000)) for mid in self.machine_ids]),
+        ])
@@ -0,0 +1,28 @@
+import asyncio
+import pytest
+from app import db
+from app.settings import settings
+from bench.fake_influx import FakeInfluxClient
+
+
+@pytest.fixture
+def influx_slots() -> tuple[int, int]:
+    """(query slots, stream slots) for fake_influx; override to starve one side"""
+    return settings.INFLUX_POOL_SIZE, settings.INFLUX_STREAM_SLOTS
+
+
+@pytest.fixture
+def fake_influx(influx_slots):
+    """bench.fake_influx installed as the shared async Influx client"""
+    query_slots, stream_slots = influx_slots
+
+    async def install():
+        db._async_client = FakeInfluxClient(machines=2)
+        db._query_slots = asyncio.Semaphore(query_slots)
+        db._stream_slots = asyncio.Semaphore(stream_slots)
+
+    db.run_sync(install())
+    yield
+    db._async_client = None
+    db._query_slots = None
+    db._stream_slots = None
@@ -0,0 +1,16 @@
+import asyncio
+import threading
+from app.services import auth
+
+
+def test_async_login_looks_user_up_off_the_event_loop(monkeypatch):
+    lookups = []
+
+    def get_user_by_email(email):
+        lookups.append(threading.current_thread())
+        return None
+
+    monkeypatch.setattr(auth.user_store, "get_user_by_email", get_user_by_email)
+
+    assert asyncio.run(auth.authenticate_user_async("nobody@example.com", "secret")) is None
+    assert lookups and lookups[0] is not threading.main_thread()
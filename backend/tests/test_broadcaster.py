@@ -0,0 +1,56 @@
+import asyncio
+import time
+import pytest
+from app.services.broadcaster import MachineBroadcaster
+from app.services.live_store import live_store
+from app.services.today_timeline import today_timeline
+from app.settings import settings
+
+IDLE, STOPPED = 2, 3
+
+
+@pytest.fixture
+def idle_machine(monkeypatch):
+    async def runtime(machine_id):
+        return 0
+
+    monkeypatch.setattr(today_timeline, "get_runtime_async", runtime)
+    monkeypatch.setattr(settings, "LIVE_IDLE_INTERVAL", 0.5)
+    live_store.update("idle01", "state", {"machine_state": IDLE}, time.time())
+    live_store.mark_ready()
+    yield "idle01"
+    live_store.mark_unready()
+
+
+async def _subscribe(machine_id: str) -> tuple[MachineBroadcaster, asyncio.Queue]:
+    broadcaster = MachineBroadcaster(machine_id)
+    queue = asyncio.Queue()
+    broadcaster.subscribers.add(queue)
+    broadcaster.start()
+    await queue.get()  # first push goes out straight away
+    return broadcaster, queue
+
+
+def test_steady_state_messages_keep_idle_rate(idle_machine):
+    async def scenario():
+        broadcaster, queue = await _subscribe(idle_machine)
+        # The machine reports the same idle state at 10 Hz for 2 s
+        for _ in range(20):
+            live_store.update(idle_machine, "state", {"machine_state": IDLE}, time.time())
+            await asyncio.sleep(0.1)
+        await broadcaster.stop()
+        return queue.qsize()
+
+    assert asyncio.run(scenario()) <= 2 / settings.LIVE_IDLE_INTERVAL + 1
+
+
+def test_state_change_skips_idle_cap(idle_machine):
+    async def scenario():
+        broadcaster, queue = await _subscribe(idle_machine)
+        await asyncio.sleep(0.05)
+        live_store.update(idle_machine, "state", {"machine_state": STOPPED}, time.time())
+        _, payload = await asyncio.wait_for(queue.get(), settings.LIVE_IDLE_INTERVAL / 2)
+        await broadcaster.stop()
+        return payload
+
+    assert asyncio.run(scenario())["current_state"] == STOPPED
@@ -0,0 +1,41 @@
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from app.api import jobs, telemetry
+from app.api.caching import _closed
+from app.services.response_cache import response_cache
+from app.settings import settings
+
+
+@pytest.fixture
+def client(monkeypatch, fake_influx):
+    monkeypatch.setattr(settings, "INFLUX_BUCKET_ROLLUP", None)
+    response_cache.clear()
+    app = FastAPI()
+    app.include_router(telemetry.router)
+    app.include_router(jobs.router)
+    yield TestClient(app)
+    response_cache.clear()
+
+
+def test_naive_stop_is_utc():
+    assert _closed("2026-01-01T00:00:00")
+    assert not _closed("2999-01-01T00:00:00")
+
+
+@pytest.mark.parametrize("path, params", [
+    ("/machines/machine01/telemetry", {"metric": "temperature"}),
+    ("/machines/machine01/jobs", {}),
+])
+def test_naive_range_is_taken_as_utc(client, path, params):
+    naive = client.get(path, params={**params, "from": "2026-01-01T00:00:00", "to": "2026-01-01T01:00:00"})
+    utc = client.get(path, params={**params, "from": "2026-01-01T00:00:00Z", "to": "2026-01-01T01:00:00Z"})
+
+    assert naive.status_code == 200
+    assert naive.json() == utc.json()
+
+
+def test_malformed_stop_is_400(client):
+    response = client.get("/machines/machine01/jobs", params={"from": "2026-01-01T00:00:00Z", "to": "soon"})
+
+    assert response.status_code == 400
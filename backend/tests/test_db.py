@@ -0,0 +1,28 @@
+import asyncio
+import pytest
+from app import db
+from app.services.telemetry import _history_query
+
+# An hour of 1 Hz samples: more than the stream buffer holds, so the
+# producer is still inside the query while the consumer is paused
+EXPORT = _history_query("machine01", "temperature", "2026-01-01T00:00:00Z", "2026-01-01T01:00:00Z", "")
+INTERACTIVE = _history_query("machine01", "temperature", "2026-01-01T00:00:00Z", "2026-01-01T00:01:00Z", "")
+
+
+@pytest.fixture
+def influx_slots():
+    return 1, 1
+
+
+def test_stalled_export_does_not_block_queries(fake_influx):
+    async def scenario():
+        export = db.stream_async(EXPORT, service="test")
+        await export.__anext__()  # a slow client: reads one record, then stalls
+        await asyncio.sleep(0.05)
+        assert db._stream_slots.locked()
+
+        raw = await asyncio.wait_for(db.query_raw_async(INTERACTIVE, service="test"), 2)
+        await export.aclose()
+        return raw
+
+    assert db._csv_rows(asyncio.run(scenario())) > 0
@@ -0,0 +1,58 @@
+import asyncio
+import pytest
+from app import db
+from app.services import job_history
+from app.services.job_history import get_job_history_async, stream_job_history
+from app.services.job_index import CHUNK
+from app.services.pagination import cursor_to_datetime
+from app.settings import settings
+
+# machine01's 40 s jobs start 53 s into each minute, so one spans every midnight
+START, STOP = "2026-01-01T06:00:00Z", "2026-01-03T18:00:00Z"
+
+
+@pytest.fixture
+def raw_events_only(monkeypatch, fake_influx):
+    monkeypatch.setattr(settings, "INFLUX_BUCKET_ROLLUP", None)
+
+
+@pytest.fixture
+def paired_ranges(monkeypatch):
+    """(start, stop) of every raw-event pairing pass"""
+    ranges = []
+    compute_jobs_async = job_history.compute_jobs_async
+
+    async def compute_jobs(start, stop, machine_id=None):
+        ranges.append((start, stop))
+        return await compute_jobs_async(start, stop, machine_id)
+
+    monkeypatch.setattr(job_history, "compute_jobs_async", compute_jobs)
+    return ranges
+
+
+def test_stream_pairs_across_chunks_like_paged_history(raw_events_only, paired_ranges):
+    async def collect():
+        return [row async for row in stream_job_history("machine01", START, STOP)]
+
+    streamed = asyncio.run(collect())
+    assert len(paired_ranges) == 3 and max(stop - start for start, stop in paired_ranges) <= CHUNK
+
+    paged, _ = db.run_sync(get_job_history_async("machine01", START, STOP))
+
+    assert streamed == paged
+    assert len(streamed) == 60 * 60 + 1  # plus the job already running at START
+    assert [row["start"] for row in streamed] == sorted(row["start"] for row in streamed)
+    assert [row["end"] is None for row in streamed].index(True) == len(streamed) - 1  # running at STOP
+
+
+def test_pages_pair_only_what_they_return(raw_events_only, paired_ranges):
+    year_start, year_stop = "2026-01-01T00:00:00Z", "2027-01-01T00:00:00Z"
+    first, cursor = db.run_sync(get_job_history_async("machine01", year_start, year_stop, limit=10))
+    assert len(paired_ranges) == 1
+
+    second, _ = db.run_sync(get_job_history_async("machine01", year_start, year_stop, limit=10, cursor=cursor))
+    assert len(paired_ranges) == 2
+    assert paired_ranges[1][0] == cursor_to_datetime(cursor)
+
+    both, _ = db.run_sync(get_job_history_async("machine01", year_start, year_stop, limit=20))
+    assert first + second == both
@@ -0,0 +1,40 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+import pytest
+from app.services import job_index
+from app.services.job_index import JobIndex
+from app.settings import settings
+
+T0 = datetime(2026, 1, 1, 12, tzinfo=timezone.utc)
+
+
+@pytest.fixture
+def paired_ranges(monkeypatch):
+    ranges = []
+
+    async def compute_jobs(start, stop, machine_id=None):
+        ranges.append((start, stop))
+        return []
+
+    async def write(bucket, records, timeout=None, service="other"):
+        pass
+
+    async def last_indexed_start():
+        return None
+
+    monkeypatch.setattr(settings, "RESPONSE_CACHE_INGEST_DELAY", 120)
+    monkeypatch.setattr(job_index, "compute_jobs_async", compute_jobs)
+    monkeypatch.setattr(job_index, "write_async", write)
+    monkeypatch.setattr(job_index, "_last_indexed_start", last_indexed_start)
+    return ranges
+
+
+def test_watermark_leaves_room_for_late_events(paired_ranges):
+    index = JobIndex()
+    asyncio.run(index.index_range(T0 - timedelta(hours=1), T0))
+    assert index.indexed_until == T0 - timedelta(seconds=120)
+
+    # The next pass starts after the lagged window; it is re-indexed anyway
+    asyncio.run(index.index_range(T0, T0 + timedelta(minutes=5)))
+    assert paired_ranges[-1][0] == T0 - timedelta(seconds=120)
+    assert index.indexed_until == T0 + timedelta(minutes=5) - timedelta(seconds=120)
@@ -0,0 +1,45 @@
+import numpy as np
+import pytest
+from app.services.columnar import lttb_indices
+
+
+def _reference_lttb(x: list[float], y: list[float], threshold: int) -> list[int]:
+    """Textbook scalar LTTB over small float x"""
+    n = len(x)
+    if threshold >= n or threshold < 3:
+        return list(range(n))
+    bucket_size = (n - 2) / (threshold - 2)
+    keep, a = [0], 0
+    for i in range(threshold - 2):
+        next_start = int((i + 1) * bucket_size) + 1
+        next_end = min(int((i + 2) * bucket_size) + 1, n)
+        avg_x = sum(x[next_start:next_end]) / (next_end - next_start)
+        avg_y = sum(y[next_start:next_end]) / (next_end - next_start)
+        best, best_area = None, -1.0
+        for j in range(int(i * bucket_size) + 1, int((i + 1) * bucket_size) + 1):
+            area = abs((x[a] - avg_x) * (y[j] - y[a]) - (x[a] - x[j]) * (avg_y - y[a]))
+            if area > best_area:
+                best, best_area = j, area
+        keep.append(best)
+        a = best
+    keep.append(n - 1)
+    return keep
+
+
+@pytest.mark.parametrize("n,threshold", [(24, 5), (100, 10), (1000, 37), (5, 3)])
+def test_matches_reference_on_epoch_nanoseconds(n, threshold):
+    rng = np.random.default_rng(n)
+    start_ns = 1_767_225_600_000_000_000  # 2026-01-01: bucket sums of these overflow int64
+    ts_ns = start_ns + np.arange(n, dtype=np.int64) * 1_000_000_000
+    values = rng.normal(size=n)
+
+    seconds = ((ts_ns - ts_ns[0]) / 1e9).tolist()
+    expected = _reference_lttb(seconds, values.tolist(), threshold)
+
+    with np.errstate(over="raise"):
+        assert lttb_indices(ts_ns, values, threshold).tolist() == expected
+
+
+def test_returns_everything_when_under_threshold():
+    ts_ns = np.arange(4, dtype=np.int64)
+    assert lttb_indices(ts_ns, np.ones(4), 10).tolist() == [0, 1, 2, 3]
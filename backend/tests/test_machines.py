@@ -0,0 +1,21 @@
+import time
+from datetime import datetime
+from app import db
+from app.services.live_store import live_store
+from app.services.machines import get_machines_async
+
+
+def test_last_seen_format_matches_on_both_paths(fake_influx):
+    from_influx = db.run_sync(get_machines_async())
+
+    live_store.update("machine01", "state", {"machine_state": 1}, time.time())
+    live_store.mark_ready()
+    try:
+        from_store = db.run_sync(get_machines_async())
+    finally:
+        live_store.mark_unready()
+
+    for machines in (from_influx, from_store):
+        last_seen = machines[0]["last_seen"]
+        assert last_seen.endswith("Z") and "+" not in last_seen
+        assert datetime.fromisoformat(last_seen.replace("Z", "+00:00")).tzinfo is not None
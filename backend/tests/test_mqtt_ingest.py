@@ -0,0 +1,37 @@
+import time
+import pytest
+from app.services.live_store import LatestValueStore
+from app.services.mqtt_ingest import MqttIngest
+
+
+@pytest.fixture
+def ingest():
+    store = LatestValueStore()
+    store.mark_ready()
+    return MqttIngest(store=store)
+
+
+@pytest.mark.parametrize("topic,payload", [
+    ("cnc/m1/telemetry", b"[1,2]"),
+    ("cnc/m1/telemetry", b"5"),
+    ("cnc/m1/telemetry", b'{"timestamp":"x"}'),
+    ("cnc/m1/telemetry", b'{"timestamp":true,"spindle_speed":1}'),
+    ("cnc/m1/telemetry", b"not json"),
+    ("cnc/m1/telemetry/json", b"5"),
+    ("cnc/m1/telemetry/json", b'[5, null, "x"]'),
+    ("cnc/m1/telemetry/json", b'{"timestamp":1}'),
+    ("cnc/m1/telemetry/msgpack", b"\xc1\xc1"),
+    ("cnc/m1/state", b'{"timestamp":[1]}'),
+])
+def test_malformed_payloads_are_skipped(ingest, topic, payload):
+    ingest.handle_message(topic, payload)  # must not raise
+    assert ingest.store.ready
+
+
+def test_valid_samples_survive_bad_neighbours(ingest):
+    now_ms = int(time.time() * 1000)
+    ingest.handle_message(
+        "cnc/m1/telemetry/json",
+        f'[5, {{"timestamp": "x"}}, {{"timestamp": {now_ms}, "spindle_speed": 1200, "mode": "auto"}}]'.encode()
+    )
+    assert ingest.store.snapshot("m1")["telemetry"] == {"spindle_speed": 1200, "mode": "auto"}
@@ -0,0 +1,71 @@
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from influxdb_client.client.flux_table import FluxRecord, FluxTable
+from app.api import reports as reports_api
+from app.services import reports
+from app.services.rollups import DAILY, HOURLY
+from app.settings import settings
+
+
+def _table(*rows) -> FluxTable:
+    table = FluxTable()
+    for time, measurement, field, value in rows:
+        table.records.append(FluxRecord(0, {
+            "_time": time, "_measurement": measurement, "_field": field, "_value": value, "machine_id": "m1"
+        }))
+    return table
+
+
+@pytest.fixture
+def rollups(monkeypatch):
+    monkeypatch.setattr(settings, "INFLUX_BUCKET_ROLLUP", "rollups")
+    queries = []
+
+    async def fake_query(query, service="other"):
+        queries.append(query)
+        # One full day at 20°C, then one edge hour at 80°C
+        return [_table(
+            ("2026-01-01T00:00:00Z", DAILY, "temperature_mean", 20.0),
+            ("2026-01-02T00:00:00Z", HOURLY, "temperature_mean", 80.0),
+        )]
+
+    monkeypatch.setattr(reports, "query_async", fake_query)
+    return queries
+
+
+@pytest.fixture
+def client():
+    app = FastAPI()
+    app.include_router(reports_api.router)
+    return TestClient(app)
+
+
+def test_temperature_mean_weighted_by_hours_covered(rollups, client):
+    response = client.get("/reports/range", params={"from": "2026-01-01T00:00:00Z", "to": "2026-01-02T01:00:00Z"})
+
+    assert response.status_code == 200
+    assert response.json()[0]["temperature_mean"] == pytest.approx((20.0 * 24 + 80.0) / 25)
+
+
+@pytest.mark.parametrize("start, stop", [
+    ("yesterday", "2026-01-02T00:00:00Z"),
+    ("2026-01-01T00:00:00Z", "2026-13-01T00:00:00Z"),
+    ("2026-01-02T00:00:00Z", "2026-01-01T00:00:00Z"),
+])
+def test_malformed_range_is_400(rollups, client, start, stop):
+    response = client.get("/reports/range", params={"from": start, "to": stop})
+
+    assert response.status_code == 400
+    assert not rollups
+
+
+@pytest.mark.parametrize("path", ["/reports/range?from=2026-01-01T00:00:00Z&to=2026-01-02T00:00:00Z",
+                                  "/reports/weekly", "/reports/monthly"])
+def test_range_reports_need_rollup_bucket(monkeypatch, client, path):
+    monkeypatch.setattr(settings, "INFLUX_BUCKET_ROLLUP", None)
+
+    response = client.get(path)
+
+    assert response.status_code == 503
+    assert "INFLUX_BUCKET_ROLLUP" in response.json()["detail"]
@@ -0,0 +1,38 @@
+import asyncio
+from datetime import datetime, timezone
+from app.services import reports
+from app.services.rollups import _hourly_query, state_durations
+from app.settings import settings
+
+START = datetime(2026, 1, 1, tzinfo=timezone.utc)
+STOP = datetime(2026, 1, 1, 2, tzinfo=timezone.utc)
+
+
+def _states_pipeline(query: str) -> str:
+    return query[query.index("states = data"):query.index("parts = data")]
+
+
+def test_offline_machine_last_point_is_capped(monkeypatch):
+    # A machine that went offline at 00:10 must not be credited until the
+    # query stop: every state duration is capped before it is summed
+    monkeypatch.setattr(settings, "STATE_MAX_GAP", 5)
+    states = _states_pipeline(_hourly_query(START, STOP))
+
+    assert state_durations() in states
+    assert "if r.duration > 5000 then 5000 else r.duration" in states
+    assert states.index(state_durations()) < states.index("hourly(fn: sum)")
+
+
+def test_daily_report_runtime_is_capped(monkeypatch):
+    # Time since a machine's last state point isn't runtime
+    captured = []
+
+    async def fake_query(query, service="other"):
+        captured.append(query)
+        return []
+
+    monkeypatch.setattr(reports, "query_async", fake_query)
+    asyncio.run(reports._compute_daily_report())
+    runtime = captured[0][captured[0].index('r._field == "machine_state"'):captured[0].index('yield(name: "runtime")')]
+
+    assert runtime.index(state_durations()) < runtime.index('sum(column: "duration")')
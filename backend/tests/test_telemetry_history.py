@@ -0,0 +1,23 @@
+import pytest
+from app.services.downsample import parse_time
+from app.services.telemetry import get_telemetry_history
+
+START, STOP = "2026-01-01T00:00:00Z", "2026-01-02T00:00:00Z"
+
+
+@pytest.mark.parametrize("limit, max_points", [(None, 5000), (3000, 2000)])
+def test_lttb_spans_the_whole_range(fake_influx, limit, max_points):
+    # The limit applies to the LTTB output, never to the candidate windows
+    rows, next_cursor = get_telemetry_history(
+        "machine01", "temperature", START, STOP, max_points=max_points, agg="lttb", limit=limit
+    )
+
+    assert next_cursor is None
+    assert len(rows) == max_points
+    assert parse_time(rows[0]["ts"]) == parse_time(START)
+    assert (parse_time(STOP) - parse_time(rows[-1]["ts"])).total_seconds() < 60
+
+
+def test_lttb_rejects_limit_below_max_points(fake_influx):
+    with pytest.raises(ValueError):
+        get_telemetry_history("machine01", "temperature", START, STOP, max_points=2000, agg="lttb", limit=1000)
@@ -0,0 +1,168 @@
+"""Offline historical data generator for benchmarking.
+
+Runs the CNCMachine model in simulated time, as fast as the CPU allows, and
+writes InfluxDB line protocol (one file per machine) shaped like what
+Telegraf stores from the live MQTT topics. Each machine gets its own
+random.Random seeded from --seed and its id, so the same seed always yields
+byte-identical files regardless of --workers.
+
+    python backfill.py --machines 20 --days 30 --seed 42 --out data/
+    python backfill.py --config fleet.example.json --start 2026-01-01 --days 90 --gzip
+    influx write --bucket cnc_realtime --file data/machine01.lp
+
+Volume is dominated by spindle_speed (100 Hz by default, ~8.6M points per
+machine-day); lower it in the config's "rates" for long ranges.
+"""
+import argparse
+import gzip
+import heapq
+import multiprocessing
+import os
+import random
+from datetime import datetime, timedelta, timezone
+
+from cnc_simulator import CNCMachine
+from fleet_simulator import DEFAULT_PROFILE, DEFAULT_RATES, STREAMS, load_config
+
+WRITE_BATCH = 10_000  # lines buffered before each file write
+
+MEASUREMENTS = {
+    "state": "cnc_state",
+    "spindle_speed": "cnc_telemetry",
+    "temperature": "cnc_telemetry",
+    "running_time": "cnc_telemetry",
+    "business": "cnc_business",
+    "job": "cnc_job",
+}
+
+
+def _escape_tag(value):
+    return value.replace("\\", "\\\\").replace(",", "\\,").replace("=", "\\=").replace(" ", "\\ ")
+
+
+def _line(measurement, tags, payload, ts_ms):
+    # Numeric fields without a suffix are floats, as Telegraf's JSON parser writes them
+    fields = ",".join(f"{k}={v}" for k, v in payload.items() if k != "timestamp")
+    return f"{measurement}{tags} {fields} {ts_ms * 1_000_000}\n"
+
+
+def generate_machine(spec, start_ms, stop_ms, seed, out_dir, compress=False):
+    """Write [start_ms, stop_ms) for one machine; returns (path, line count)."""
+    rng = random.Random(f"{seed}:{spec['id']}")
+    machine = CNCMachine(spec["id"], None, job_run=spec["job_run"],
+                         job_idle=spec["job_idle"], jobs=spec["jobs"], rng=rng)
+    tags = f",machine_id={_escape_tag(spec['id'])}"
+
+    # Event queue of (time_ms, order, tick); order breaks ties deterministically.
+    # Periodic streams compute each deadline from the tick count, so they don't drift.
+    streams = []
+    queue = []
+    for stream, hz in spec["rates"].items():
+        if hz <= 0:
+            continue
+        period = 1000 / hz
+        phase = rng.random() * period
+        streams.append((getattr(machine, STREAMS[stream][0]), MEASUREMENTS[stream], phase, period))
+        queue.append((start_ms + int(phase), len(streams) - 1, 0))
+
+    job_order = len(streams)
+    queue.append((start_ms + rng.randint(0, 1000 * machine.job_idle_seconds()), job_order, 0))
+    heapq.heapify(queue)
+
+    path = os.path.join(out_dir, f"{spec['id']}.lp" + (".gz" if compress else ""))
+    opener = gzip.open if compress else open
+    lines = 0
+    batch = []
+
+    with opener(path, "wt") as f:
+        while queue:
+            ts, order, tick = heapq.heappop(queue)
+            if ts >= stop_ms:
+                continue
+
+            if order == job_order:
+                # Even ticks start a job, odd ticks end it
+                if tick % 2 == 0:
+                    payload = machine.start_job(ts)
+                    delay = machine.job_run_seconds()
+                else:
+                    payload = machine.end_job(ts)
+                    delay = machine.job_idle_seconds()
+                batch.append(_line(MEASUREMENTS["job"], tags, payload, ts))
+                heapq.heappush(queue, (ts + delay * 1000, order, tick + 1))
+            else:
+                sample, measurement, phase, period = streams[order]
+                batch.append(_line(measurement, tags, sample(ts), ts))
+                tick += 1
+                heapq.heappush(queue, (start_ms + int(phase + tick * period), order, tick))
+
+            if len(batch) >= WRITE_BATCH:
+                f.write("".join(batch))
+                lines += len(batch)
+                batch.clear()
+
+        f.write("".join(batch))
+        lines += len(batch)
+
+    return path, lines
+
+
+def _generate(task):
+    return generate_machine(*task)
+
+
+def default_specs(count):
+    width = len(str(count))
+    return [
+        {
+            "id": f"machine{i:0{width}d}",
+            "rates": dict(DEFAULT_RATES),
+            "job_run": tuple(DEFAULT_PROFILE["run"]),
+            "job_idle": tuple(DEFAULT_PROFILE["idle"]),
+            "jobs": list(DEFAULT_PROFILE["jobs"]),
+        }
+        for i in range(1, count + 1)
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument("--config", help="fleet config JSON (same format as fleet_simulator.py)")
+    source.add_argument("--machines", type=int, help="number of machines with default rates")
+    parser.add_argument("--start", help="UTC start date/time, ISO format (default: --days before today)")
+    parser.add_argument("--days", type=float, default=7)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--out", default="backfill", help="output directory")
+    parser.add_argument("--gzip", action="store_true", help="write .lp.gz files")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    args = parser.parse_args()
+
+    specs = load_config(args.config) if args.config else default_specs(args.machines)
+
+    if args.start:
+        start = datetime.fromisoformat(args.start.replace("Z", "+00:00"))
+        if start.tzinfo is None:
+            start = start.replace(tzinfo=timezone.utc)
+    else:
+        today = datetime.now(timezone.utc).replace(hour=0, minute=0, second=0, microsecond=0)
+        start = today - timedelta(days=args.days)
+    stop = start + timedelta(days=args.days)
+    start_ms = int(start.timestamp() * 1000)
+    stop_ms = int(stop.timestamp() * 1000)
+
+    os.makedirs(args.out, exist_ok=True)
+    print(f"Backfilling {len(specs)} machines from {start.isoformat()} to {stop.isoformat()} (seed {args.seed})")
+
+    tasks = [(spec, start_ms, stop_ms, args.seed, args.out, args.gzip) for spec in specs]
+    total = 0
+    with multiprocessing.Pool(max(1, min(args.workers, len(tasks)))) as pool:
+        for path, lines in pool.imap_unordered(_generate, tasks):
+            total += lines
+            print(f"  {path}: {lines:,} lines")
+
+    print(f"Done: {total:,} lines")
+
+
+if __name__ == "__main__":
+    main()
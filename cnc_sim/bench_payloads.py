@@ -0,0 +1,72 @@
+"""Compare single-sample and batched telemetry publishing, without a broker.
+
+Drives one machine's spindle_speed (100 Hz) and temperature (10 Hz) streams
+through CNCMachine.publish_telemetry with a recording client and reports,
+per machine, MQTT messages/s and bytes/s at the nominal sample rates plus
+the CPU cost of producing them.
+
+    python bench_payloads.py --batch 10 50 100
+"""
+import argparse
+import time
+
+from cnc_simulator import CNCMachine
+from payloads import msgpack
+
+SIM_SECONDS = 60
+STREAMS = [("sample_spindle_speed", 100), ("sample_temperature", 10)]
+MQTT_OVERHEAD = 4  # fixed header + topic length prefix of a QoS 0 PUBLISH
+
+
+class RecordingClient:
+    def __init__(self):
+        self.messages = 0
+        self.bytes = 0
+
+    def publish(self, topic, payload):
+        size = len(payload.encode() if isinstance(payload, str) else payload)
+        self.messages += 1
+        self.bytes += size + len(topic) + MQTT_OVERHEAD
+
+
+def run(batch_size, fmt):
+    client = RecordingClient()
+    machine = CNCMachine("machine1", client, batch_size=batch_size, payload_format=fmt)
+    machine.start_job(0)
+
+    started = time.perf_counter()
+    for method, hz in STREAMS:
+        sample = getattr(machine, method)
+        buffer = []
+        for i in range(SIM_SECONDS * hz):
+            machine.publish_telemetry(sample(1_700_000_000_000 + i * 1000 // hz), buffer)
+    elapsed = time.perf_counter() - started
+
+    samples = sum(hz for _, hz in STREAMS) * SIM_SECONDS
+    return {
+        "msgs_per_sec": client.messages / SIM_SECONDS,
+        "bytes_per_sec": client.bytes / SIM_SECONDS,
+        "bytes_per_sample": client.bytes / samples,
+        "cpu_us_per_sample": elapsed / samples * 1e6,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--batch", type=int, nargs="+", default=[10, 50, 100])
+    args = parser.parse_args()
+
+    modes = [("single", 1, "json")]
+    formats = ["json"] + (["msgpack"] if msgpack is not None else [])
+    modes += [(f"{fmt} x{n}", n, fmt) for n in args.batch for fmt in formats]
+
+    print(f"Per machine, {sum(hz for _, hz in STREAMS)} telemetry samples/s:")
+    print(f"{'mode':<14} {'msgs/s':>8} {'bytes/s':>10} {'B/sample':>9} {'cpu us/sample':>14}")
+    for name, batch_size, fmt in modes:
+        r = run(batch_size, fmt)
+        print(f"{name:<14} {r['msgs_per_sec']:>8.1f} {r['bytes_per_sec']:>10.0f} "
+              f"{r['bytes_per_sample']:>9.1f} {r['cpu_us_per_sample']:>14.2f}")
+
+
+if __name__ == "__main__":
+    main()
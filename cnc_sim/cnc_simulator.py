@@ -2,8 +2,11 @@ import json
 import time
 import random
 import threading
+import argparse
 import paho.mqtt.client as mqtt
 
+from payloads import FORMATS, batch_topic, encode_samples
+
 BROKER = "localhost"
 PORT = 1883
 
@@ -16,13 +19,24 @@ STATE_MAP = {
 
 JOBS = [101, 102, 103]
 
+
+def _now_ms():
+    return int(time.time() * 1000)
+
 # ---------------- CNC CLASS ----------------
 class CNCMachine:
-    def __init__(self, machine_id, client, job_run=(20, 40), job_idle=(5, 10)):
+    def __init__(self, machine_id, client, job_run=(20, 40), job_idle=(5, 10), jobs=JOBS, rng=None,
+                 batch_size=1, payload_format="json"):
         self.machine_id = machine_id
         self.client = client
         self.job_run = job_run
         self.job_idle = job_idle
+        self.jobs = jobs
+        # Pass a seeded random.Random for reproducible runs (see backfill.py)
+        self.rng = rng or random
+        # batch_size > 1 groups telemetry samples into one message (see payloads.py)
+        self.batch_size = batch_size
+        self.payload_format = payload_format
 
         self.status = "IDLE"
         self.running_time = 0
@@ -36,109 +50,150 @@ class CNCMachine:
         self.TOPIC_STATE = f"cnc/{machine_id}/state"
         self.TOPIC_BUSINESS = f"cnc/{machine_id}/business"
         self.TOPIC_JOB = f"cnc/{machine_id}/job"
+        self.TOPIC_TELEMETRY_BATCH = batch_topic(machine_id, payload_format)
+
+    # ---------------- SAMPLES ----------------
+    # Each sample_* method advances the model by one tick of its stream and
+    # returns the payload. The thread loops below, the fleet scheduler
+    # (fleet_simulator.py) and offline generators all drive these.
+
+    def sample_state(self, now_ms=None):
+        with self.lock:
+            return {
+                "machine_state": STATE_MAP[self.status],
+                "timestamp": now_ms or _now_ms()
+            }
+
+    def sample_spindle_speed(self, now_ms=None):
+        with self.lock:
+            speed = self.rng.randint(1000, 6000) if self.status == "RUNNING" else 0
+            return {
+                "spindle_speed": speed,
+                "timestamp": now_ms or _now_ms()
+            }
+
+    def sample_temperature(self, now_ms=None):
+        with self.lock:
+            if self.status == "RUNNING":
+                self.temperature += self.rng.uniform(0.0, 0.3)
+            else:
+                self.temperature -= self.rng.uniform(0.0, 0.2)
+
+            self.temperature = max(30.0, min(self.temperature, 75.0))
+            return {
+                "temperature": round(self.temperature, 2),
+                "timestamp": now_ms or _now_ms()
+            }
+
+    def sample_running_time(self, now_ms=None):
+        with self.lock:
+            if self.status == "RUNNING":
+                self.running_time += 1
+
+            return {
+                "running_time": self.running_time,
+                "timestamp": now_ms or _now_ms()
+            }
+
+    def sample_business(self, now_ms=None):
+        with self.lock:
+            if self.status == "RUNNING" and self.running_time % 5 == 0:
+                self.part_count += 1
+
+            return {
+                "part_count": self.part_count,
+                "timestamp": now_ms or _now_ms()
+            }
+
+    def start_job(self, now_ms=None):
+        job_id = self.rng.choice(self.jobs)
+        with self.lock:
+            self.current_job = job_id
+            self.status = "RUNNING"
+        return {
+            "job_id": job_id,
+            "event": 1,  # 1 = start, 0 = end
+            "timestamp": now_ms or _now_ms()
+        }
+
+    def end_job(self, now_ms=None):
+        with self.lock:
+            job_id = self.current_job
+            self.current_job = None
+            self.status = "IDLE"
+        return {
+            "job_id": job_id,
+            "event": 0,
+            "timestamp": now_ms or _now_ms()
+        }
+
+    def job_run_seconds(self):
+        return self.rng.randint(*self.job_run)
+
+    def job_idle_seconds(self):
+        return self.rng.randint(*self.job_idle)
+
+    def publish_telemetry(self, payload, buffer):
+        """Publish one telemetry sample, or buffer it until a batch is full"""
+        if self.batch_size <= 1:
+            self.client.publish(self.TOPIC_TELEMETRY, json.dumps(payload))
+            return
+
+        buffer.append(payload)
+        if len(buffer) >= self.batch_size:
+            message = encode_samples(buffer, self.payload_format)
+            self.client.publish(self.TOPIC_TELEMETRY_BATCH, message)
+            buffer.clear()
 
     # -------- STATE (1 Hz) --------
     def publish_state(self):
         while True:
-            with self.lock:
-                payload = {
-                    "machine_state": STATE_MAP[self.status],
-                    "timestamp": int(time.time() * 1000)
-                }
-            self.client.publish(self.TOPIC_STATE, json.dumps(payload))
+            self.client.publish(self.TOPIC_STATE, json.dumps(self.sample_state()))
             time.sleep(1)
 
     # -------- TELEMETRY: SPEED (100 Hz) --------
     def publish_spindle_speed(self):
+        buffer = []
         while True:
-            with self.lock:
-                speed = random.randint(1000, 6000) if self.status == "RUNNING" else 0
-                payload = {
-                    "spindle_speed": speed,
-                    "timestamp": int(time.time() * 1000)
-                }
-            self.client.publish(self.TOPIC_TELEMETRY, json.dumps(payload))
+            self.publish_telemetry(self.sample_spindle_speed(), buffer)
             time.sleep(0.01)
 
     # -------- TELEMETRY: TEMP (10 Hz) --------
     def publish_temperature(self):
+        buffer = []
         while True:
-            with self.lock:
-                if self.status == "RUNNING":
-                    self.temperature += random.uniform(0.0, 0.3)
-                else:
-                    self.temperature -= random.uniform(0.0, 0.2)
-
-                self.temperature = max(30.0, min(self.temperature, 75.0))
-                payload = {
-                    "temperature": round(self.temperature, 2),
-                    "timestamp": int(time.time() * 1000)
-                }
-            self.client.publish(self.TOPIC_TELEMETRY, json.dumps(payload))
+            self.publish_telemetry(self.sample_temperature(), buffer)
             time.sleep(0.1)
 
     # -------- TELEMETRY: RUNTIME (1 Hz) --------
     def publish_running_time(self):
         while True:
-            with self.lock:
-                if self.status == "RUNNING":
-                    self.running_time += 1
-
-                payload = {
-                    "running_time": self.running_time,
-                    "timestamp": int(time.time() * 1000)
-                }
-            self.client.publish(self.TOPIC_TELEMETRY, json.dumps(payload))
+            self.client.publish(self.TOPIC_TELEMETRY, json.dumps(self.sample_running_time()))
             time.sleep(1)
 
     # -------- BUSINESS (1 Hz) --------
     def publish_business(self):
         while True:
-            with self.lock:
-                if self.status == "RUNNING" and self.running_time % 5 == 0:
-                    self.part_count += 1
-
-                payload = {
-                    "part_count": self.part_count,
-                    "timestamp": int(time.time() * 1000)
-                }
-            self.client.publish(self.TOPIC_BUSINESS, json.dumps(payload))
+            self.client.publish(self.TOPIC_BUSINESS, json.dumps(self.sample_business()))
             time.sleep(1)
 
-    # -------- JOB EVENTS --------
-    def publish_job_event(self, job_id, event):
-        payload = {
-            "job_id": job_id,
-            "event": event,  # 1 = start, 0 = end
-            "timestamp": int(time.time() * 1000)
-        }
-        self.client.publish(self.TOPIC_JOB, json.dumps(payload))
-
     # -------- JOB SIMULATOR --------
     def simulate_jobs(self):
         while True:
-            job_id = random.choice(JOBS)
-
             # Job start
-            with self.lock:
-                self.current_job = job_id
-                self.status = "RUNNING"
-
-            self.publish_job_event(job_id, 1)
-            print(f"[{self.machine_id}] Job {job_id} STARTED")
+            payload = self.start_job()
+            self.client.publish(self.TOPIC_JOB, json.dumps(payload))
+            print(f"[{self.machine_id}] Job {payload['job_id']} STARTED")
 
             # Job execution time
-            time.sleep(random.randint(*self.job_run))
+            time.sleep(self.job_run_seconds())
 
             # Job end
-            with self.lock:
-                self.current_job = None
-                self.status = "IDLE"
+            payload = self.end_job()
+            self.client.publish(self.TOPIC_JOB, json.dumps(payload))
+            print(f"[{self.machine_id}] Job {payload['job_id']} ENDED")
 
-            self.publish_job_event(job_id, 0)
-            print(f"[{self.machine_id}] Job {job_id} ENDED")
-
-            time.sleep(random.randint(*self.job_idle))
+            time.sleep(self.job_idle_seconds())
 
     # -------- START ALL THREADS --------
     def start(self):
@@ -157,18 +212,25 @@ class CNCMachine:
 
 
 # ---------------- MAIN ----------------
-client = mqtt.Client()
-client.connect(BROKER, PORT, 60)
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Multi-CNC MQTT simulator")
+    parser.add_argument("--batch", type=int, default=1, help="telemetry samples per MQTT message")
+    parser.add_argument("--format", choices=FORMATS, default="json", help="encoding for batched messages")
+    args = parser.parse_args()
+
+    client = mqtt.Client()
+    client.connect(BROKER, PORT, 60)
 
-print("Multi-CNC Simulator with Job Events Started")
+    print("Multi-CNC Simulator with Job Events Started")
 
-machines = [
-    CNCMachine("machine1", client, job_run=(30, 50), job_idle=(5, 10)),
-    CNCMachine("machine2", client, job_run=(15, 25), job_idle=(10, 20)),
-]
+    batching = dict(batch_size=args.batch, payload_format=args.format)
+    machines = [
+        CNCMachine("machine1", client, job_run=(30, 50), job_idle=(5, 10), **batching),
+        CNCMachine("machine2", client, job_run=(15, 25), job_idle=(10, 20), **batching),
+    ]
 
-for machine in machines:
-    machine.start()
+    for machine in machines:
+        machine.start()
 
-while True:
-    time.sleep(1)
+    while True:
+        time.sleep(1)
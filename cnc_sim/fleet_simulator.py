@@ -0,0 +1,271 @@
+"""Fleet-scale CNC simulator for load testing.
+
+One asyncio scheduler per worker process drives every machine from a hashed
+timer wheel. Deadlines are absolute tick numbers, so a 100 Hz stream stays at
+100 Hz on average no matter how long individual callbacks take (late ticks are
+caught up, not skipped). Machines are sharded across worker processes and the
+parent prints the publish rate actually achieved per stream. Each machine has
+its own random.Random (seeded from --seed and its id when given), so machines
+in forked workers don't share, and correlate through, one random state.
+
+    python fleet_simulator.py --config fleet.example.json --workers 4
+    python fleet_simulator.py --config fleet.example.json --dry-run   # no broker
+"""
+import argparse
+import asyncio
+import json
+import multiprocessing
+import random
+import time
+from collections import Counter
+import paho.mqtt.client as mqtt
+
+from cnc_simulator import BROKER, PORT, CNCMachine, JOBS
+
+TICK = 0.005  # seconds per timer-wheel slot; every default period is a multiple of it
+WHEEL_SLOTS = 4096
+
+DEFAULT_RATES = {
+    "state": 1,
+    "spindle_speed": 100,
+    "temperature": 10,
+    "running_time": 1,
+    "business": 1,
+}
+
+DEFAULT_PROFILE = {"run": [20, 40], "idle": [5, 10], "jobs": JOBS}
+
+# stream -> (CNCMachine sample method, topic attribute)
+STREAMS = {
+    "state": ("sample_state", "TOPIC_STATE"),
+    "spindle_speed": ("sample_spindle_speed", "TOPIC_TELEMETRY"),
+    "temperature": ("sample_temperature", "TOPIC_TELEMETRY"),
+    "running_time": ("sample_running_time", "TOPIC_TELEMETRY"),
+    "business": ("sample_business", "TOPIC_BUSINESS"),
+}
+
+
+# ---------------- CONFIG ----------------
+def load_config(path):
+    """Expand a fleet config into one spec per machine.
+
+    {
+      "rates": {"spindle_speed": 100, ...},          # Hz, defaults per stream
+      "job_profiles": {"short": {"run": [15, 25], "idle": [10, 20]}},
+      "machines": [{"id": "machine1", "profile": "short", "rates": {...}}],
+      "generate": [{"prefix": "sim", "count": 500, "profile": "short"}]
+    }
+    """
+    with open(path) as f:
+        config = json.load(f)
+
+    base_rates = {**DEFAULT_RATES, **config.get("rates", {})}
+    profiles = {"default": DEFAULT_PROFILE, **config.get("job_profiles", {})}
+
+    def spec(machine_id, entry):
+        profile = {**DEFAULT_PROFILE, **profiles[entry.get("profile", "default")]}
+        return {
+            "id": machine_id,
+            "rates": {**base_rates, **entry.get("rates", {})},
+            "job_run": tuple(profile["run"]),
+            "job_idle": tuple(profile["idle"]),
+            "jobs": list(profile["jobs"]),
+        }
+
+    specs = [spec(m["id"], m) for m in config.get("machines", [])]
+    for group in config.get("generate", []):
+        width = len(str(group["count"]))
+        for i in range(1, group["count"] + 1):
+            specs.append(spec(f"{group.get('prefix', 'sim')}{i:0{width}d}", group))
+    return specs
+
+
+# ---------------- SCHEDULER ----------------
+class TimerWheel:
+    """Hashed timer wheel keyed by absolute tick number."""
+
+    def __init__(self, slots=WHEEL_SLOTS):
+        self.slots = [[] for _ in range(slots)]
+        self.current = 0
+
+    def schedule(self, at_tick, callback):
+        self.slots[at_tick % len(self.slots)].append((at_tick, callback))
+
+    def advance(self, to_tick):
+        """Fire everything due up to and including to_tick."""
+        while self.current < to_tick:
+            self.current += 1
+            index = self.current % len(self.slots)
+            slot = self.slots[index]
+            if not slot:
+                continue
+
+            # Callbacks may reschedule into this slot for a later revolution
+            self.slots[index] = []
+            for at_tick, callback in slot:
+                if at_tick <= self.current:
+                    callback(at_tick)
+                else:
+                    self.slots[index].append((at_tick, callback))
+
+
+class FleetScheduler:
+    def __init__(self, tick=TICK):
+        self.tick = tick
+        self.wheel = TimerWheel()
+        self.epoch_ms = time.time() * 1000
+
+    def timestamp_ms(self, at_tick):
+        # Nominal time of the deadline, so samples sit on an exact grid
+        return int(self.epoch_ms + at_tick * self.tick * 1000)
+
+    def every(self, period, phase, fn):
+        period_ticks = max(1, round(period / self.tick))
+
+        def fire(at_tick):
+            fn(self.timestamp_ms(at_tick))
+            self.wheel.schedule(at_tick + period_ticks, fire)
+
+        self.wheel.schedule(self.wheel.current + 1 + phase % period_ticks, fire)
+
+    def after(self, delay, fn):
+        at_tick = self.wheel.current + max(1, round(delay / self.tick))
+        self.wheel.schedule(at_tick, lambda t: fn(self.timestamp_ms(t)))
+
+    async def run(self):
+        loop = asyncio.get_running_loop()
+        t0 = loop.time()
+        self.epoch_ms = time.time() * 1000
+        while True:
+            due = int((loop.time() - t0) / self.tick)
+            self.wheel.advance(due)
+            await asyncio.sleep(max(0.0, t0 + (due + 1) * self.tick - loop.time()))
+
+
+def attach_machine(machine, rates, index, scheduler, publish, counts):
+    for stream, hz in rates.items():
+        if hz <= 0:
+            continue
+        method = getattr(machine, STREAMS[stream][0])
+        topic = getattr(machine, STREAMS[stream][1])
+
+        def emit(ts, method=method, topic=topic, stream=stream):
+            publish(topic, json.dumps(method(ts)))
+            counts[stream] += 1
+
+        # Stagger machines across the period so ticks carry even load
+        scheduler.every(1 / hz, index, emit)
+
+    def start_job(ts):
+        publish(machine.TOPIC_JOB, json.dumps(machine.start_job(ts)))
+        counts["job"] += 1
+        scheduler.after(machine.job_run_seconds(), end_job)
+
+    def end_job(ts):
+        publish(machine.TOPIC_JOB, json.dumps(machine.end_job(ts)))
+        counts["job"] += 1
+        scheduler.after(machine.job_idle_seconds(), start_job)
+
+    scheduler.after(index % 100 * TICK, start_job)
+
+
+# ---------------- WORKERS ----------------
+def run_worker(worker_id, specs, args, stats):
+    if args.dry_run:
+        client = None
+        publish = lambda topic, payload: None  # noqa: E731
+    else:
+        client = mqtt.Client()
+        client.connect(args.broker, args.port, 60)
+        client.loop_start()
+        publish = client.publish
+
+    scheduler = FleetScheduler()
+    counts = Counter()
+    for index, spec in enumerate(specs):
+        rng = random.Random(f"{args.seed}:{spec['id']}") if args.seed is not None else random.Random()
+        machine = CNCMachine(spec["id"], client, job_run=spec["job_run"],
+                             job_idle=spec["job_idle"], jobs=spec["jobs"], rng=rng)
+        attach_machine(machine, spec["rates"], index, scheduler, publish, counts)
+
+    async def report():
+        while True:
+            await asyncio.sleep(args.report_interval)
+            stats.put((worker_id, time.monotonic(), dict(counts)))
+
+    async def main():
+        await asyncio.gather(scheduler.run(), report())
+
+    asyncio.run(main())
+
+
+def target_rates(specs):
+    targets = Counter()
+    for spec in specs:
+        for stream, hz in spec["rates"].items():
+            targets[stream] += hz
+    return targets
+
+
+def report_loop(stats, specs, workers):
+    targets = target_rates(specs)
+    latest = {}
+    previous = None
+
+    while True:
+        worker_id, at, counts = stats.get()
+        latest[worker_id] = counts
+        if len(latest) < workers:
+            continue
+
+        totals = Counter()
+        for c in latest.values():
+            totals.update(c)
+
+        if previous is not None:
+            elapsed = at - previous[0]
+            parts = []
+            for stream in list(STREAMS) + ["job"]:
+                rate = (totals[stream] - previous[1][stream]) / elapsed
+                if stream in targets:
+                    pct = 100 * rate / targets[stream] if targets[stream] else 0
+                    parts.append(f"{stream} {rate:,.0f}/s ({pct:.1f}% of {targets[stream]:,.0f})")
+                else:
+                    parts.append(f"{stream} {rate:,.1f}/s")
+            print(f"[fleet {len(specs)} machines / {workers} workers] " + "  ".join(parts), flush=True)
+
+        previous = (at, totals)
+        latest.clear()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--config", required=True, help="fleet config JSON")
+    parser.add_argument("--workers", type=int, default=1, help="worker processes to shard machines across")
+    parser.add_argument("--broker", default=BROKER)
+    parser.add_argument("--port", type=int, default=PORT)
+    parser.add_argument("--report-interval", type=float, default=5.0, help="seconds between rate reports")
+    parser.add_argument("--dry-run", action="store_true", help="generate payloads without an MQTT broker")
+    parser.add_argument("--seed", type=int, default=None, help="seed per-machine randomness for reproducible runs")
+    args = parser.parse_args()
+
+    specs = load_config(args.config)
+    workers = max(1, min(args.workers, len(specs)))
+    print(f"Fleet simulator: {len(specs)} machines on {workers} worker(s)")
+
+    stats = multiprocessing.Queue()
+    processes = [
+        multiprocessing.Process(target=run_worker, args=(i, specs[i::workers], args, stats), daemon=True)
+        for i in range(workers)
+    ]
+    for p in processes:
+        p.start()
+
+    try:
+        report_loop(stats, specs, workers)
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,43 @@
+"""Encodings for batched telemetry messages.
+
+Single-sample mode publishes one JSON object per MQTT message. Batched modes
+pack N samples into one message on `cnc/<machine_id>/telemetry/<format>`:
+
+- "json": a JSON array of the same objects; Telegraf's json parser turns
+  each element into a metric.
+- "msgpack": concatenated Telegraf MessagePack metrics ({time, fields});
+  name and machine_id come from the topic, as for JSON, to keep them small.
+
+See telegraf.batched.conf for the matching inputs.
+"""
+import json
+
+try:
+    import msgpack
+except ImportError:  # only needed for the msgpack format
+    msgpack = None
+
+FORMATS = ("json", "msgpack")
+
+
+def batch_topic(machine_id, fmt):
+    return f"cnc/{machine_id}/telemetry/{fmt}"
+
+
+def encode_samples(samples, fmt):
+    """Encode sample dicts ({<field>: value, "timestamp": ms}) as one message."""
+    if fmt == "json":
+        return json.dumps(samples, separators=(",", ":"))
+
+    if fmt == "msgpack":
+        if msgpack is None:
+            raise RuntimeError("msgpack format requires the msgpack package (pip install msgpack)")
+        return b"".join(
+            msgpack.packb({
+                "time": msgpack.Timestamp.from_unix_nano(s["timestamp"] * 1_000_000),
+                "fields": {k: v for k, v in s.items() if k != "timestamp"},
+            })
+            for s in samples
+        )
+
+    raise ValueError(f"Unknown payload format: {fmt}")